@@ -0,0 +1,35 @@
+# account/middleware.py
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+
+class JWTAuthMiddleware:
+    """
+    Authenticate WebSocket connections from a ``?token=<access token>`` query
+    parameter, since browsers cannot set an Authorization header on a socket.
+    Falls back to whatever user an outer session middleware already resolved.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.authentication = JWTAuthentication()
+
+    async def __call__(self, scope, receive, send):
+        query = parse_qs(scope.get('query_string', b'').decode())
+        token = query.get('token', [None])[0]
+        if token:
+            user = await self.get_user(token)
+            if user is not None:
+                scope = dict(scope, user=user)
+        return await self.inner(scope, receive, send)
+
+    @database_sync_to_async
+    def get_user(self, raw_token):
+        try:
+            validated_token = self.authentication.get_validated_token(raw_token)
+            return self.authentication.get_user(validated_token)
+        except (InvalidToken, TokenError):
+            return None
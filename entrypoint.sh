@@ -40,11 +40,11 @@ python manage.py collectstatic --noinput
 # Start the Django application
 echo "Starting Django server..."
 if [ "$ENVIRONMENT" = "PRODUCTION" ]; then
-    exec gunicorn rolwebsite.wsgi:application \
+    # ASGI workers so WebSocket routes (flow live editing) are served too
+    exec gunicorn rolwebsite.asgi:application \
         --bind 0.0.0.0:8000 \
         --workers 3 \
-        --worker-class gthread \
-        --threads 2 \
+        --worker-class uvicorn_worker.UvicornWorker \
         --worker-connections 1000 \
         --max-requests 1000 \
         --max-requests-jitter 100 \
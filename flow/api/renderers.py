@@ -0,0 +1,32 @@
+# renderers.py
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from flow.compact import CompactFormatError, encode_flow, decode_flow
+
+COMPACT_MEDIA_TYPE = 'application/vnd.rolwebsite.flow-compact+json'
+
+
+class CompactFlowRenderer(JSONRenderer):
+    """Renders responses carrying nodes/edges in the columnar compact format"""
+    media_type = COMPACT_MEDIA_TYPE
+    format = 'compact'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Errors and other payloads without a graph go out as plain JSON
+        if isinstance(data, dict) and isinstance(data.get('nodes'), list) and isinstance(data.get('edges'), list):
+            data = encode_flow(data)
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+class CompactFlowParser(JSONParser):
+    """Accepts a compact-format request body and hands the view plain React Flow data"""
+    media_type = COMPACT_MEDIA_TYPE
+    renderer_class = CompactFlowRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return decode_flow(super().parse(stream, media_type, parser_context))
+        except CompactFormatError as e:
+            raise ParseError(f'Compact flow parse error - {e}')
@@ -1,6 +1,9 @@
 # serializers.py
+import math
+
 from rest_framework import serializers
-from flow.models import FlowChart, Node, Edge, FlowVersion
+from rest_framework.reverse import reverse
+from flow.models import FlowChart, Node, Edge, FlowVersion, FlowComponent
 
 
 class NodeSerializer(serializers.ModelSerializer):
@@ -59,12 +62,18 @@ class EdgeSerializer(serializers.ModelSerializer):
 class FlowChartSerializer(serializers.ModelSerializer):
     nodes = NodeSerializer(many=True, read_only=True)
     edges = EdgeSerializer(many=True, read_only=True)
+    thumbnail_url = serializers.SerializerMethodField()
 
     class Meta:
         model = FlowChart
         fields = '__all__'
         read_only_fields = ('owner', 'created_at', 'updated_at', 'version')
 
+    def get_thumbnail_url(self, obj):
+        """Versioned so clients can cache the image until the next save"""
+        url = reverse('flowchart-thumbnail', args=[obj.pk], request=self.context.get('request'))
+        return f'{url}?v={obj.version}'
+
 
 class FlowChartDetailSerializer(serializers.ModelSerializer):
     nodes = NodeSerializer(many=True, read_only=True)
@@ -76,5 +85,48 @@ class FlowChartDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ('owner', 'created_at', 'updated_at')
 
 
+class PublicFlowChartSerializer(serializers.ModelSerializer):
+    """Gallery entry for a public chart (no nodes or edges)"""
+    owner = serializers.CharField(source='owner.username', read_only=True)
+
+    class Meta:
+        model = FlowChart
+        fields = ('id', 'name', 'description', 'owner', 'version', 'created_at', 'updated_at')
+
+
+class FlowComponentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FlowComponent
+        fields = '__all__'
+        read_only_fields = ('owner', 'nodes', 'edges', 'node_count', 'edge_count', 'created_at', 'updated_at')
+
+
+class FlowComponentSummarySerializer(serializers.ModelSerializer):
+    """Library listing entry (no nodes or edges)"""
+
+    class Meta:
+        model = FlowComponent
+        fields = ('id', 'name', 'description', 'node_count', 'edge_count', 'created_at', 'updated_at')
+
+
+class ComponentExtractSerializer(serializers.Serializer):
+    """Input of extract-component"""
+    nodeIds = serializers.ListField(child=serializers.CharField())
+    name = serializers.CharField()
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class OffsetSerializer(serializers.Serializer):
+    x = serializers.FloatField(default=0.0)
+    y = serializers.FloatField(default=0.0)
+
+    def validate(self, attrs):
+        if not all(math.isfinite(value) for value in attrs.values()):
+            raise serializers.ValidationError('x and y must be finite numbers')
+        return attrs
 
 
+class ComponentInsertSerializer(serializers.Serializer):
+    """Input of insert-component"""
+    component = serializers.IntegerField()
+    offset = OffsetSerializer(required=False, allow_null=True)
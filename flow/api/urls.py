@@ -1,10 +1,12 @@
 # urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import FlowChartViewSet
+from .views import FlowChartViewSet, FlowComponentViewSet, PublicFlowChartViewSet
 
 router = DefaultRouter()
 router.register(r'flowcharts', FlowChartViewSet, basename='flowchart')
+router.register(r'components', FlowComponentViewSet, basename='flowcomponent')
+router.register(r'public/flowcharts', PublicFlowChartViewSet, basename='public-flowchart')
 
 urlpatterns = [
     path('api/', include(router.urls)),
@@ -1,18 +1,75 @@
 
 # views.py
-from rest_framework import viewsets, status
+import math
+
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from django.db import transaction
-from flow.models import FlowChart, Node, Edge, FlowVersion
-from .serializers import FlowChartSerializer, FlowChartDetailSerializer
+from django.core.files.storage import default_storage
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from rolwebsite.background import run_in_background
+from flow.models import FlowChart, FlowComponent, Node, Edge, FlowVersion
+from flow.components import ComponentError, extract_component, instantiate_component
+from flow.export import iter_flow_json, gzip_chunks
+from flow.graph import get_flow_graph
+from flow.hashing import hash_flow_payload, current_content_hash, remember_content_hash
+from flow.layout import LayoutError, apply_layout
+from flow.merge import MergeConflict, merge_flow_save
+from flow.importing import ImportFormatError, read_flow_file, import_flow_documents
+from flow.services import BULK_BATCH_SIZE, node_fields, edge_fields, duplicate_flow_chart, notify_graph_replaced
+from flow.validation import validate_flow_payload
+from flow.search import search_flows
+from flow.rendering import THUMBNAIL_FORMATS, generate_thumbnails, thumbnail_path
+from flow.public import get_public_chart, get_latest_public_payload, get_public_version_payload
+from flow.spatial import Rect, query_viewport
+from .renderers import CompactFlowRenderer, CompactFlowParser
+from .serializers import (
+    FlowChartSerializer, FlowChartDetailSerializer, NodeSerializer, EdgeSerializer,
+    PublicFlowChartSerializer, FlowComponentSerializer, FlowComponentSummarySerializer,
+    ComponentExtractSerializer, ComponentInsertSerializer
+)
+
+
+def _parse_rect(params, prefix=''):
+    """Read x/y/width/height query params into a Rect (None if absent)"""
+    keys = [f'{prefix}{key}' for key in ('x', 'y', 'width', 'height')]
+    if not any(key in params for key in keys):
+        return None
+    try:
+        rect = Rect(*(float(params[key]) for key in keys))
+    except (KeyError, ValueError):
+        raise ValueError(f"{', '.join(keys)} must all be numbers")
+    if not all(math.isfinite(value) for value in rect):
+        raise ValueError(f"{', '.join(keys)} must all be finite numbers")
+    if rect.width < 0 or rect.height < 0:
+        raise ValueError(f'{keys[2]} and {keys[3]} must not be negative')
+    return rect
+
+
+def _with_etag(request, etag, build_response):
+    """Answer 304 if the client's If-None-Match matches, else build and tag the response"""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = build_response()
+    response['ETag'] = etag
+    return response
 
 
 class FlowChartViewSet(viewsets.ModelViewSet):
     serializer_class = FlowChartSerializer
     permission_classes = [IsAuthenticated]
 
+    # Actions that can exchange the graph in the compact format (Accept / Content-Type)
+    COMPACT_ACTIONS = ('retrieve', 'export_flow', 'save_flow')
+
     def get_queryset(self):
         return FlowChart.objects.filter(owner=self.request.user)
 
@@ -21,17 +78,55 @@ class FlowChartViewSet(viewsets.ModelViewSet):
             return FlowChartDetailSerializer
         return FlowChartSerializer
 
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.action in self.COMPACT_ACTIONS:
+            renderers.append(CompactFlowRenderer())
+        return renderers
+
+    def _is_compact(self, request):
+        return isinstance(getattr(request, 'accepted_renderer', None), CompactFlowRenderer)
+
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
-    @action(detail=True, methods=['post'])
+    def retrieve(self, request, *args, **kwargs):
+        flow_chart = self.get_object()
+        # Metadata edits bump updated_at without touching the content hash
+        etag = f'"{current_content_hash(flow_chart)}-{int(flow_chart.updated_at.timestamp() * 1e6)}'
+        etag += '-compact"' if self._is_compact(request) else '"'
+        response = _with_etag(request, etag, lambda: Response(self.get_serializer(flow_chart).data))
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+    @action(detail=True, methods=['post'], parser_classes=[JSONParser, CompactFlowParser])
     def save_flow(self, request, pk=None):
         """Save complete flow state (nodes + edges + viewport)"""
         flow_chart = self.get_object()
         data = request.data
 
+        # Reject malformed payloads up front, with every problem listed
+        errors = validate_flow_payload(data)
+        if errors:
+            return Response({'error': 'Invalid flow payload', 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
+            # Autosave often posts an unchanged graph; don't mint a version for it
+            content_hash = hash_flow_payload(data)
+            if content_hash == current_content_hash(flow_chart):
+                return Response({'message': 'No changes to save', 'version': flow_chart.version, 'unchanged': True})
+
+            merged = False
             with transaction.atomic():
+                flow_chart = FlowChart.objects.select_for_update().get(pk=flow_chart.pk)
+
+                # A save made against an older version is merged, not applied blindly
+                base_version = data.get('baseVersion')
+                if base_version is not None and base_version != flow_chart.version:
+                    data = merge_flow_save(flow_chart, base_version, data)
+                    content_hash = hash_flow_payload(data)
+                    merged = True
+
                 # Update viewport and settings
                 flow_chart.viewport = data.get('viewport', {})
                 flow_chart.flow_settings = data.get('flowSettings', {})
@@ -42,69 +137,434 @@ class FlowChartViewSet(viewsets.ModelViewSet):
                 flow_chart.nodes.all().delete()
                 flow_chart.edges.all().delete()
 
-                # Create new nodes
-                nodes_data = data.get('nodes', [])
-                for node_data in nodes_data:
-                    Node.objects.create(
-                        flow_chart=flow_chart,
-                        node_id=node_data['id'],
-                        node_type=node_data.get('type', 'default'),
-                        position_x=node_data['position']['x'],
-                        position_y=node_data['position']['y'],
-                        data=node_data.get('data', {}),
-                        style=node_data.get('style', {}),
-                        width=node_data.get('width'),
-                        height=node_data.get('height'),
-                        draggable=node_data.get('draggable', True),
-                        selectable=node_data.get('selectable', True),
-                        deletable=node_data.get('deletable', True),
-                    )
-
-                # Create new edges
-                edges_data = data.get('edges', [])
-                for edge_data in edges_data:
-                    Edge.objects.create(
-                        flow_chart=flow_chart,
-                        edge_id=edge_data['id'],
-                        edge_type=edge_data.get('type', 'default'),
-                        source_node_id=edge_data['source'],
-                        target_node_id=edge_data['target'],
-                        source_handle=edge_data.get('sourceHandle', ''),
-                        target_handle=edge_data.get('targetHandle', ''),
-                        data=edge_data.get('data', {}),
-                        style=edge_data.get('style', {}),
-                        label=edge_data.get('label', ''),
-                        label_style=edge_data.get('labelStyle', {}),
-                        animated=edge_data.get('animated', False),
-                        deletable=edge_data.get('deletable', True),
-                    )
+                # Create new nodes and edges
+                Node.objects.bulk_create(
+                    (Node(flow_chart=flow_chart, **node_fields(node_data)) for node_data in data.get('nodes', [])),
+                    batch_size=BULK_BATCH_SIZE
+                )
+                Edge.objects.bulk_create(
+                    (Edge(flow_chart=flow_chart, **edge_fields(edge_data)) for edge_data in data.get('edges', [])),
+                    batch_size=BULK_BATCH_SIZE
+                )
 
                 # Create version snapshot
                 FlowVersion.objects.create(
                     flow_chart=flow_chart,
                     version_number=flow_chart.version,
                     snapshot_data=data,
+                    content_hash=content_hash,
                     created_by=request.user,
                     change_description=data.get('changeDescription', '')
                 )
 
+            remember_content_hash(flow_chart, content_hash)
+            run_in_background(generate_thumbnails, flow_chart.pk, flow_chart.version)
+            notify_graph_replaced(flow_chart.pk, flow_chart.version)
+            if merged:
+                # The client needs the combined state to continue editing from
+                return Response({
+                    'message': 'Flow merged and saved',
+                    'version': flow_chart.version,
+                    'merged': True,
+                    'nodes': data['nodes'],
+                    'edges': data['edges'],
+                    'flowSettings': data['flowSettings'],
+                })
             return Response({'message': 'Flow saved successfully', 'version': flow_chart.version})
 
+        except MergeConflict as e:
+            return Response(
+                {'error': str(e), 'version': flow_chart.version, 'conflicts': e.conflicts},
+                status=status.HTTP_409_CONFLICT,
+            )
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=['post'])
+    def duplicate(self, request, pk=None):
+        """Copy the chart server-side (name, includeVersions optional)"""
+        flow_chart = self.get_object()
+        include_versions = request.data.get('includeVersions', False)
+        if not isinstance(include_versions, bool):
+            return Response({'error': 'includeVersions must be a boolean'}, status=status.HTTP_400_BAD_REQUEST)
+        name = request.data.get('name') or ''
+        if not isinstance(name, str):
+            return Response({'error': 'name must be a string'}, status=status.HTTP_400_BAD_REQUEST)
+
+        copy = duplicate_flow_chart(
+            flow_chart, request.user,
+            name=name[:200] or None,
+            include_versions=include_versions,
+        )
+        run_in_background(generate_thumbnails, copy.pk, copy.version)
+        return Response(FlowChartSerializer(copy, context={'request': request}).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def import_flows(self, request):
+        """Bulk import charts from an NDJSON file or a zip of React Flow JSON files"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': "Upload the flows as a 'file' field"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            results = import_flow_documents(read_flow_file(upload, upload.name), request.user)
+        except ImportFormatError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        created = sum(1 for result in results if result['status'] == 'created')
+        return Response(
+            {'created': created, 'failed': len(results) - created, 'results': results},
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        )
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Find the user's charts whose node text or edge labels match ?q="""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q query parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'query': query, 'results': search_flows(request.user, query)})
+
     @action(detail=True, methods=['get'])
     def export_flow(self, request, pk=None):
-        """Export flow in React Flow format"""
+        """Export flow in React Flow format (?stream=true for large charts)"""
+        flow_chart = self.get_object()
+        content_hash = current_content_hash(flow_chart)
+
+        if request.query_params.get('stream', '').lower() in ('1', 'true'):
+            return self._stream_export(request, flow_chart, content_hash)
+
+        def build_response():
+            # Transform to React Flow format
+            flow_data = {
+                'nodes': [NodeSerializer(node).to_representation(node) for node in flow_chart.nodes.all()],
+                'edges': [EdgeSerializer(edge).to_representation(edge) for edge in flow_chart.edges.all()],
+                'viewport': flow_chart.viewport,
+                'flowSettings': flow_chart.flow_settings,
+            }
+            return Response(flow_data)
+
+        etag = f'"{content_hash}-compact"' if self._is_compact(request) else f'"{content_hash}"'
+        response = _with_etag(request, etag, build_response)
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+    def _stream_export(self, request, flow_chart, content_hash):
+        """Stream the export chunk by chunk, gzipped if the client accepts it"""
+        use_gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        # Each encoding is a different byte sequence, so each gets its own strong ETag
+        etag = f'"{content_hash}-stream{"-gzip" if use_gzip else ""}"'
+
+        def build_response():
+            chunks = iter_flow_json(flow_chart)
+            if use_gzip:
+                chunks = gzip_chunks(chunks)
+            response = StreamingHttpResponse(chunks, content_type='application/json')
+            if use_gzip:
+                response['Content-Encoding'] = 'gzip'
+            response['Content-Disposition'] = (
+                f'attachment; filename="flowchart-{flow_chart.pk}-v{flow_chart.version}.json"'
+            )
+            return response
+
+        response = _with_etag(request, etag, build_response)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    @action(detail=True, methods=['get'])
+    def thumbnail(self, request, pk=None):
+        """PNG (default) or SVG preview of the chart (?type=svg)"""
         flow_chart = self.get_object()
-        serializer = FlowChartDetailSerializer(flow_chart)
+        extension = request.query_params.get('type', 'png')
+        if extension not in THUMBNAIL_FORMATS:
+            return Response(
+                {'error': f"type must be one of {', '.join(THUMBNAIL_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        path = thumbnail_path(flow_chart.pk, flow_chart.version, extension)
+        if not default_storage.exists(path):
+            # Background render not finished (or chart never saved): render inline
+            paths = generate_thumbnails(flow_chart.pk, flow_chart.version)
+            path = paths[extension] if paths else None
+
+        try:
+            # A newer save may have pruned this version's files meanwhile
+            file = default_storage.open(path) if path else None
+        except FileNotFoundError:
+            file = None
+        if file is None:
+            return Response(
+                {'error': 'Flow chart changed or was deleted; reload it for a fresh thumbnail'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        content_type = 'image/svg+xml' if extension == 'svg' else 'image/png'
+        response = FileResponse(file, content_type=content_type)
+        if request.query_params.get('v') == str(flow_chart.version):
+            response['Cache-Control'] = 'private, max-age=31536000, immutable'
+        else:
+            response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    @action(detail=True, methods=['get'])
+    def graph(self, request, pk=None):
+        """Summary of the flow graph structure"""
+        graph = get_flow_graph(self.get_object())
+        return Response({
+            'nodeCount': graph.node_count,
+            'edgeCount': graph.edge_count,
+            'hasCycle': graph.has_cycle(),
+            'componentCount': len(graph.connected_components()),
+        })
+
+    @action(detail=True, methods=['get'], url_path='graph/topological-order')
+    def topological_order(self, request, pk=None):
+        """Node IDs in dependency order (409 if the graph has a cycle)"""
+        graph = get_flow_graph(self.get_object())
+        order = graph.topological_order()
+        if order is None:
+            return Response(
+                {'error': 'Flow graph contains a cycle', 'cycle': graph.find_cycle()},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response({'order': order})
+
+    @action(detail=True, methods=['get'], url_path='graph/cycles')
+    def cycles(self, request, pk=None):
+        """Detect whether the flow graph contains a directed cycle"""
+        graph = get_flow_graph(self.get_object())
+        cycle = graph.find_cycle()
+        return Response({'hasCycle': bool(cycle), 'cycle': cycle})
+
+    @action(detail=True, methods=['get'], url_path='graph/reachable')
+    def reachable(self, request, pk=None):
+        """Nodes reachable from ?node= (direction: downstream, upstream or both)"""
+        graph = get_flow_graph(self.get_object())
+        node_id = request.query_params.get('node')
+        direction = request.query_params.get('direction', 'downstream')
+
+        if direction not in ('downstream', 'upstream', 'both'):
+            return Response(
+                {'error': "direction must be 'downstream', 'upstream' or 'both'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not node_id:
+            return Response({'error': 'node query parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if node_id not in graph:
+            return Response({'error': f'Node {node_id} not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({'node': node_id, 'direction': direction, 'nodes': graph.reachable(node_id, direction)})
 
-        # Transform to React Flow format
-        flow_data = {
-            'nodes': [NodeSerializer(node).to_representation(node) for node in flow_chart.nodes.all()],
-            'edges': [EdgeSerializer(edge).to_representation(edge) for edge in flow_chart.edges.all()],
-            'viewport': flow_chart.viewport,
-            'flowSettings': flow_chart.flow_settings,
-        }
+    @action(detail=True, methods=['get'], url_path='graph/shortest-path')
+    def shortest_path(self, request, pk=None):
+        """Fewest-edges path between ?source= and ?target="""
+        graph = get_flow_graph(self.get_object())
+        source = request.query_params.get('source')
+        target = request.query_params.get('target')
+        directed = request.query_params.get('directed', 'true').lower() != 'false'
+
+        if not source or not target:
+            return Response(
+                {'error': 'source and target query parameters are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        for node_id in (source, target):
+            if node_id not in graph:
+                return Response({'error': f'Node {node_id} not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        path = graph.shortest_path(source, target, directed=directed)
+        return Response({
+            'source': source,
+            'target': target,
+            'path': path,
+            'length': len(path) - 1 if path else None,
+        })
+
+    @action(detail=True, methods=['get'], url_path='graph/components')
+    def components(self, request, pk=None):
+        """Weakly connected components of the flow graph"""
+        graph = get_flow_graph(self.get_object())
+        components = graph.connected_components()
+        return Response({'count': len(components), 'components': components})
+
+    @action(detail=True, methods=['get'])
+    def viewport(self, request, pk=None):
+        """Nodes intersecting ?x=&y=&width=&height= plus the edges touching them.
+
+        Pass the previously loaded rectangle as prev_x/prev_y/prev_width/prev_height
+        to receive only what entered the view while panning.
+        """
+        flow_chart = self.get_object()
+        try:
+            rect = _parse_rect(request.query_params)
+            previous = _parse_rect(request.query_params, prefix='prev_')
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if rect is None:
+            return Response(
+                {'error': 'x, y, width and height query parameters are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        nodes, edges = query_viewport(flow_chart, rect, previous)
+        node_serializer = NodeSerializer()
+        edge_serializer = EdgeSerializer()
+        return Response({
+            'version': flow_chart.version,
+            'rect': rect._asdict(),
+            'nodes': [node_serializer.to_representation(node) for node in nodes],
+            'edges': [edge_serializer.to_representation(edge) for edge in edges],
+        })
+
+    @action(detail=True, methods=['post'])
+    def layout(self, request, pk=None):
+        """Compute node positions server-side (mode: layered or force, direction: TB or LR)"""
+        flow_chart = self.get_object()
+        try:
+            positions, changed = apply_layout(
+                flow_chart,
+                request.user,
+                mode=request.data.get('mode', 'layered'),
+                direction=request.data.get('direction', 'TB'),
+            )
+        except LayoutError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if changed:
+            notify_graph_replaced(flow_chart.pk, flow_chart.version)
+
+        return Response({
+            'version': flow_chart.version,
+            'changed': changed,
+            'positions': {node_id: {'x': x, 'y': y} for node_id, (x, y) in positions.items()},
+        })
+
+
+    @action(detail=True, methods=['post'], url_path='extract-component')
+    def extract_component(self, request, pk=None):
+        """Save the selected nodes (nodeIds) and the edges between them as a reusable component"""
+        flow_chart = self.get_object()
+        serializer = ComponentExtractSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {'error': 'nodeIds (list) and name are required', 'errors': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        data = serializer.validated_data
+        try:
+            component = extract_component(
+                flow_chart, data['nodeIds'], data['name'][:200], request.user, description=data['description'],
+            )
+        except ComponentError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(FlowComponentSerializer(component).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'], url_path='insert-component')
+    def insert_component(self, request, pk=None):
+        """Insert a copy of a component at offset {x, y} with freshly generated ids"""
+        flow_chart = self.get_object()
+        serializer = ComponentInsertSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {'error': 'component (id) and an optional offset {"x": number, "y": number} are expected',
+                 'errors': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        data = serializer.validated_data
+        component = FlowComponent.objects.filter(pk=data['component'], owner=request.user).first()
+        if component is None:
+            return Response({'error': 'Component not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        offset = data.get('offset') or {'x': 0.0, 'y': 0.0}
+        flow_chart, node_map, nodes, edges = instantiate_component(
+            component, flow_chart.pk, offset['x'], offset['y']
+        )
+        run_in_background(generate_thumbnails, flow_chart.pk, flow_chart.version)
+        notify_graph_replaced(flow_chart.pk, flow_chart.version)
+
+        node_serializer = NodeSerializer()
+        edge_serializer = EdgeSerializer()
+        return Response({
+            'version': flow_chart.version,
+            'idMap': node_map,
+            'nodes': [node_serializer.to_representation(node) for node in nodes],
+            'edges': [edge_serializer.to_representation(edge) for edge in edges],
+        }, status=status.HTTP_201_CREATED)
+
+
+class FlowComponentViewSet(mixins.UpdateModelMixin, mixins.DestroyModelMixin, viewsets.ReadOnlyModelViewSet):
+    """The user's component library; components are created via extract-component"""
+    serializer_class = FlowComponentSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = FlowComponent.objects.filter(owner=self.request.user)
+        if self.action == 'list':
+            # Listing should not drag thousands of nodes along
+            queryset = queryset.defer('nodes', 'edges')
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return FlowComponentSummarySerializer
+        return FlowComponentSerializer
+
+class PublicFlowGalleryPagination(PageNumberPagination):
+    page_size = 24
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class PublicFlowChartViewSet(viewsets.ReadOnlyModelViewSet):
+    """Anonymous, read-only access to charts marked is_public"""
+    serializer_class = PublicFlowChartSerializer
+    permission_classes = [AllowAny]
+    # No authentication: responses are identical for everyone and cacheable
+    authentication_classes = []
+    pagination_class = PublicFlowGalleryPagination
+
+    GALLERY_MAX_AGE = 60
+    LATEST_MAX_AGE = 60
+    IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+    def get_queryset(self):
+        return FlowChart.objects.filter(is_public=True).select_related('owner')
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        response['Cache-Control'] = f'public, max-age={self.GALLERY_MAX_AGE}'
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        """Latest version; short-lived cache, points at the immutable versioned URL"""
+        flow_chart = self.get_object()
+        payload, has_snapshot = get_latest_public_payload(flow_chart)
+        response = Response(payload)
+        response['Cache-Control'] = f'public, max-age={self.LATEST_MAX_AGE}'
+        if has_snapshot:
+            response['Content-Location'] = request.build_absolute_uri(f'versions/{flow_chart.version}/')
+        return response
+
+    @action(detail=True, methods=['get'], url_path=r'versions/(?P<version>\d+)')
+    def version_detail(self, request, pk=None, version=None):
+        """The current version's snapshot; never changes, so it is cached as immutable.
+
+        Older versions are not served: they may hold content the owner
+        removed before publishing the chart.
+        """
+        try:
+            flow_chart = get_public_chart(int(pk))
+        except ValueError:
+            flow_chart = None
+        if flow_chart is None or int(version) != flow_chart.version:
+            payload = None
+        else:
+            payload = get_public_version_payload(flow_chart, flow_chart.version)
+        if payload is None:
+            return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        return Response(flow_data)
\ No newline at end of file
+        response = Response(payload)
+        response['Cache-Control'] = f'public, max-age={self.IMMUTABLE_MAX_AGE}, immutable'
+        return response
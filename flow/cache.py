@@ -0,0 +1,39 @@
+# cache.py
+import threading
+from collections import OrderedDict
+
+
+class VersionedCache:
+    """In-process LRU cache keyed by (flow_chart_id, version).
+
+    Every save bumps FlowChart.version, so entries never need invalidating:
+    a new version simply misses and older versions age out of the LRU.
+    """
+
+    def __init__(self, builder, max_entries=64):
+        self.builder = builder
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, flow_chart):
+        key = (flow_chart.pk, flow_chart.version)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+
+        # Build outside the lock so a slow load does not block other charts
+        value = self.builder(flow_chart)
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
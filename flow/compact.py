@@ -0,0 +1,198 @@
+# compact.py
+"""
+Columnar encoding of React Flow payloads.
+
+Large charts repeat the same keys, types and style dicts on every node.
+The compact form stores nodes and edges as parallel column arrays and
+replaces every JSON object (style, data, labelStyle) and type name by an
+index into a table of distinct values, so each value is sent once:
+
+    {
+      "format": "flow-compact/1",
+      "types": ["default", "custom"],
+      "objects": [{}, {"background": "#fff"}, {"label": "Start"}],
+      "nodes": {"id": [...], "type": [0, ...], "x": [...], "y": [...],
+                "width": [...], "height": [...], "style": [1, ...],
+                "data": [2, ...], "flags": [7, ...]},
+      "edges": {"id": [...], "type": [...], "source": [0, ...],
+                "target": [...], "sourceHandle": [...], "targetHandle": [...],
+                "label": [...], "labelStyle": [...], "style": [...],
+                "data": [...], "flags": [...]},
+      ...other top-level keys unchanged...
+    }
+
+Edge source/target are indexes into the node columns when the node is part
+of the payload, otherwise the raw id string.
+"""
+import json
+
+COMPACT_FORMAT = 'flow-compact/1'
+
+NODE_FLAGS = ('draggable', 'selectable', 'deletable')
+EDGE_FLAGS = ('animated', 'deletable')
+NODE_FLAG_DEFAULTS = {'draggable': True, 'selectable': True, 'deletable': True}
+EDGE_FLAG_DEFAULTS = {'animated': False, 'deletable': True}
+
+
+class CompactFormatError(ValueError):
+    pass
+
+
+class _Table:
+    """Interns values by their canonical JSON text"""
+
+    def __init__(self):
+        self.values = []
+        self.index = {}
+
+    def add(self, value):
+        key = json.dumps(value, sort_keys=True, separators=(',', ':'))
+        position = self.index.get(key)
+        if position is None:
+            position = self.index[key] = len(self.values)
+            self.values.append(value)
+        return position
+
+
+def _flags(item, names, defaults):
+    bits = 0
+    for bit, name in enumerate(names):
+        if item.get(name, defaults[name]):
+            bits |= 1 << bit
+    return bits
+
+
+def _unflag(bits, names):
+    return {name: bool(bits >> bit & 1) for bit, name in enumerate(names)}
+
+
+def encode_flow(payload):
+    """React Flow payload (dict with nodes and edges lists) -> compact dict"""
+    types = _Table()
+    objects = _Table()
+    nodes = payload.get('nodes', [])
+    edges = payload.get('edges', [])
+
+    node_index = {}
+    node_columns = {name: [] for name in ('id', 'type', 'x', 'y', 'width', 'height', 'style', 'data', 'flags')}
+    for i, node in enumerate(nodes):
+        node_index[node['id']] = i
+        node_columns['id'].append(node['id'])
+        node_columns['type'].append(types.add(node.get('type', 'default')))
+        node_columns['x'].append(node['position']['x'])
+        node_columns['y'].append(node['position']['y'])
+        node_columns['width'].append(node.get('width'))
+        node_columns['height'].append(node.get('height'))
+        node_columns['style'].append(objects.add(node.get('style', {})))
+        node_columns['data'].append(objects.add(node.get('data', {})))
+        node_columns['flags'].append(_flags(node, NODE_FLAGS, NODE_FLAG_DEFAULTS))
+
+    edge_columns = {name: [] for name in (
+        'id', 'type', 'source', 'target', 'sourceHandle', 'targetHandle',
+        'label', 'labelStyle', 'style', 'data', 'flags',
+    )}
+    for edge in edges:
+        edge_columns['id'].append(edge['id'])
+        edge_columns['type'].append(types.add(edge.get('type', 'default')))
+        edge_columns['source'].append(node_index.get(edge['source'], edge['source']))
+        edge_columns['target'].append(node_index.get(edge['target'], edge['target']))
+        edge_columns['sourceHandle'].append(edge.get('sourceHandle') or '')
+        edge_columns['targetHandle'].append(edge.get('targetHandle') or '')
+        edge_columns['label'].append(edge.get('label', ''))
+        edge_columns['labelStyle'].append(objects.add(edge.get('labelStyle', {})))
+        edge_columns['style'].append(objects.add(edge.get('style', {})))
+        edge_columns['data'].append(objects.add(edge.get('data', {})))
+        edge_columns['flags'].append(_flags(edge, EDGE_FLAGS, EDGE_FLAG_DEFAULTS))
+
+    encoded = {key: value for key, value in payload.items() if key not in ('nodes', 'edges')}
+    encoded.update({
+        'format': COMPACT_FORMAT,
+        'types': types.values,
+        'objects': objects.values,
+        'nodes': node_columns,
+        'edges': edge_columns,
+    })
+    return encoded
+
+
+def _columns(section, names, path):
+    if not isinstance(section, dict):
+        raise CompactFormatError(f'{path} must be an object of columns')
+    try:
+        columns = [section[name] for name in names]
+    except KeyError as e:
+        raise CompactFormatError(f'{path} is missing the {e.args[0]} column')
+    if any(not isinstance(column, list) or len(column) != len(columns[0]) for column in columns):
+        raise CompactFormatError(f'{path} columns must be lists of equal length')
+    return columns
+
+
+def _ref(table, position):
+    """table[position], rejecting negative or non-integer references"""
+    if isinstance(position, bool) or not isinstance(position, int) or position < 0:
+        raise IndexError(f'{position!r} is not a valid reference')
+    return table[position]
+
+
+def decode_flow(encoded):
+    """Compact dict -> React Flow payload (inverse of encode_flow)"""
+    if not isinstance(encoded, dict) or encoded.get('format') != COMPACT_FORMAT:
+        raise CompactFormatError(f"Expected a '{COMPACT_FORMAT}' document")
+    types = encoded.get('types', [])
+    objects = encoded.get('objects', [])
+
+    ids, type_refs, xs, ys, widths, heights, styles, data, flags = _columns(
+        encoded.get('nodes', {}),
+        ('id', 'type', 'x', 'y', 'width', 'height', 'style', 'data', 'flags'),
+        'nodes',
+    )
+    try:
+        nodes = [
+            {
+                'id': ids[i],
+                'type': _ref(types, type_refs[i]),
+                'position': {'x': xs[i], 'y': ys[i]},
+                'data': _ref(objects, data[i]),
+                'style': _ref(objects, styles[i]),
+                'width': widths[i],
+                'height': heights[i],
+                **_unflag(flags[i], NODE_FLAGS),
+            }
+            for i in range(len(ids))
+        ]
+
+        (edge_ids, type_refs, sources, targets, source_handles, target_handles,
+         labels, label_styles, styles, data, flags) = _columns(
+            encoded.get('edges', {}),
+            ('id', 'type', 'source', 'target', 'sourceHandle', 'targetHandle',
+             'label', 'labelStyle', 'style', 'data', 'flags'),
+            'edges',
+        )
+        edges = []
+        for i in range(len(edge_ids)):
+            source, target = sources[i], targets[i]
+            edge = {
+                'id': edge_ids[i],
+                'type': _ref(types, type_refs[i]),
+                'source': source if isinstance(source, str) else _ref(ids, source),
+                'target': target if isinstance(target, str) else _ref(ids, target),
+                'data': _ref(objects, data[i]),
+                'style': _ref(objects, styles[i]),
+                **_unflag(flags[i], EDGE_FLAGS),
+            }
+            if source_handles[i]:
+                edge['sourceHandle'] = source_handles[i]
+            if target_handles[i]:
+                edge['targetHandle'] = target_handles[i]
+            if labels[i]:
+                edge['label'] = labels[i]
+                edge['labelStyle'] = _ref(objects, label_styles[i])
+            edges.append(edge)
+    except (IndexError, TypeError, KeyError) as e:
+        raise CompactFormatError(f'Invalid table reference: {e}')
+
+    decoded = {key: value for key, value in encoded.items()
+               if key not in ('format', 'types', 'objects', 'nodes', 'edges')}
+    decoded['nodes'] = nodes
+    decoded['edges'] = edges
+    return decoded
@@ -0,0 +1,127 @@
+# components.py
+import secrets
+
+from django.db import transaction
+
+from flow.api.serializers import NodeSerializer, EdgeSerializer
+from flow.models import FlowChart, FlowComponent, Node, Edge
+from flow.services import BULK_BATCH_SIZE, bump_version, node_fields, edge_fields
+
+# Keep IN (...) lists well under SQLite's bound parameter limit
+SELECTION_CHUNK_SIZE = 500
+ID_MAX_LENGTH = 100
+
+
+class ComponentError(ValueError):
+    pass
+
+
+def extract_component(flow_chart, node_ids, name, owner, description=''):
+    """Copy the selected nodes and the edges between them into a FlowComponent.
+
+    Positions are stored relative to the selection's top-left corner so the
+    component can be dropped anywhere.
+    """
+    node_ids = list(dict.fromkeys(str(node_id) for node_id in node_ids))
+    if not node_ids:
+        raise ComponentError('Select at least one node')
+
+    nodes = []
+    for start in range(0, len(node_ids), SELECTION_CHUNK_SIZE):
+        nodes.extend(Node.objects.filter(
+            flow_chart=flow_chart, node_id__in=node_ids[start:start + SELECTION_CHUNK_SIZE]
+        ))
+    found = {node.node_id for node in nodes}
+    missing = [node_id for node_id in node_ids if node_id not in found]
+    if missing:
+        raise ComponentError(f"Unknown node ids: {', '.join(missing[:20])}")
+
+    # Internal edges only; filtering by source keeps the IN list bounded
+    edges = []
+    for start in range(0, len(node_ids), SELECTION_CHUNK_SIZE):
+        edges.extend(
+            edge for edge in Edge.objects.filter(
+                flow_chart=flow_chart, source_node_id__in=node_ids[start:start + SELECTION_CHUNK_SIZE]
+            )
+            if edge.target_node_id in found
+        )
+
+    min_x = min(node.position_x for node in nodes)
+    min_y = min(node.position_y for node in nodes)
+    node_serializer = NodeSerializer()
+    edge_serializer = EdgeSerializer()
+    node_data = []
+    for node in nodes:
+        node.position_x -= min_x
+        node.position_y -= min_y
+        node_data.append(node_serializer.to_representation(node))
+
+    return FlowComponent.objects.create(
+        name=name,
+        description=description,
+        owner=owner,
+        nodes=node_data,
+        edges=[edge_serializer.to_representation(edge) for edge in edges],
+        node_count=len(node_data),
+        edge_count=len(edges),
+    )
+
+
+def _id_mapping(old_ids, token):
+    """Suffix every id with the token, falling back to token-index if too long"""
+    mapping = {}
+    for index, old_id in enumerate(old_ids):
+        new_id = f'{old_id}-{token}'
+        mapping[old_id] = new_id if len(new_id) <= ID_MAX_LENGTH else f'{token}-{index}'
+    return mapping
+
+
+def _unused_token(queryset, field, old_ids):
+    """A random suffix whose remapped ids don't clash with ids already in the chart"""
+    while True:
+        token = secrets.token_hex(4)
+        new_ids = list(_id_mapping(old_ids, token).values())
+        clash = any(
+            queryset.filter(**{f'{field}__in': new_ids[start:start + SELECTION_CHUNK_SIZE]}).exists()
+            for start in range(0, len(new_ids), SELECTION_CHUNK_SIZE)
+        )
+        if not clash:
+            return token
+
+
+def instantiate_component(component, flow_chart_id, offset_x=0.0, offset_y=0.0):
+    """Insert a copy of the component into a chart with fresh ids.
+
+    Everything is written in one transaction with one bulk_create per table,
+    then the chart version is bumped once. Returns (flow_chart, node_id_map,
+    nodes, edges).
+    """
+    with transaction.atomic():
+        flow_chart = FlowChart.objects.select_for_update().get(pk=flow_chart_id)
+
+        old_node_ids = [node['id'] for node in component.nodes]
+        old_edge_ids = [edge['id'] for edge in component.edges]
+        node_map = _id_mapping(old_node_ids, _unused_token(flow_chart.nodes.all(), 'node_id', old_node_ids))
+        edge_map = _id_mapping(old_edge_ids, _unused_token(flow_chart.edges.all(), 'edge_id', old_edge_ids))
+
+        nodes = []
+        for node_data in component.nodes:
+            fields = node_fields(node_data)
+            fields['node_id'] = node_map[fields['node_id']]
+            fields['position_x'] += offset_x
+            fields['position_y'] += offset_y
+            nodes.append(Node(flow_chart=flow_chart, **fields))
+
+        edges = []
+        for edge_data in component.edges:
+            fields = edge_fields(edge_data)
+            fields['edge_id'] = edge_map[fields['edge_id']]
+            fields['source_node_id'] = node_map[fields['source_node_id']]
+            fields['target_node_id'] = node_map[fields['target_node_id']]
+            edges.append(Edge(flow_chart=flow_chart, **fields))
+
+        Node.objects.bulk_create(nodes, batch_size=BULK_BATCH_SIZE)
+        Edge.objects.bulk_create(edges, batch_size=BULK_BATCH_SIZE)
+        bump_version(flow_chart, component.owner, f'Inserted component {component.name}')
+
+    return flow_chart, node_map, nodes, edges
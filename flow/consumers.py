@@ -0,0 +1,180 @@
+# consumers.py
+import asyncio
+import logging
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+
+from flow.models import FlowChart
+from flow.services import node_fields, edge_fields, apply_operations, live_group_name
+from flow.validation import validate_node, validate_edge
+
+logger = logging.getLogger(__name__)
+
+OPERATIONS = ('node.upsert', 'node.delete', 'edge.upsert', 'edge.delete')
+
+
+def _raise_first(errors):
+    if errors:
+        raise ValueError(f"{errors[0]['path']} {errors[0]['message']}")
+
+
+class FlowChartConsumer(AsyncJsonWebsocketConsumer):
+    """Live editing channel for one flow chart.
+
+    Clients send operations such as
+        {"op": "node.upsert", "node": {...React Flow node...}}
+        {"op": "edge.delete", "id": "e1-2"}
+    or a list of them as {"ops": [...]}. Every accepted operation is
+    broadcast to the other editors at once, while persistence is coalesced:
+    only the latest state per node/edge is written, in batches flushed every
+    FLOW_WS_FLUSH_INTERVAL seconds or once FLOW_WS_FLUSH_MAX_OPS are pending.
+
+    Editors already hold the broadcast operations, so a batch that cannot be
+    written is reported to all of them: edges to missing nodes come back as
+    edge.delete operations, a failed write as an error, and a deleted chart
+    closes every socket. A REST save that replaces the graph sends
+    {"type": "saved", "replaced": true} so editors reload it.
+    """
+
+    async def connect(self):
+        self.flow_chart_id = int(self.scope['url_route']['kwargs']['pk'])
+        self.group_name = live_group_name(self.flow_chart_id)
+        self.pending_nodes = {}
+        self.pending_edges = {}
+        self.flush_task = None
+
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated or not await self.can_edit(user):
+            await self.close(code=4403)
+            return
+
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if not hasattr(self, 'group_name'):
+            return
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+        await self.flush()
+
+    @database_sync_to_async
+    def can_edit(self, user):
+        return FlowChart.objects.filter(pk=self.flow_chart_id, owner=user).exists()
+
+    async def receive_json(self, content, **kwargs):
+        operations = content.get('ops', [content]) if isinstance(content, dict) else None
+        if not isinstance(operations, list):
+            await self.send_json({'type': 'error', 'error': 'Expected an operation object or {"ops": [...]}'})
+            return
+
+        accepted = []
+        for operation in operations:
+            try:
+                self.queue(operation)
+            except (KeyError, TypeError, ValueError) as e:
+                await self.send_json({'type': 'error', 'error': f'Invalid operation: {e}', 'operation': operation})
+                continue
+            accepted.append(operation)
+
+        if not accepted:
+            return
+
+        await self.channel_layer.group_send(self.group_name, {
+            'type': 'flow.operations',
+            'ops': accepted,
+            'sender': self.channel_name,
+        })
+
+        if len(self.pending_nodes) + len(self.pending_edges) >= settings.FLOW_WS_FLUSH_MAX_OPS:
+            await self.flush()
+        elif self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.flush_later())
+
+    def queue(self, operation):
+        """Coalesce an operation into the pending batch (latest wins)"""
+        op = operation['op']
+        if op not in OPERATIONS:
+            raise ValueError(f"unknown op '{op}'")
+
+        # None marks a pending delete
+        if op == 'node.upsert':
+            _raise_first(validate_node(operation['node']))
+            fields = node_fields(operation['node'])
+            self.pending_nodes[fields['node_id']] = fields
+        elif op == 'node.delete':
+            self.pending_nodes[str(operation['id'])] = None
+        elif op == 'edge.upsert':
+            _raise_first(validate_edge(operation['edge']))
+            fields = edge_fields(operation['edge'])
+            self.pending_edges[fields['edge_id']] = fields
+        else:
+            self.pending_edges[str(operation['id'])] = None
+
+    async def flush_later(self):
+        await asyncio.sleep(settings.FLOW_WS_FLUSH_INTERVAL)
+        self.flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        if not self.pending_nodes and not self.pending_edges:
+            return
+        nodes, self.pending_nodes = self.pending_nodes, {}
+        edges, self.pending_edges = self.pending_edges, {}
+
+        try:
+            version, dangling = await database_sync_to_async(apply_operations)(
+                self.flow_chart_id,
+                self.scope['user'],
+                nodes={key: fields for key, fields in nodes.items() if fields is not None},
+                edges={key: fields for key, fields in edges.items() if fields is not None},
+                deleted_nodes={key for key, fields in nodes.items() if fields is None},
+                deleted_edges={key for key, fields in edges.items() if fields is None},
+            )
+        except FlowChart.DoesNotExist:
+            await self.channel_layer.group_send(self.group_name, {'type': 'flow.deleted'})
+            return
+        except Exception:
+            # Runs inside flush_later's task too, where nobody would retrieve it
+            logger.exception('Could not save live edits to flow chart %s', self.flow_chart_id)
+            await self.channel_layer.group_send(self.group_name, {
+                'type': 'flow.error',
+                'error': 'Live edits could not be saved; reload the flow chart',
+            })
+            return
+
+        if dangling:
+            # Peers already applied these edges; take them back everywhere
+            await self.channel_layer.group_send(self.group_name, {
+                'type': 'flow.operations',
+                'ops': [{'op': 'edge.delete', 'id': edge_id} for edge_id in sorted(dangling)],
+                'sender': None,
+            })
+            await self.channel_layer.group_send(self.group_name, {
+                'type': 'flow.error',
+                'error': f"Edges to missing nodes were not saved: {', '.join(sorted(dangling))}",
+            })
+        await self.channel_layer.group_send(self.group_name, {'type': 'flow.saved', 'version': version})
+
+    async def flow_operations(self, event):
+        if event['sender'] != self.channel_name:
+            await self.send_json({'type': 'operations', 'ops': event['ops']})
+
+    async def flow_saved(self, event):
+        message = {'type': 'saved', 'version': event['version']}
+        if event.get('replaced'):
+            message['replaced'] = True
+        await self.send_json(message)
+
+    async def flow_error(self, event):
+        await self.send_json({'type': 'error', 'error': event['error']})
+
+    async def flow_deleted(self, event):
+        # Nothing left to write the pending edits to
+        self.pending_nodes = {}
+        self.pending_edges = {}
+        await self.send_json({'type': 'error', 'error': 'Flow chart was deleted'})
+        await self.close(code=4404)
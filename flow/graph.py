@@ -0,0 +1,179 @@
+# graph.py
+from collections import deque
+
+from flow.cache import VersionedCache
+from flow.models import Node, Edge
+
+
+class FlowGraph:
+    """Adjacency index over a flow chart's nodes and edges.
+
+    React Flow node IDs are mapped to dense integers once so every query
+    runs over plain lists instead of string-keyed dicts.
+    """
+
+    def __init__(self, node_ids, edge_pairs):
+        self.ids = []
+        self.index = {}
+        for node_id in node_ids:
+            self._intern(node_id)
+
+        pairs = [(self._intern(source), self._intern(target)) for source, target in edge_pairs]
+
+        size = len(self.ids)
+        self.successors = [[] for _ in range(size)]
+        self.predecessors = [[] for _ in range(size)]
+        for source, target in pairs:
+            self.successors[source].append(target)
+            self.predecessors[target].append(source)
+
+        self.edge_count = len(pairs)
+        self._topological_order = None
+
+    def _intern(self, node_id):
+        position = self.index.get(node_id)
+        if position is None:
+            position = len(self.ids)
+            self.index[node_id] = position
+            self.ids.append(node_id)
+        return position
+
+    @property
+    def node_count(self):
+        return len(self.ids)
+
+    def __contains__(self, node_id):
+        return node_id in self.index
+
+    def _kahn(self):
+        """Return the Kahn ordering; it is shorter than node_count on cycles."""
+        if self._topological_order is None:
+            in_degree = [len(preds) for preds in self.predecessors]
+            queue = deque(i for i, degree in enumerate(in_degree) if degree == 0)
+            order = []
+            while queue:
+                current = queue.popleft()
+                order.append(current)
+                for successor in self.successors[current]:
+                    in_degree[successor] -= 1
+                    if in_degree[successor] == 0:
+                        queue.append(successor)
+            self._topological_order = order
+        return self._topological_order
+
+    def has_cycle(self):
+        return len(self._kahn()) < self.node_count
+
+    def topological_order(self):
+        """Node IDs in dependency order, or None if the graph has a cycle"""
+        order = self._kahn()
+        if len(order) < self.node_count:
+            return None
+        return [self.ids[i] for i in order]
+
+    def find_cycle(self):
+        """Return one directed cycle as a list of node IDs, or an empty list"""
+        if not self.has_cycle():
+            return []
+
+        # Nodes left over by Kahn's algorithm all sit on or behind a cycle,
+        # so walking predecessors inside that set must eventually loop.
+        sorted_nodes = set(self._kahn())
+        start = next(i for i in range(self.node_count) if i not in sorted_nodes)
+        seen = {}
+        path = []
+        current = start
+        while current not in seen:
+            seen[current] = len(path)
+            path.append(current)
+            current = next(p for p in self.predecessors[current] if p not in sorted_nodes)
+        cycle = path[seen[current]:]
+        cycle.reverse()
+        return [self.ids[i] for i in cycle]
+
+    def reachable(self, node_id, direction='downstream'):
+        """Node IDs reachable from node_id (excluding itself)"""
+        start = self.index[node_id]
+        if direction == 'upstream':
+            neighbours = (self.predecessors,)
+        elif direction == 'both':
+            neighbours = (self.successors, self.predecessors)
+        else:
+            neighbours = (self.successors,)
+
+        visited = [False] * self.node_count
+        visited[start] = True
+        queue = deque([start])
+        result = []
+        while queue:
+            current = queue.popleft()
+            for adjacency in neighbours:
+                for neighbour in adjacency[current]:
+                    if not visited[neighbour]:
+                        visited[neighbour] = True
+                        result.append(neighbour)
+                        queue.append(neighbour)
+        return [self.ids[i] for i in result]
+
+    def shortest_path(self, source_id, target_id, directed=True):
+        """Fewest-edges path between two nodes, or None if unreachable"""
+        source = self.index[source_id]
+        target = self.index[target_id]
+        if source == target:
+            return [source_id]
+
+        parents = [-1] * self.node_count
+        parents[source] = source
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            neighbours = self.successors[current]
+            if not directed:
+                neighbours = neighbours + self.predecessors[current]
+            for neighbour in neighbours:
+                if parents[neighbour] != -1:
+                    continue
+                parents[neighbour] = current
+                if neighbour == target:
+                    path = [target]
+                    while path[-1] != source:
+                        path.append(parents[path[-1]])
+                    path.reverse()
+                    return [self.ids[i] for i in path]
+                queue.append(neighbour)
+        return None
+
+    def connected_components(self):
+        """Weakly connected components, largest first"""
+        parent = list(range(self.node_count))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for source, targets in enumerate(self.successors):
+            for target in targets:
+                root_a, root_b = find(source), find(target)
+                if root_a != root_b:
+                    parent[root_b] = root_a
+
+        groups = {}
+        for i in range(self.node_count):
+            groups.setdefault(find(i), []).append(self.ids[i])
+        return sorted(groups.values(), key=len, reverse=True)
+
+
+def build_flow_graph(flow_chart):
+    node_ids = Node.objects.filter(flow_chart=flow_chart).values_list('node_id', flat=True)
+    edge_pairs = Edge.objects.filter(flow_chart=flow_chart).values_list('source_node_id', 'target_node_id')
+    return FlowGraph(node_ids.iterator(), edge_pairs.iterator())
+
+
+_graph_cache = VersionedCache(build_flow_graph)
+
+
+def get_flow_graph(flow_chart):
+    """Return the cached adjacency index for the chart's current version"""
+    return _graph_cache.get(flow_chart)
@@ -0,0 +1,94 @@
+# hashing.py
+import hashlib
+import json
+
+from django.core.cache import cache
+
+from flow.models import Node, Edge, FlowVersion
+from flow.services import node_fields, edge_fields, NODE_UPDATE_FIELDS, EDGE_UPDATE_FIELDS
+
+NUMERIC_NODE_FIELDS = ('position_x', 'position_y', 'width', 'height')
+CONTENT_HASH_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _canonical_node(fields):
+    node = {name: fields[name] for name in ['node_id'] + NODE_UPDATE_FIELDS}
+    # 10 and 10.0 come back from the database identically, so hash them alike
+    for name in NUMERIC_NODE_FIELDS:
+        if node[name] is not None:
+            node[name] = float(node[name])
+    return node
+
+
+def _canonical_edge(fields):
+    return {name: fields[name] for name in ['edge_id'] + EDGE_UPDATE_FIELDS}
+
+
+def _digest(nodes, edges, viewport, flow_settings):
+    """SHA-256 over nodes/edges (as model fields, sorted by id), viewport and settings"""
+    digest = hashlib.sha256()
+
+    def feed(value):
+        digest.update(json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+        digest.update(b'\n')
+
+    feed(viewport or {})
+    feed(flow_settings or {})
+    for node in sorted((_canonical_node(n) for n in nodes), key=lambda n: n['node_id']):
+        feed(node)
+    digest.update(b'\x00')
+    for edge in sorted((_canonical_edge(e) for e in edges), key=lambda e: e['edge_id']):
+        feed(edge)
+    return digest.hexdigest()
+
+
+def hash_flow_payload(data):
+    """Content hash of a React Flow payload as posted to save_flow"""
+    return _digest(
+        (node_fields(node) for node in data.get('nodes', [])),
+        (edge_fields(edge) for edge in data.get('edges', [])),
+        data.get('viewport', {}),
+        data.get('flowSettings', {}),
+    )
+
+
+def hash_flow_chart(flow_chart):
+    """Content hash of the chart as currently stored"""
+    return _digest(
+        Node.objects.filter(flow_chart=flow_chart).values('node_id', *NODE_UPDATE_FIELDS).iterator(),
+        Edge.objects.filter(flow_chart=flow_chart).values('edge_id', *EDGE_UPDATE_FIELDS).iterator(),
+        flow_chart.viewport,
+        flow_chart.flow_settings,
+    )
+
+
+def _cache_key(flow_chart):
+    return f'flow-content-hash:{flow_chart.pk}:{flow_chart.version}:{flow_chart.updated_at.timestamp()}'
+
+
+def remember_content_hash(flow_chart, content_hash):
+    cache.set(_cache_key(flow_chart), content_hash, CONTENT_HASH_CACHE_TIMEOUT)
+
+
+def current_content_hash(flow_chart):
+    """Content hash of the chart's current state.
+
+    Reuses the hash stored on the matching FlowVersion when nothing has
+    touched the chart since that snapshot; otherwise hashes the rows once and
+    caches the result for this (version, updated_at).
+    """
+    key = _cache_key(flow_chart)
+    content_hash = cache.get(key)
+    if content_hash:
+        return content_hash
+
+    content_hash = FlowVersion.objects.filter(
+        flow_chart=flow_chart,
+        version_number=flow_chart.version,
+        created_at__gte=flow_chart.updated_at,
+    ).exclude(content_hash='').values_list('content_hash', flat=True).first()
+
+    if not content_hash:
+        content_hash = hash_flow_chart(flow_chart)
+    cache.set(key, content_hash, CONTENT_HASH_CACHE_TIMEOUT)
+    return content_hash
@@ -0,0 +1,199 @@
+# importing.py
+import json
+import os
+import zipfile
+
+from django.conf import settings
+from django.db import transaction
+
+from rolwebsite.background import run_in_background
+from flow.hashing import hash_flow_payload
+from flow.models import FlowChart, Node, Edge, FlowVersion
+from flow.rendering import generate_thumbnails
+from flow.services import BULK_BATCH_SIZE, node_fields, edge_fields
+from flow.validation import validate_flow_payload
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class ImportFormatError(ValueError):
+    """The uploaded file is not NDJSON or a zip of React Flow JSON files"""
+
+
+def read_ndjson(file, source='upload'):
+    """Yield (label, document) for each non-blank line of an NDJSON file.
+
+    The same limits as read_zip apply, with a line standing for a file:
+    uploads larger than FLOW_IMPORT_MAX_TOTAL_SIZE are rejected before
+    anything is read and more than FLOW_IMPORT_MAX_FILES documents abort the
+    import; a line over FLOW_IMPORT_MAX_FILE_SIZE is reported as invalid
+    without being held in memory.
+    """
+    size = file.seek(0, os.SEEK_END)
+    file.seek(0)
+    if size > settings.FLOW_IMPORT_MAX_TOTAL_SIZE:
+        raise ImportFormatError(f'File is larger than {settings.FLOW_IMPORT_MAX_TOTAL_SIZE} bytes')
+
+    limit = settings.FLOW_IMPORT_MAX_FILE_SIZE
+    count = 0
+    number = 0
+    while line := file.readline(limit + 1):
+        number += 1
+        oversized = len(line.rstrip(b'\r\n')) > limit
+        # Skip the rest of an overlong line a bounded chunk at a time
+        while oversized and not line.endswith(b'\n'):
+            line = file.readline(READ_CHUNK_SIZE)
+            if not line:
+                break
+        if not oversized and not line.strip():
+            continue
+
+        count += 1
+        if count > settings.FLOW_IMPORT_MAX_FILES:
+            raise ImportFormatError(f'File holds more than {settings.FLOW_IMPORT_MAX_FILES} flow documents')
+
+        label = f'{source}:{number}'
+        if oversized:
+            document = ImportFormatError(f'Line is larger than {limit} bytes')
+        else:
+            try:
+                document = json.loads(line.decode('utf-8'))
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                document = ImportFormatError(f'Invalid JSON: {e}')
+        yield label, document
+
+
+def _read_member(archive, info, limit):
+    """Decompressed bytes of a zip member, refusing to inflate past limit"""
+    if info.file_size > limit:
+        raise ImportFormatError(f'File is larger than {limit} bytes uncompressed')
+    # file_size is only what the archive claims; count what actually comes out
+    chunks = []
+    size = 0
+    with archive.open(info) as member:
+        while chunk := member.read(READ_CHUNK_SIZE):
+            size += len(chunk)
+            if size > limit:
+                raise ImportFormatError(f'File is larger than {limit} bytes uncompressed')
+            chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def read_zip(file):
+    """Yield (member name, document) for each .json file in a zip archive.
+
+    Archives with more than FLOW_IMPORT_MAX_FILES JSON files, or whose files
+    add up to more than FLOW_IMPORT_MAX_TOTAL_SIZE uncompressed, are rejected
+    before anything is read; a single file over FLOW_IMPORT_MAX_FILE_SIZE is
+    reported as invalid.
+    """
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile as e:
+        raise ImportFormatError(f'Invalid zip archive: {e}')
+
+    with archive:
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir() and info.filename.lower().endswith('.json')
+        ]
+        if len(members) > settings.FLOW_IMPORT_MAX_FILES:
+            raise ImportFormatError(f'Zip archive holds more than {settings.FLOW_IMPORT_MAX_FILES} JSON files')
+        if sum(info.file_size for info in members) > settings.FLOW_IMPORT_MAX_TOTAL_SIZE:
+            raise ImportFormatError(
+                f'Zip archive is larger than {settings.FLOW_IMPORT_MAX_TOTAL_SIZE} bytes uncompressed'
+            )
+
+        for info in members:
+            try:
+                content = _read_member(archive, info, settings.FLOW_IMPORT_MAX_FILE_SIZE)
+                document = json.loads(content.decode('utf-8'))
+            except (ImportFormatError, zipfile.BadZipFile) as e:
+                document = ImportFormatError(str(e))
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                document = ImportFormatError(f'Invalid JSON: {e}')
+            else:
+                if isinstance(document, dict):
+                    document.setdefault('name', os.path.splitext(os.path.basename(info.filename))[0])
+            yield info.filename, document
+
+
+def read_flow_file(file, name=''):
+    """Dispatch to the zip or NDJSON reader based on the file's magic bytes"""
+    head = file.read(4)
+    file.seek(0)
+    if head.startswith(b'PK\x03\x04') or name.lower().endswith('.zip'):
+        return read_zip(file)
+    return read_ndjson(file, source=name or 'upload')
+
+
+def validate_flow_document(document):
+    """Return a list of problems with a React Flow document (empty if valid)"""
+    return [f"{error['path']}: {error['message']}" for error in validate_flow_payload(document)]
+
+
+def create_flow_chart(document, owner, change_description='Imported'):
+    """Create a chart with its nodes and edges from a validated document"""
+    flow_chart = FlowChart.objects.create(
+        name=(document.get('name') or 'Imported flow')[:200],
+        description=document.get('description', ''),
+        owner=owner,
+        is_public=bool(document.get('isPublic', False)),
+        viewport=document.get('viewport', {}),
+        flow_settings=document.get('flowSettings', {}),
+    )
+    Node.objects.bulk_create(
+        (Node(flow_chart=flow_chart, **node_fields(node)) for node in document.get('nodes', [])),
+        batch_size=BULK_BATCH_SIZE,
+    )
+    Edge.objects.bulk_create(
+        (Edge(flow_chart=flow_chart, **edge_fields(edge)) for edge in document.get('edges', [])),
+        batch_size=BULK_BATCH_SIZE,
+    )
+    FlowVersion.objects.create(
+        flow_chart=flow_chart,
+        version_number=flow_chart.version,
+        snapshot_data=document,
+        content_hash=hash_flow_payload(document),
+        created_by=owner,
+        change_description=change_description,
+    )
+    run_in_background(generate_thumbnails, flow_chart.pk, flow_chart.version)
+    return flow_chart
+
+
+def import_flow_documents(documents, owner):
+    """Validate and import (label, document) pairs.
+
+    Every chart is written inside its own savepoint, so one bad chart is
+    rolled back on its own while the rest of the batch is kept. Returns one
+    result dict per document.
+    """
+    results = []
+    with transaction.atomic():
+        for label, document in documents:
+            if isinstance(document, Exception):
+                results.append({'source': label, 'status': 'invalid', 'errors': [str(document)]})
+                continue
+
+            errors = validate_flow_document(document)
+            if errors:
+                results.append({'source': label, 'status': 'invalid', 'errors': errors})
+                continue
+
+            try:
+                with transaction.atomic():
+                    flow_chart = create_flow_chart(document, owner)
+            except Exception as e:
+                results.append({'source': label, 'status': 'failed', 'errors': [str(e)]})
+                continue
+
+            results.append({
+                'source': label,
+                'status': 'created',
+                'id': flow_chart.pk,
+                'name': flow_chart.name,
+                'nodes': len(document.get('nodes', [])),
+                'edges': len(document.get('edges', [])),
+            })
+    return results
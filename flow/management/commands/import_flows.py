@@ -0,0 +1,41 @@
+# flow/management/commands/import_flows.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from flow.importing import ImportFormatError, read_flow_file, import_flow_documents
+
+
+class Command(BaseCommand):
+    help = 'Bulk import flow charts from NDJSON files or zips of React Flow JSON files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='.ndjson/.jsonl files or .zip archives')
+        parser.add_argument('--owner', required=True, help='Username that will own the imported charts')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            owner = User.objects.get(username=options['owner'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['owner']}' does not exist")
+
+        created = failed = 0
+        for path in options['paths']:
+            try:
+                with open(path, 'rb') as file:
+                    results = import_flow_documents(read_flow_file(file, path), owner)
+            except (OSError, ImportFormatError) as e:
+                raise CommandError(f'{path}: {e}')
+
+            for result in results:
+                if result['status'] == 'created':
+                    created += 1
+                    self.stdout.write(
+                        f"{result['source']}: created '{result['name']}' (id {result['id']}, "
+                        f"{result['nodes']} nodes, {result['edges']} edges)"
+                    )
+                else:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f"{result['source']}: {'; '.join(result['errors'])}"))
+
+        self.stdout.write(self.style.SUCCESS(f'Imported {created} flow charts ({failed} failed)'))
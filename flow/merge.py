@@ -0,0 +1,137 @@
+# merge.py
+from flow.api.serializers import NodeSerializer, EdgeSerializer
+from flow.models import Node, Edge, FlowVersion
+from flow.services import node_fields, edge_fields, NODE_UPDATE_FIELDS, EDGE_UPDATE_FIELDS
+
+
+class MergeConflict(Exception):
+    """Raised when a stale save cannot be merged into the current state"""
+
+    def __init__(self, message, conflicts=()):
+        super().__init__(message)
+        self.conflicts = list(conflicts)
+
+
+def _merge_record(base, current, incoming, fields):
+    """Field-by-field three-way merge of one node/edge.
+
+    Returns (merged, conflicting_field_names); merged is None when the record
+    ends up deleted.
+    """
+    if base is None:
+        # Added on both sides
+        if current == incoming:
+            return current, []
+        return None, [name for name in fields if current[name] != incoming[name]]
+
+    if current is None or incoming is None:
+        # Deleted on one side: fine unless the other side edited it
+        survivor = incoming if current is None else current
+        if survivor == base:
+            return None, []
+        return None, [name for name in fields if survivor[name] != base[name]]
+
+    merged = dict(current)
+    conflicting = []
+    for name in fields:
+        if incoming[name] == base[name] or incoming[name] == current[name]:
+            continue
+        if current[name] == base[name]:
+            merged[name] = incoming[name]
+        else:
+            conflicting.append(name)
+    return merged, conflicting
+
+
+def merge_records(base, current, incoming, fields, kind):
+    """Three-way merge of {id: fields} maps; returns (merged, conflicts)"""
+    merged = {}
+    conflicts = []
+    # Current order first, then anything the client added
+    for key in list(current) + [key for key in incoming if key not in current]:
+        if key in current and key in incoming and current[key] == incoming[key]:
+            merged[key] = current[key]
+            continue
+        if key not in base:
+            if key not in current:
+                merged[key] = incoming[key]
+                continue
+            if key not in incoming:
+                merged[key] = current[key]
+                continue
+
+        record, conflicting = _merge_record(base.get(key), current.get(key), incoming.get(key), fields)
+        if conflicting:
+            conflicts.append({'kind': kind, 'id': key, 'fields': conflicting})
+        elif record is not None:
+            merged[key] = record
+    return merged, conflicts
+
+
+def _to_node(fields):
+    return NodeSerializer().to_representation(Node(**fields))
+
+
+def _to_edge(fields):
+    return EdgeSerializer().to_representation(Edge(**fields))
+
+
+def merge_flow_save(flow_chart, base_version, data):
+    """Rebase a save made against base_version onto the chart's current state.
+
+    Non-overlapping node/edge changes (including different fields of the same
+    node) are combined; the same field changed two ways, or an edit racing a
+    delete, is a conflict. Returns the merged React Flow payload, or raises
+    MergeConflict listing every conflict.
+    """
+    snapshot = FlowVersion.objects.filter(
+        flow_chart=flow_chart, version_number=base_version
+    ).values_list('snapshot_data', flat=True).first()
+    if snapshot is None:
+        # Versions written before every bump kept a snapshot
+        raise MergeConflict(f'No snapshot of version {base_version} to merge against')
+
+    base_nodes = {fields['node_id']: fields for fields in map(node_fields, snapshot.get('nodes', []))}
+    base_edges = {fields['edge_id']: fields for fields in map(edge_fields, snapshot.get('edges', []))}
+    current_nodes = {
+        fields['node_id']: fields
+        for fields in Node.objects.filter(flow_chart=flow_chart).values('node_id', *NODE_UPDATE_FIELDS)
+    }
+    current_edges = {
+        fields['edge_id']: fields
+        for fields in Edge.objects.filter(flow_chart=flow_chart).values('edge_id', *EDGE_UPDATE_FIELDS)
+    }
+    incoming_nodes = {fields['node_id']: fields for fields in map(node_fields, data.get('nodes', []))}
+    incoming_edges = {fields['edge_id']: fields for fields in map(edge_fields, data.get('edges', []))}
+
+    nodes, conflicts = merge_records(base_nodes, current_nodes, incoming_nodes, NODE_UPDATE_FIELDS, 'node')
+    edges, edge_conflicts = merge_records(base_edges, current_edges, incoming_edges, EDGE_UPDATE_FIELDS, 'edge')
+    conflicts += edge_conflicts
+
+    # An edge merged in from one side may hang off a node the other side removed
+    conflicting_nodes = {conflict['id'] for conflict in conflicts if conflict['kind'] == 'node'}
+    for edge_id, fields in edges.items():
+        missing = [
+            fields[end] for end in ('source_node_id', 'target_node_id')
+            if fields[end] not in nodes and fields[end] not in conflicting_nodes
+        ]
+        if missing:
+            conflicts.append({'kind': 'edge', 'id': edge_id, 'fields': ['source_node_id', 'target_node_id'],
+                              'missing_nodes': missing})
+
+    base_settings = snapshot.get('flowSettings', {})
+    flow_settings = data.get('flowSettings', {})
+    if flow_settings == base_settings:
+        flow_settings = flow_chart.flow_settings
+    elif flow_chart.flow_settings not in (base_settings, flow_settings):
+        conflicts.append({'kind': 'flowSettings', 'id': None, 'fields': []})
+
+    if conflicts:
+        raise MergeConflict('Conflicting changes', conflicts)
+
+    merged = dict(data)
+    merged.pop('baseVersion', None)
+    merged['nodes'] = [_to_node(fields) for fields in nodes.values()]
+    merged['edges'] = [_to_edge(fields) for fields in edges.values()]
+    merged['flowSettings'] = flow_settings
+    return merged
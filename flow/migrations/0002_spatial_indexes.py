@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-19 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flow', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='edge',
+            index=models.Index(fields=['flow_chart', 'source_node_id'], name='flow_edge_source_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='edge',
+            index=models.Index(fields=['flow_chart', 'target_node_id'], name='flow_edge_target_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='node',
+            index=models.Index(fields=['flow_chart', 'position_x', 'position_y'], name='flow_node_position_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flow', '0002_spatial_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flowversion',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 of the canonical nodes, edges and viewport', max_length=64),
+        ),
+    ]
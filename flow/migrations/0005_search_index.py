@@ -0,0 +1,91 @@
+# Full-text search over node and edge text: GIN expression indexes on
+# PostgreSQL, FTS5 tables kept in sync by triggers on SQLite.
+
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    """CREATE INDEX flow_node_search_idx ON flow_node
+       USING gin (jsonb_to_tsvector('simple', data, '["string"]'))""",
+    """CREATE INDEX flow_edge_search_idx ON flow_edge
+       USING gin ((to_tsvector('simple', label) || jsonb_to_tsvector('simple', data, '["string"]')))""",
+]
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS flow_node_search_idx',
+    'DROP INDEX IF EXISTS flow_edge_search_idx',
+]
+
+# String values of the JSON data, space separated
+NODE_TEXT = "(SELECT group_concat(value, ' ') FROM json_tree(NEW.data) WHERE type = 'text')"
+EDGE_TEXT = "NEW.label || ' ' || coalesce(" + NODE_TEXT + ", '')"
+
+SQLITE_FORWARD = [
+    'CREATE VIRTUAL TABLE flow_node_fts USING fts5(body)',
+    'CREATE VIRTUAL TABLE flow_edge_fts USING fts5(body)',
+    f'''CREATE TRIGGER flow_node_fts_insert AFTER INSERT ON flow_node BEGIN
+        INSERT INTO flow_node_fts(rowid, body) VALUES (NEW.id, {NODE_TEXT});
+    END''',
+    f'''CREATE TRIGGER flow_node_fts_update AFTER UPDATE OF data ON flow_node BEGIN
+        DELETE FROM flow_node_fts WHERE rowid = OLD.id;
+        INSERT INTO flow_node_fts(rowid, body) VALUES (NEW.id, {NODE_TEXT});
+    END''',
+    '''CREATE TRIGGER flow_node_fts_delete AFTER DELETE ON flow_node BEGIN
+        DELETE FROM flow_node_fts WHERE rowid = OLD.id;
+    END''',
+    f'''CREATE TRIGGER flow_edge_fts_insert AFTER INSERT ON flow_edge BEGIN
+        INSERT INTO flow_edge_fts(rowid, body) VALUES (NEW.id, {EDGE_TEXT});
+    END''',
+    f'''CREATE TRIGGER flow_edge_fts_update AFTER UPDATE OF label, data ON flow_edge BEGIN
+        DELETE FROM flow_edge_fts WHERE rowid = OLD.id;
+        INSERT INTO flow_edge_fts(rowid, body) VALUES (NEW.id, {EDGE_TEXT});
+    END''',
+    '''CREATE TRIGGER flow_edge_fts_delete AFTER DELETE ON flow_edge BEGIN
+        DELETE FROM flow_edge_fts WHERE rowid = OLD.id;
+    END''',
+    # Backfill existing rows
+    f'''INSERT INTO flow_node_fts(rowid, body)
+        SELECT id, {NODE_TEXT.replace('NEW.', 'flow_node.')} FROM flow_node''',
+    f'''INSERT INTO flow_edge_fts(rowid, body)
+        SELECT id, {EDGE_TEXT.replace('NEW.', 'flow_edge.')} FROM flow_edge''',
+]
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS flow_node_fts_insert',
+    'DROP TRIGGER IF EXISTS flow_node_fts_update',
+    'DROP TRIGGER IF EXISTS flow_node_fts_delete',
+    'DROP TRIGGER IF EXISTS flow_edge_fts_insert',
+    'DROP TRIGGER IF EXISTS flow_edge_fts_update',
+    'DROP TRIGGER IF EXISTS flow_edge_fts_delete',
+    'DROP TABLE IF EXISTS flow_node_fts',
+    'DROP TABLE IF EXISTS flow_edge_fts',
+]
+
+STATEMENTS = {
+    'postgresql': (POSTGRES_FORWARD, POSTGRES_BACKWARD),
+    'sqlite': (SQLITE_FORWARD, SQLITE_BACKWARD),
+}
+
+
+def _run(schema_editor, direction):
+    # Other backends fall back to a plain icontains scan (see flow.search)
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements:
+        for sql in statements[direction]:
+            schema_editor.execute(sql)
+
+
+def forward(apps, schema_editor):
+    _run(schema_editor, 0)
+
+
+def backward(apps, schema_editor):
+    _run(schema_editor, 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flow', '0004_flowcomponent'),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, backward),
+    ]
@@ -61,6 +61,9 @@ class Node(models.Model):
 
     class Meta:
         unique_together = ('flow_chart', 'node_id')
+        indexes = [
+            models.Index(fields=['flow_chart', 'position_x', 'position_y'], name='flow_node_position_idx'),
+        ]
 
     def __str__(self):
         return f"Node {self.node_id} in {self.flow_chart.name}"
@@ -102,6 +105,10 @@ class Edge(models.Model):
 
     class Meta:
         unique_together = ('flow_chart', 'edge_id')
+        indexes = [
+            models.Index(fields=['flow_chart', 'source_node_id'], name='flow_edge_source_idx'),
+            models.Index(fields=['flow_chart', 'target_node_id'], name='flow_edge_target_idx'),
+        ]
 
     def __str__(self):
         return f"Edge {self.edge_id} in {self.flow_chart.name}"
@@ -112,6 +119,8 @@ class FlowVersion(models.Model):
     flow_chart = models.ForeignKey(FlowChart, related_name='versions', on_delete=models.CASCADE)
     version_number = models.IntegerField()
     snapshot_data = models.JSONField()  # Complete flow state
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True,
+                                    help_text="SHA-256 of the canonical nodes, edges and viewport")
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     change_description = models.TextField(blank=True)
@@ -121,4 +130,25 @@ class FlowVersion(models.Model):
         ordering = ['-version_number']
 
     def __str__(self):
-        return f"{self.flow_chart.name} v{self.version_number}"
\ No newline at end of file
+        return f"{self.flow_chart.name} v{self.version_number}"
+
+class FlowComponent(models.Model):
+    """Reusable group of nodes and edges extracted from a flow chart"""
+    name = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    owner = models.ForeignKey(User, related_name='flow_components', on_delete=models.CASCADE)
+
+    # React Flow nodes/edges, positions relative to the component's top-left corner
+    nodes = models.JSONField(default=list)
+    edges = models.JSONField(default=list)
+    node_count = models.IntegerField(default=0)
+    edge_count = models.IntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-updated_at']
+
+    def __str__(self):
+        return f"{self.name} ({self.node_count} nodes)"
@@ -0,0 +1,75 @@
+# public.py
+from django.core.cache import cache
+
+from flow.api.serializers import NodeSerializer, EdgeSerializer
+from flow.models import FlowChart, FlowVersion
+
+PUBLIC_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+STATE_KEYS = (('nodes', []), ('edges', []), ('viewport', {}), ('flowSettings', {}))
+
+
+def get_public_chart(flow_chart_id):
+    """The chart if it is public right now, else None.
+
+    Always read from the database: visibility must not outlive a switch to
+    private in some worker's cache.
+    """
+    return FlowChart.objects.select_related('owner').filter(pk=flow_chart_id, is_public=True).first()
+
+
+def _payload(flow_chart, version, state):
+    return {
+        'id': flow_chart.pk,
+        'name': flow_chart.name,
+        'description': flow_chart.description,
+        'owner': flow_chart.owner.username,
+        'version': version,
+        **state,
+    }
+
+
+def get_latest_public_payload(flow_chart):
+    """Current state of a public chart, as (payload, has_snapshot).
+
+    Rendered once per updated_at. has_snapshot tells whether the version is
+    also served by get_public_version_payload, i.e. whether its versioned
+    URL can be advertised.
+    """
+    key = f'flow-public:{flow_chart.pk}:latest:{int(flow_chart.updated_at.timestamp() * 1e6)}'
+    cached = cache.get(key)
+    if cached is None:
+        node_serializer = NodeSerializer()
+        edge_serializer = EdgeSerializer()
+        cached = {
+            'state': {
+                'nodes': [node_serializer.to_representation(node) for node in flow_chart.nodes.all()],
+                'edges': [edge_serializer.to_representation(edge) for edge in flow_chart.edges.all()],
+                'viewport': flow_chart.viewport,
+                'flowSettings': flow_chart.flow_settings,
+            },
+            'has_snapshot': FlowVersion.objects.filter(
+                flow_chart=flow_chart, version_number=flow_chart.version
+            ).exists(),
+        }
+        cache.set(key, cached, PUBLIC_CACHE_TIMEOUT)
+    return _payload(flow_chart, flow_chart.version, cached['state']), cached['has_snapshot']
+
+
+def get_public_version_payload(flow_chart, version):
+    """A public chart as stored in its FlowVersion snapshot, or None.
+
+    Snapshots never change, so they are rendered once per (id, version);
+    visibility is up to the caller (see get_public_chart).
+    """
+    key = f'flow-public:{flow_chart.pk}:v{version}'
+    state = cache.get(key)
+    if state is None:
+        snapshot = FlowVersion.objects.filter(
+            flow_chart=flow_chart, version_number=version
+        ).values_list('snapshot_data', flat=True).first()
+        if snapshot is None:
+            return None
+        state = {name: snapshot.get(name, default) for name, default in STATE_KEYS}
+        cache.set(key, state, PUBLIC_CACHE_TIMEOUT)
+    return _payload(flow_chart, version, state)
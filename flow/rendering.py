@@ -0,0 +1,161 @@
+# rendering.py
+import hmac
+import io
+from hashlib import sha256
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageDraw
+
+from flow.models import FlowChart, Node, Edge
+from flow.spatial import node_box
+
+THUMBNAIL_WIDTH = 320
+THUMBNAIL_HEIGHT = 200
+THUMBNAIL_PADDING = 8
+THUMBNAIL_FORMATS = ('png', 'svg')
+
+BACKGROUND_COLOR = '#ffffff'
+NODE_FILL = '#f8fafc'
+NODE_STROKE = '#1a192b'
+EDGE_STROKE = '#b1b1b7'
+
+
+def _node_fill(style):
+    background = (style.get('background') or style.get('backgroundColor')) if isinstance(style, dict) else None
+    if isinstance(background, str) and background.startswith('#') and len(background) in (4, 7):
+        return background
+    return NODE_FILL
+
+
+class Scene:
+    """Nodes and edges projected into thumbnail pixel space"""
+
+    def __init__(self, nodes, edges, width=THUMBNAIL_WIDTH, height=THUMBNAIL_HEIGHT):
+        # nodes: iterable of (node_id, x, y, width, height, style)
+        # edges: iterable of (source_node_id, target_node_id)
+        self.width = width
+        self.height = height
+
+        boxes = {}
+        fills = {}
+        for node_id, x, y, node_width, node_height, style in nodes:
+            boxes[node_id] = node_box(x, y, node_width, node_height)
+            fills[node_id] = _node_fill(style)
+
+        if boxes:
+            min_x = min(box[0] for box in boxes.values())
+            min_y = min(box[1] for box in boxes.values())
+            max_x = max(box[2] for box in boxes.values())
+            max_y = max(box[3] for box in boxes.values())
+            scale = min(
+                (width - 2 * THUMBNAIL_PADDING) / max(max_x - min_x, 1.0),
+                (height - 2 * THUMBNAIL_PADDING) / max(max_y - min_y, 1.0),
+            )
+            # Centre the drawing inside the thumbnail
+            offset_x = (width - (max_x - min_x) * scale) / 2 - min_x * scale
+            offset_y = (height - (max_y - min_y) * scale) / 2 - min_y * scale
+        else:
+            scale, offset_x, offset_y = 1.0, 0.0, 0.0
+
+        self.nodes = [
+            (
+                (box[0] * scale + offset_x, box[1] * scale + offset_y,
+                 box[2] * scale + offset_x, box[3] * scale + offset_y),
+                fills[node_id],
+            )
+            for node_id, box in boxes.items()
+        ]
+
+        def centre(box):
+            return (box[0] + box[2]) / 2 * scale + offset_x, (box[1] + box[3]) / 2 * scale + offset_y
+
+        self.edges = [
+            (centre(boxes[source]), centre(boxes[target]))
+            for source, target in edges
+            if source in boxes and target in boxes
+        ]
+        self.line_width = max(1, round(scale * 2))
+
+    def to_svg(self):
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.width}" height="{self.height}" '
+            f'viewBox="0 0 {self.width} {self.height}">',
+            f'<rect width="100%" height="100%" fill="{BACKGROUND_COLOR}"/>',
+            f'<g stroke="{EDGE_STROKE}" stroke-width="{self.line_width}">',
+        ]
+        for (x1, y1), (x2, y2) in self.edges:
+            parts.append(f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}"/>')
+        parts.append(f'</g><g stroke="{NODE_STROKE}" stroke-width="1">')
+        for (x0, y0, x1, y1), fill in self.nodes:
+            parts.append(
+                f'<rect x="{x0:.1f}" y="{y0:.1f}" width="{x1 - x0:.1f}" height="{y1 - y0:.1f}" '
+                f'rx="2" fill="{escape(fill)}"/>'
+            )
+        parts.append('</g></svg>')
+        return ''.join(parts)
+
+    def to_png(self):
+        image = Image.new('RGB', (self.width, self.height), BACKGROUND_COLOR)
+        draw = ImageDraw.Draw(image)
+        for start, end in self.edges:
+            draw.line([start, end], fill=EDGE_STROKE, width=self.line_width)
+        for box, fill in self.nodes:
+            try:
+                draw.rounded_rectangle(box, radius=2, fill=fill, outline=NODE_STROKE)
+            except ValueError:
+                draw.rectangle(box, fill=fill, outline=NODE_STROKE)
+
+        output = io.BytesIO()
+        image.save(output, format='PNG', optimize=True)
+        return output.getvalue()
+
+
+def build_scene(flow_chart):
+    nodes = Node.objects.filter(flow_chart=flow_chart).values_list(
+        'node_id', 'position_x', 'position_y', 'width', 'height', 'style'
+    )
+    edges = Edge.objects.filter(flow_chart=flow_chart).values_list('source_node_id', 'target_node_id')
+    return Scene(nodes.iterator(), edges.iterator())
+
+
+def thumbnail_path(flow_chart_id, version, extension):
+    # Keyed so the file name is not guessable from the chart id alone
+    token = hmac.new(settings.SECRET_KEY.encode(), f'{flow_chart_id}:{version}'.encode(), sha256).hexdigest()[:16]
+    return f'flow_thumbnails/{flow_chart_id}/v{version}-{token}.{extension}'
+
+
+def _prune_old_versions(flow_chart_id, keep):
+    directory = f'flow_thumbnails/{flow_chart_id}'
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in files:
+        path = f'{directory}/{name}'
+        if path not in keep:
+            default_storage.delete(path)
+
+
+def generate_thumbnails(flow_chart_id, version=None):
+    """Render PNG and SVG thumbnails for a chart version into media storage"""
+    flow_chart = FlowChart.objects.filter(pk=flow_chart_id).first()
+    if flow_chart is None or (version is not None and version != flow_chart.version):
+        # Deleted, or a newer save has already scheduled its own render
+        return None
+
+    paths = {extension: thumbnail_path(flow_chart.pk, flow_chart.version, extension)
+             for extension in THUMBNAIL_FORMATS}
+    if all(default_storage.exists(path) for path in paths.values()):
+        return paths
+
+    scene = build_scene(flow_chart)
+    rendered = {'png': scene.to_png(), 'svg': scene.to_svg().encode('utf-8')}
+    for extension, path in paths.items():
+        if not default_storage.exists(path):
+            default_storage.save(path, ContentFile(rendered[extension]))
+
+    _prune_old_versions(flow_chart.pk, keep=set(paths.values()))
+    return paths
@@ -0,0 +1,8 @@
+# routing.py
+from django.urls import path
+
+from flow.consumers import FlowChartConsumer
+
+websocket_urlpatterns = [
+    path('ws/flow/flowcharts/<int:pk>/', FlowChartConsumer.as_asgi()),
+]
@@ -0,0 +1,82 @@
+# search.py
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+from flow.models import Node, Edge
+
+SEARCH_MAX_TERMS = 8
+SEARCH_MAX_RESULTS = 200
+
+# Same expressions as the GIN indexes in migration 0005, so PostgreSQL can use them
+POSTGRES_NODE_MATCH = "jsonb_to_tsvector('simple', flow_node.data, '[\"string\"]') @@ to_tsquery('simple', %s)"
+POSTGRES_EDGE_MATCH = (
+    "(to_tsvector('simple', flow_edge.label) || jsonb_to_tsvector('simple', flow_edge.data, '[\"string\"]'))"
+    " @@ to_tsquery('simple', %s)"
+)
+
+
+def search_terms(query):
+    """Words of the query (letters/digits only), lowercased"""
+    return re.findall(r'\w+', query.lower())[:SEARCH_MAX_TERMS]
+
+
+def _matching(model, queryset, terms):
+    """Filter queryset to rows whose text contains every term as a word prefix"""
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        match = POSTGRES_NODE_MATCH if model is Node else POSTGRES_EDGE_MATCH
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        return queryset.alias(matched=RawSQL(match, [tsquery], output_field=BooleanField())).filter(matched=True)
+
+    if vendor == 'sqlite':
+        table = f'{model._meta.db_table}_fts'
+        fts_query = ' '.join(f'"{term}"*' for term in terms)
+        return queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [fts_query]))
+
+    condition = Q()
+    for term in terms:
+        text = Q(data__icontains=term)
+        if model is Edge:
+            text |= Q(label__icontains=term)
+        condition &= text
+    return queryset.filter(condition)
+
+
+def _node_label(data):
+    label = data.get('label') if isinstance(data, dict) else None
+    return label if isinstance(label, str) else ''
+
+
+def search_flows(user, query, limit=SEARCH_MAX_RESULTS):
+    """Nodes and edges of the user's charts whose text matches the query.
+
+    Returns a list of {id, name, matches: [...]} per chart, charts ordered by
+    most recently updated.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    nodes = _matching(Node, Node.objects.filter(flow_chart__owner=user), terms).values_list(
+        'flow_chart_id', 'flow_chart__name', 'flow_chart__updated_at', 'node_id', 'data'
+    ).order_by('-flow_chart__updated_at', 'node_id')[:limit]
+    edges = _matching(Edge, Edge.objects.filter(flow_chart__owner=user), terms).values_list(
+        'flow_chart_id', 'flow_chart__name', 'flow_chart__updated_at', 'edge_id', 'label'
+    ).order_by('-flow_chart__updated_at', 'edge_id')[:limit]
+
+    charts = {}
+    for kind, rows in (('node', nodes), ('edge', edges)):
+        for flow_chart_id, name, updated_at, item_id, text in rows:
+            chart = charts.setdefault(flow_chart_id, {
+                'id': flow_chart_id, 'name': name, 'updatedAt': updated_at, 'matches': [],
+            })
+            chart['matches'].append({
+                'kind': kind,
+                'id': item_id,
+                'label': _node_label(text) if kind == 'node' else text,
+            })
+
+    return sorted(charts.values(), key=lambda chart: chart['updatedAt'], reverse=True)
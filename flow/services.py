@@ -0,0 +1,212 @@
+# services.py
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from flow.api.serializers import NodeSerializer, EdgeSerializer
+from flow.models import FlowChart, Node, Edge, FlowVersion
+
+BULK_BATCH_SIZE = 1000
+
+NODE_UPDATE_FIELDS = [
+    'node_type', 'position_x', 'position_y', 'data', 'style', 'width', 'height',
+    'draggable', 'selectable', 'deletable',
+]
+
+EDGE_UPDATE_FIELDS = [
+    'edge_type', 'source_node_id', 'target_node_id', 'source_handle', 'target_handle',
+    'data', 'style', 'label', 'label_style', 'animated', 'deletable',
+]
+
+
+def node_fields(node_data):
+    """Map a React Flow node dict to Node model fields"""
+    return {
+        'node_id': node_data['id'],
+        'node_type': node_data.get('type', 'default'),
+        'position_x': node_data['position']['x'],
+        'position_y': node_data['position']['y'],
+        'data': node_data.get('data', {}),
+        'style': node_data.get('style', {}),
+        'width': node_data.get('width'),
+        'height': node_data.get('height'),
+        'draggable': node_data.get('draggable', True),
+        'selectable': node_data.get('selectable', True),
+        'deletable': node_data.get('deletable', True),
+    }
+
+
+def edge_fields(edge_data):
+    """Map a React Flow edge dict to Edge model fields"""
+    return {
+        'edge_id': edge_data['id'],
+        'edge_type': edge_data.get('type', 'default'),
+        'source_node_id': edge_data['source'],
+        'target_node_id': edge_data['target'],
+        # React Flow sends null for the default handle
+        'source_handle': edge_data.get('sourceHandle') or '',
+        'target_handle': edge_data.get('targetHandle') or '',
+        'data': edge_data.get('data', {}),
+        'style': edge_data.get('style', {}),
+        'label': edge_data.get('label', ''),
+        'label_style': edge_data.get('labelStyle', {}),
+        'animated': edge_data.get('animated', False),
+        'deletable': edge_data.get('deletable', True),
+    }
+
+
+def flow_snapshot(flow_chart):
+    """The chart's stored state as a React Flow payload, as kept in FlowVersion"""
+    node_serializer = NodeSerializer()
+    edge_serializer = EdgeSerializer()
+    return {
+        'nodes': [node_serializer.to_representation(node) for node in Node.objects.filter(flow_chart=flow_chart)],
+        'edges': [edge_serializer.to_representation(edge) for edge in Edge.objects.filter(flow_chart=flow_chart)],
+        'viewport': flow_chart.viewport,
+        'flowSettings': flow_chart.flow_settings,
+    }
+
+
+def bump_version(flow_chart, user, change_description=''):
+    """Increment the chart version after a structural change and snapshot it.
+
+    Call inside the transaction that made the change, so every version
+    number has a FlowVersion to merge against or serve publicly.
+    """
+    # hashing imports this module
+    from flow.hashing import hash_flow_payload
+
+    flow_chart.version = F('version') + 1
+    flow_chart.save(update_fields=['version', 'updated_at'])
+    flow_chart.refresh_from_db(fields=['version'])
+
+    snapshot = flow_snapshot(flow_chart)
+    FlowVersion.objects.create(
+        flow_chart=flow_chart,
+        version_number=flow_chart.version,
+        snapshot_data=snapshot,
+        content_hash=hash_flow_payload(snapshot),
+        created_by=user,
+        change_description=change_description,
+    )
+    return flow_chart.version
+
+
+def _upsert(model, flow_chart, key_field, rows, update_fields):
+    existing = {
+        getattr(obj, key_field): obj
+        for obj in model.objects.filter(flow_chart=flow_chart, **{f'{key_field}__in': list(rows)})
+    }
+    to_create, to_update = [], []
+    for key, fields in rows.items():
+        obj = existing.get(key)
+        if obj is None:
+            to_create.append(model(flow_chart=flow_chart, **fields))
+        else:
+            for name in update_fields:
+                setattr(obj, name, fields[name])
+            to_update.append(obj)
+
+    if to_create:
+        model.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+    if to_update:
+        model.objects.bulk_update(to_update, update_fields, batch_size=BULK_BATCH_SIZE)
+
+
+def live_group_name(flow_chart_id):
+    """Channel layer group of a chart's live editors (see flow.consumers)"""
+    return f'flowchart_{flow_chart_id}'
+
+
+def notify_graph_replaced(flow_chart_id, version):
+    """Tell live editors, once the transaction commits, that a write made
+    outside the socket replaced the graph, so they reload it"""
+    def send():
+        async_to_sync(get_channel_layer().group_send)(
+            live_group_name(flow_chart_id), {'type': 'flow.saved', 'version': version, 'replaced': True}
+        )
+    transaction.on_commit(send)
+
+
+def apply_operations(flow_chart_id, user, nodes, edges, deleted_nodes, deleted_edges):
+    """Persist a coalesced batch of live edits by user in one transaction.
+
+    nodes/edges map React Flow IDs to model field dicts (see node_fields and
+    edge_fields); deleted_nodes/deleted_edges are sets of React Flow IDs.
+    Deleting a node also removes the edges attached to it, and edges whose
+    source or target is missing afterwards are not written, as save_flow
+    would reject them. Returns (new chart version, IDs of the skipped edges).
+    """
+    with transaction.atomic():
+        flow_chart = FlowChart.objects.select_for_update().get(pk=flow_chart_id)
+
+        if deleted_nodes:
+            Node.objects.filter(flow_chart=flow_chart, node_id__in=deleted_nodes).delete()
+            Edge.objects.filter(flow_chart=flow_chart, source_node_id__in=deleted_nodes).delete()
+            Edge.objects.filter(flow_chart=flow_chart, target_node_id__in=deleted_nodes).delete()
+        if deleted_edges:
+            Edge.objects.filter(flow_chart=flow_chart, edge_id__in=deleted_edges).delete()
+
+        if nodes:
+            _upsert(Node, flow_chart, 'node_id', nodes, NODE_UPDATE_FIELDS)
+        dangling = set()
+        if edges:
+            node_ids = set(Node.objects.filter(flow_chart=flow_chart).values_list('node_id', flat=True))
+            dangling = {
+                edge_id for edge_id, fields in edges.items()
+                if fields['source_node_id'] not in node_ids or fields['target_node_id'] not in node_ids
+            }
+            edges = {edge_id: fields for edge_id, fields in edges.items() if edge_id not in dangling}
+        if edges:
+            _upsert(Edge, flow_chart, 'edge_id', edges, EDGE_UPDATE_FIELDS)
+
+        return bump_version(flow_chart, user, 'Live edit'), dangling
+
+
+def _copy_rows(model, source_id, target_id, fields, stamp_fields=()):
+    """INSERT ... SELECT every row of one chart into another, entirely in the database.
+
+    stamp_fields (created_at/updated_at) are set to now instead of copied.
+    """
+    quote = connection.ops.quote_name
+    columns = [quote(model._meta.get_field(name).column) for name in fields]
+    stamps = [quote(model._meta.get_field(name).column) for name in stamp_fields]
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    table = quote(model._meta.db_table)
+    fk = quote(model._meta.get_field('flow_chart').column)
+
+    sql = (
+        f"INSERT INTO {table} ({fk}, {', '.join(columns + stamps)}) "
+        f"SELECT %s, {', '.join(columns + ['%s'] * len(stamps))} FROM {table} WHERE {fk} = %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [target_id] + [now] * len(stamps) + [source_id])
+        return cursor.rowcount
+
+
+def duplicate_flow_chart(flow_chart, owner, name=None, include_versions=False):
+    """Copy a chart with its nodes and edges (and optionally its history).
+
+    Rows are copied with INSERT ... SELECT, so nothing is loaded into Python.
+    Without history the copy starts again at version 1.
+    """
+    with transaction.atomic():
+        copy = FlowChart.objects.create(
+            name=name or f'{flow_chart.name} (copy)'[:200],
+            description=flow_chart.description,
+            owner=owner,
+            viewport=flow_chart.viewport,
+            flow_settings=flow_chart.flow_settings,
+            is_public=False,
+            version=flow_chart.version if include_versions else 1,
+        )
+        _copy_rows(Node, flow_chart.pk, copy.pk, ['node_id'] + NODE_UPDATE_FIELDS, ('created_at', 'updated_at'))
+        _copy_rows(Edge, flow_chart.pk, copy.pk, ['edge_id'] + EDGE_UPDATE_FIELDS, ('created_at', 'updated_at'))
+        if include_versions:
+            _copy_rows(FlowVersion, flow_chart.pk, copy.pk, [
+                'version_number', 'snapshot_data', 'content_hash', 'created_at', 'created_by',
+                'change_description',
+            ])
+    return copy
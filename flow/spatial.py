@@ -0,0 +1,157 @@
+# spatial.py
+import math
+from collections import namedtuple
+
+from flow.cache import VersionedCache
+from flow.models import Node, Edge
+
+# React Flow's measured size for a default node, used when width/height are unset
+DEFAULT_NODE_WIDTH = 150.0
+DEFAULT_NODE_HEIGHT = 40.0
+
+GRID_CELL_SIZE = 600.0
+# Boxes spanning more cells than this per axis are kept in one "large" list
+# and tested on every query instead of being copied into each cell
+MAX_CELL_SPAN = 16
+
+Rect = namedtuple('Rect', ['x', 'y', 'width', 'height'])
+
+
+def node_box(x, y, width, height):
+    width = width if width is not None else DEFAULT_NODE_WIDTH
+    height = height if height is not None else DEFAULT_NODE_HEIGHT
+    return x, y, x + width, y + height
+
+
+def intersects(box, rect):
+    return (box[0] <= rect.x + rect.width and box[2] >= rect.x and
+            box[1] <= rect.y + rect.height and box[3] >= rect.y)
+
+
+class SpatialIndex:
+    """Uniform grid over node bounding boxes, plus node -> edge incidence.
+
+    Each node is registered in every cell its box overlaps, so a viewport
+    query only visits the cells under the requested rectangle. Oversized
+    (or non-finite) boxes go to a separate list checked on every query.
+    """
+
+    def __init__(self, nodes, edges, cell_size=None):
+        # nodes: iterable of (node_id, x, y, width, height)
+        # edges: iterable of (pk, source_node_id, target_node_id)
+        self.boxes = {}
+        for node_id, x, y, width, height in nodes:
+            self.boxes[node_id] = node_box(x, y, width, height)
+
+        self.incident_edges = {}
+        for pk, source, target in edges:
+            self.incident_edges.setdefault(source, []).append(pk)
+            if target != source:
+                self.incident_edges.setdefault(target, []).append(pk)
+
+        self.max_width = max((b[2] - b[0] for b in self.boxes.values()), default=DEFAULT_NODE_WIDTH)
+        self.max_height = max((b[3] - b[1] for b in self.boxes.values()), default=DEFAULT_NODE_HEIGHT)
+        self.cell_size = cell_size or GRID_CELL_SIZE
+
+        self.cells = {}
+        self.large = []
+        for node_id, box in self.boxes.items():
+            if not all(math.isfinite(value) for value in box) or max(
+                self._cell_span(box[0], box[2]), self._cell_span(box[1], box[3])
+            ) > MAX_CELL_SPAN:
+                self.large.append(node_id)
+                continue
+            for cell in self._cells_for(box[0], box[1], box[2], box[3]):
+                self.cells.setdefault(cell, []).append(node_id)
+
+    def _cell_range(self, low, high):
+        return range(math.floor(low / self.cell_size), math.floor(high / self.cell_size) + 1)
+
+    def _cell_span(self, low, high):
+        # Arithmetic rather than len(range): huge spans overflow len()
+        return math.floor(high / self.cell_size) - math.floor(low / self.cell_size) + 1
+
+    def _cells_for(self, x0, y0, x1, y1):
+        for cx in self._cell_range(x0, x1):
+            for cy in self._cell_range(y0, y1):
+                yield cx, cy
+
+    def query(self, rect):
+        """Node IDs whose bounding box intersects rect"""
+        # Zoomed far out the rectangle covers more cells than there are
+        # nodes; a straight scan is cheaper than walking empty cells.
+        span = self._cell_span(rect.x, rect.x + rect.width) * self._cell_span(rect.y, rect.y + rect.height)
+        if span > len(self.boxes):
+            return {node_id for node_id, box in self.boxes.items() if intersects(box, rect)}
+
+        hits = {node_id for node_id in self.large if intersects(self.boxes[node_id], rect)}
+        for cx in self._cell_range(rect.x, rect.x + rect.width):
+            for cy in self._cell_range(rect.y, rect.y + rect.height):
+                for node_id in self.cells.get((cx, cy), ()):
+                    if node_id not in hits and intersects(self.boxes[node_id], rect):
+                        hits.add(node_id)
+        return hits
+
+    def edges_touching(self, node_ids):
+        """Primary keys of edges with at least one endpoint in node_ids"""
+        edge_pks = set()
+        for node_id in node_ids:
+            edge_pks.update(self.incident_edges.get(node_id, ()))
+        return edge_pks
+
+
+def build_spatial_index(flow_chart):
+    nodes = Node.objects.filter(flow_chart=flow_chart).values_list(
+        'node_id', 'position_x', 'position_y', 'width', 'height'
+    )
+    edges = Edge.objects.filter(flow_chart=flow_chart).values_list('pk', 'source_node_id', 'target_node_id')
+    return SpatialIndex(nodes.iterator(), edges.iterator())
+
+
+_spatial_cache = VersionedCache(build_spatial_index)
+
+
+def get_spatial_index(flow_chart):
+    """Return the cached spatial index for the chart's current version"""
+    return _spatial_cache.get(flow_chart)
+
+
+def _chunked(values, size=500):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def query_viewport(flow_chart, rect, previous=None):
+    """Return (nodes, edges) visible in rect.
+
+    If previous is given, only nodes and edges the client has not already
+    received for that rectangle are returned, so panning is incremental.
+    """
+    index = get_spatial_index(flow_chart)
+    node_ids = index.query(rect)
+    edge_pks = index.edges_touching(node_ids)
+
+    if previous is not None:
+        known_ids = index.query(previous)
+        node_ids -= known_ids
+        edge_pks -= index.edges_touching(known_ids)
+
+    nodes = []
+    if node_ids:
+        # Bound the fetch by position so the (flow_chart, position_x, position_y)
+        # index narrows the scan before the exact grid hits are applied.
+        candidates = Node.objects.filter(
+            flow_chart=flow_chart,
+            position_x__gte=rect.x - index.max_width,
+            position_x__lte=rect.x + rect.width,
+            position_y__gte=rect.y - index.max_height,
+            position_y__lte=rect.y + rect.height,
+        )
+        nodes = [node for node in candidates.iterator() if node.node_id in node_ids]
+
+    edges = []
+    for chunk in _chunked(edge_pks):
+        edges.extend(Edge.objects.filter(pk__in=chunk))
+
+    return nodes, edges
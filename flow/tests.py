@@ -1,3 +1,852 @@
-from django.test import TestCase
+import copy
+import gzip
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connection
+from django.db.models import F
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from flow.api.renderers import COMPACT_MEDIA_TYPE
+from flow.compact import COMPACT_FORMAT, decode_flow, encode_flow
+from flow.export import STREAM_CHUNK_SIZE, StaleExportError
+from flow.graph import FlowGraph
+from flow.hashing import hash_flow_chart, hash_flow_payload
+from flow.layout import compute_layout
+from flow.rendering import generate_thumbnails
+from flow.models import FlowChart, FlowVersion, Node, Edge
+from flow.spatial import MAX_CELL_SPAN, Rect, SpatialIndex
+from rolwebsite.asgi import application
+
+
+def flow_doc(count=3, **extra):
+    """React Flow payload for a chain n0 -> n1 -> ... of `count` nodes"""
+    nodes = [{'id': f'n{i}', 'position': {'x': i * 200, 'y': 0}, 'data': {'label': f'Node {i}'}} for i in range(count)]
+    edges = [{'id': f'e{i}', 'source': f'n{i}', 'target': f'n{i + 1}'} for i in range(count - 1)]
+    return {'nodes': nodes, 'edges': edges, 'viewport': {'x': 0, 'y': 0, 'zoom': 1}, **extra}
+
+
+def make_chart(owner, nodes=(), edges=(), **fields):
+    """Chart with nodes given as ids or (id, x, y) and edges as (source, target)"""
+    flow_chart = FlowChart.objects.create(name=fields.pop('name', 'Chart'), owner=owner, **fields)
+    Node.objects.bulk_create(
+        Node(flow_chart=flow_chart, node_id=node, position_x=0, position_y=0) if isinstance(node, str)
+        else Node(flow_chart=flow_chart, node_id=node[0], position_x=node[1], position_y=node[2])
+        for node in nodes
+    )
+    Edge.objects.bulk_create(
+        Edge(flow_chart=flow_chart, edge_id=f'e{i}', source_node_id=source, target_node_id=target)
+        for i, (source, target) in enumerate(edges)
+    )
+    return flow_chart
+
+
+class FlowAPITestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        cls.other = User.objects.create_user('other', 'other@example.com', 'password')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def url(self, flow_chart, action=''):
+        return f'/api/flow/api/flowcharts/{flow_chart.pk}/{action}'
+
+
+class FlowGraphTests(FlowAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.chart = make_chart(self.user, 'abcde', [('a', 'b'), ('b', 'c'), ('a', 'c'), ('d', 'e')])
+
+    def test_topological_order_respects_edges(self):
+        order = self.client.get(self.url(self.chart, 'graph/topological-order/')).json()['order']
+        self.assertEqual(sorted(order), list('abcde'))
+        for source, target in (('a', 'b'), ('b', 'c'), ('a', 'c'), ('d', 'e')):
+            self.assertLess(order.index(source), order.index(target))
+
+    def test_cycle_is_reported(self):
+        graph = FlowGraph('abc', [('a', 'b'), ('b', 'c'), ('c', 'a')])
+        self.assertIsNone(graph.topological_order())
+        self.assertEqual(sorted(graph.find_cycle()), ['a', 'b', 'c'])
+
+    def test_reachable_and_shortest_path(self):
+        reachable = self.client.get(self.url(self.chart, 'graph/reachable/'), {'node': 'c', 'direction': 'upstream'})
+        self.assertEqual(sorted(reachable.json()['nodes']), ['a', 'b'])
+
+        path = self.client.get(self.url(self.chart, 'graph/shortest-path/'), {'source': 'a', 'target': 'c'}).json()
+        self.assertEqual((path['path'], path['length']), (['a', 'c'], 1))
+        unreachable = self.client.get(self.url(self.chart, 'graph/shortest-path/'), {'source': 'a', 'target': 'e'})
+        self.assertIsNone(unreachable.json()['path'])
+
+    def test_components_and_errors(self):
+        components = self.client.get(self.url(self.chart, 'graph/components/')).json()
+        self.assertEqual(components['components'], [['a', 'b', 'c'], ['d', 'e']])
+        self.assertEqual(self.client.get(self.url(self.chart, 'graph/reachable/')).status_code, 400)
+        self.assertEqual(self.client.get(self.url(self.chart, 'graph/reachable/'), {'node': 'zz'}).status_code, 404)
+
+
+class FlowViewportTests(FlowAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.chart = make_chart(
+            self.user,
+            [(f'n{i}', i * 200, 0) for i in range(20)],
+            [(f'n{i}', f'n{i + 1}') for i in range(19)],
+        )
+
+    def viewport(self, **params):
+        return self.client.get(self.url(self.chart, 'viewport/'), params)
+
+    def test_returns_visible_nodes_and_touching_edges(self):
+        data = self.viewport(x=0, y=0, width=500, height=100).json()
+        self.assertEqual(sorted(node['id'] for node in data['nodes']), ['n0', 'n1', 'n2'])
+        self.assertEqual(sorted(edge['id'] for edge in data['edges']), ['e0', 'e1', 'e2'])
+
+    def test_panning_only_returns_new_items(self):
+        data = self.viewport(x=200, y=0, width=500, height=100, prev_x=0, prev_y=0, prev_width=500, prev_height=100)
+        self.assertEqual([node['id'] for node in data.json()['nodes']], ['n3'])
+
+    def test_non_finite_and_missing_params_are_rejected(self):
+        self.assertEqual(self.viewport(x='nan', y=0, width=10, height=10).status_code, 400)
+        self.assertEqual(self.viewport(x=0, y=0, width='inf', height=10).status_code, 400)
+        self.assertEqual(self.viewport(x=0, y=0, width=-1, height=10).status_code, 400)
+        self.assertEqual(self.viewport().status_code, 400)
+        self.assertEqual(len(self.viewport(x=-1e300, y=-1e300, width=1e299, height=1e299).json()['nodes']), 0)
+        self.assertEqual(len(self.viewport(x=-1e300, y=-1e300, width=2e300, height=2e300).json()['nodes']), 20)
+
+    def test_huge_nodes_are_not_copied_into_every_cell(self):
+        index = SpatialIndex([('wide', 0, 0, 1e9, 1e9), ('small', 50, 50, 10, 10)], [])
+        self.assertEqual(index.large, ['wide'])
+        self.assertLessEqual(sum(len(ids) for ids in index.cells.values()), 1)
+        self.assertEqual(index.query(Rect(5e8, 5e8, 10, 10)), {'wide'})
+        self.assertEqual(index.query(Rect(40, 40, 20, 20)), {'wide', 'small'})
+
+        edge = SpatialIndex([('edge', 0, 0, 600 * MAX_CELL_SPAN - 1, 10)], [])
+        self.assertEqual(edge.large, [])
+
+
+@override_settings(FLOW_WS_FLUSH_INTERVAL=0.05, BACKGROUND_TASKS_EAGER=True)
+class FlowLiveEditingTests(TransactionTestCase):
+
+    def setUp(self):
+        # Saves render thumbnails; keep them out of the real media directory
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.chart = make_chart(self.user, [('a', 0, 0)])
+
+    def communicator(self, user):
+        return WebsocketCommunicator(
+            application,
+            f'/ws/flow/flowcharts/{self.chart.pk}/?token={AccessToken.for_user(user)}',
+            headers=[(b'origin', b'http://localhost')],
+        )
+
+    def test_edits_are_broadcast_coalesced_and_snapshotted(self):
+        async def edit():
+            sender, receiver = self.communicator(self.user), self.communicator(self.user)
+            self.assertTrue((await sender.connect())[0])
+            self.assertTrue((await receiver.connect())[0])
+            await sender.send_json_to({'ops': [
+                {'op': 'node.upsert', 'node': {'id': 'a', 'position': {'x': 5, 'y': 6}}},
+                {'op': 'node.upsert', 'node': {'id': 'a', 'position': {'x': 7, 'y': 8}}},
+                {'op': 'node.upsert', 'node': {'id': 'b', 'position': {'x': 1, 'y': 1}}},
+                {'op': 'edge.upsert', 'edge': {'id': 'ab', 'source': 'a', 'target': 'b'}},
+                {'op': 'bogus'},
+            ]})
+            self.assertEqual((await sender.receive_json_from())['type'], 'error')
+            self.assertEqual(len((await receiver.receive_json_from())['ops']), 4)
+            saved = await receiver.receive_json_from(timeout=2)
+            await sender.disconnect()
+            await receiver.disconnect()
+            return saved
+
+        saved = async_to_sync(edit)()
+        self.assertEqual(saved, {'type': 'saved', 'version': 2})
+        self.assertEqual(sorted(Node.objects.values_list('node_id', 'position_x')), [('a', 7), ('b', 1)])
+
+        # Every live version has a snapshot a stale REST save can merge against
+        snapshot = FlowVersion.objects.get(flow_chart=self.chart, version_number=2).snapshot_data
+        self.assertEqual(sorted(node['id'] for node in snapshot['nodes']), ['a', 'b'])
+        self.assertEqual([edge['id'] for edge in snapshot['edges']], ['ab'])
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f'/api/flow/api/flowcharts/{self.chart.pk}/save_flow/'
+        moved = [dict(node, position={'x': 50, 'y': 50}) if node['id'] == 'b' else node for node in snapshot['nodes']]
+        client.post(url, {**snapshot, 'nodes': moved, 'baseVersion': 2}, format='json')
+        added = snapshot['nodes'] + [{'id': 'c', 'position': {'x': 0, 'y': 0}}]
+        response = client.post(url, {**snapshot, 'nodes': added, 'baseVersion': 2}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertTrue(response.json()['merged'])
+        self.assertEqual(sorted(node['id'] for node in response.json()['nodes']), ['a', 'b', 'c'])
+
+    def test_edges_to_missing_nodes_are_taken_back(self):
+        async def edit():
+            sender, receiver = self.communicator(self.user), self.communicator(self.user)
+            await sender.connect()
+            await receiver.connect()
+            await sender.send_json_to({'op': 'edge.upsert', 'edge': {'id': 'ax', 'source': 'a', 'target': 'x'}})
+            messages = [await receiver.receive_json_from(timeout=2) for _ in range(4)]
+            await sender.disconnect()
+            await receiver.disconnect()
+            return messages
+
+        broadcast, retracted, error, saved = async_to_sync(edit)()
+        self.assertEqual(broadcast['ops'][0]['op'], 'edge.upsert')
+        self.assertEqual(retracted, {'type': 'operations', 'ops': [{'op': 'edge.delete', 'id': 'ax'}]})
+        self.assertEqual(error['type'], 'error')
+        self.assertEqual(saved['type'], 'saved')
+        self.assertFalse(Edge.objects.exists())
+
+    def test_failed_flush_is_reported(self):
+        async def edit():
+            editor = self.communicator(self.user)
+            await editor.connect()
+            await editor.send_json_to({'op': 'node.upsert', 'node': {'id': 'b', 'position': {'x': 1, 'y': 1}}})
+            message = await editor.receive_json_from(timeout=2)
+            await editor.disconnect()
+            return message
+
+        with mock.patch('flow.consumers.apply_operations', side_effect=DatabaseError('disk full')), \
+                self.assertLogs('flow.consumers', 'ERROR'):
+            message = async_to_sync(edit)()
+        self.assertEqual(message['type'], 'error')
+        self.assertIn('could not be saved', message['error'])
+
+    def test_deleted_chart_closes_the_socket(self):
+        async def edit():
+            editor = self.communicator(self.user)
+            await editor.connect()
+            await FlowChart.objects.filter(pk=self.chart.pk).adelete()
+            await editor.send_json_to({'op': 'node.upsert', 'node': {'id': 'b', 'position': {'x': 1, 'y': 1}}})
+            message = await editor.receive_json_from(timeout=2)
+            closed = await editor.receive_output(timeout=2)
+            await editor.disconnect()
+            return message, closed
+
+        message, closed = async_to_sync(edit)()
+        self.assertEqual(message, {'type': 'error', 'error': 'Flow chart was deleted'})
+        self.assertEqual(closed, {'type': 'websocket.close', 'code': 4404})
+
+    def test_rest_save_tells_live_editors(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        async def edit():
+            editor = self.communicator(self.user)
+            await editor.connect()
+            response = await sync_to_async(client.post)(
+                f'/api/flow/api/flowcharts/{self.chart.pk}/save_flow/', flow_doc(2), format='json'
+            )
+            message = await editor.receive_json_from(timeout=2)
+            await editor.disconnect()
+            return response, message
+
+        response, message = async_to_sync(edit)()
+        self.assertEqual(message, {'type': 'saved', 'version': response.json()['version'], 'replaced': True})
+
+    def test_only_the_owner_can_connect(self):
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+
+        async def connect():
+            connected, _ = await self.communicator(other).connect()
+            return connected
+
+        self.assertFalse(async_to_sync(connect)())
+
+
+class FlowStreamingExportTests(FlowAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.chart = make_chart(
+            self.user,
+            [(f'n{i}', i, 0) for i in range(3000)],
+            [(f'n{i}', f'n{i + 1}') for i in range(2999)],
+            viewport={'x': 1, 'y': 2, 'zoom': 1},
+        )
+        Node.objects.filter(flow_chart=self.chart).update(data={'label': 'é' * 20})
+        self.async_client = AsyncClient()
+
+    def get(self, params=None, **headers):
+        headers['authorization'] = f'Bearer {AccessToken.for_user(self.user)}'
+        return self.async_client.get(self.url(self.chart, 'export_flow/'), params, headers=headers)
+
+    async def stream(self, **headers):
+        response = await self.get({'stream': 'true'}, **headers)
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        return response, chunks
+
+    async def test_stream_is_sent_in_chunks(self):
+        response, chunks = await self.stream()
+        self.assertGreater(len(chunks), 2)
+        self.assertTrue(all(len(chunk) < 2 * STREAM_CHUNK_SIZE for chunk in chunks))
+
+        document = json.loads(b''.join(chunks))
+        self.assertEqual([node['id'] for node in document['nodes']], [f'n{i}' for i in range(3000)])
+        self.assertEqual(len(document['edges']), 2999)
+        self.assertEqual(document['viewport'], {'x': 1, 'y': 2, 'zoom': 1})
+        self.assertIn('flowchart-', response['Content-Disposition'])
+
+    async def test_gzip_stream_matches_plain_export(self):
+        plain = (await self.get()).json()
+        response, chunks = await self.stream(accept_encoding='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(b''.join(chunks))), plain)
+
+        cached = await self.get({'stream': 'true'}, accept_encoding='gzip', if_none_match=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    async def test_save_during_stream_cuts_it_short(self):
+        response = await self.get({'stream': 'true'})
+        chunks = aiter(response.streaming_content)
+        await anext(chunks)
+        # What save_flow does: new rows under a new version
+        await FlowChart.objects.filter(pk=self.chart.pk).aupdate(version=F('version') + 1)
+        with self.assertRaises(StaleExportError):
+            async for _ in chunks:
+                pass
+
+    async def test_empty_chart(self):
+        self.chart = await FlowChart.objects.acreate(name='Empty', owner=self.user)
+        _, chunks = await self.stream()
+        self.assertEqual(json.loads(b''.join(chunks)), {'nodes': [], 'edges': [], 'viewport': {}, 'flowSettings': {}})
+
+
+class FlowImportTests(FlowAPITestCase):
+
+    def upload(self, name, content):
+        return self.client.post(
+            '/api/flow/api/flowcharts/import/', {'file': SimpleUploadedFile(name, content)}, format='multipart'
+        )
+
+    def zip_upload(self, members):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, content in members.items():
+                archive.writestr(name, content)
+        return self.upload('flows.zip', buffer.getvalue())
+
+    def test_ndjson_imports_valid_lines_only(self):
+        broken = flow_doc(2)
+        broken['edges'].append({'id': 'x', 'source': 'n0', 'target': 'missing'})
+        lines = [json.dumps(flow_doc(3, name='good')), json.dumps(broken), '', '{not json']
+        data = self.upload('flows.ndjson', '\n'.join(lines).encode()).json()
+
+        self.assertEqual((data['created'], data['failed']), (1, 2))
+        self.assertEqual([result['source'] for result in data['results']], ['flows.ndjson:1', 'flows.ndjson:2', 'flows.ndjson:4'])
+        flow_chart = FlowChart.objects.get(name='good')
+        self.assertEqual((flow_chart.nodes.count(), flow_chart.edges.count(), flow_chart.versions.count()), (3, 2, 1))
+
+    def test_zip_members_are_named_after_their_file(self):
+        data = self.zip_upload({'dir/first.json': json.dumps(flow_doc()), 'readme.txt': 'skipped'}).json()
+        self.assertEqual(data['created'], 1)
+        self.assertEqual(FlowChart.objects.get(pk=data['results'][0]['id']).name, 'first')
+
+    @override_settings(FLOW_IMPORT_MAX_FILE_SIZE=1000)
+    def test_oversized_member_is_rejected_unread(self):
+        # Highly compressible: tiny in the archive, far over the limit inflated
+        bomb = json.dumps(flow_doc(1, padding=' ' * 100000))
+        data = self.zip_upload({'bomb.json': bomb, 'small.json': json.dumps(flow_doc(1))}).json()
+        self.assertEqual([result['status'] for result in data['results']], ['invalid', 'created'])
+        self.assertIn('larger than 1000 bytes', data['results'][0]['errors'][0])
+
+    def test_archive_limits_reject_the_whole_upload(self):
+        members = {f'{i}.json': json.dumps(flow_doc(1)) for i in range(3)}
+        with self.settings(FLOW_IMPORT_MAX_FILES=2):
+            self.assertEqual(self.zip_upload(members).status_code, 400)
+        with self.settings(FLOW_IMPORT_MAX_TOTAL_SIZE=300):
+            response = self.zip_upload(members)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('larger than 300 bytes', response.json()['error'])
+        self.assertFalse(FlowChart.objects.exists())
+
+    def test_ndjson_line_that_is_not_utf8_is_invalid(self):
+        content = b'\xff\xfe' + json.dumps(flow_doc(1)).encode() + b'\n' + json.dumps(flow_doc(1, name='ok')).encode()
+        response = self.upload('flows.ndjson', content)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([result['status'] for result in response.json()['results']], ['invalid', 'created'])
+        self.assertIn('Invalid JSON', response.json()['results'][0]['errors'][0])
+
+    @override_settings(FLOW_IMPORT_MAX_FILE_SIZE=1000)
+    def test_oversized_ndjson_line_is_rejected(self):
+        lines = [json.dumps(flow_doc(1, padding=' ' * 5000)), json.dumps(flow_doc(1, name='small'))]
+        data = self.upload('flows.ndjson', '\n'.join(lines).encode()).json()
+        self.assertEqual([result['status'] for result in data['results']], ['invalid', 'created'])
+        self.assertEqual(data['results'][1]['source'], 'flows.ndjson:2')
+        self.assertIn('larger than 1000 bytes', data['results'][0]['errors'][0])
+
+    def test_ndjson_limits_reject_the_whole_upload(self):
+        content = '\n'.join(json.dumps(flow_doc(1)) for _ in range(3)).encode()
+        with self.settings(FLOW_IMPORT_MAX_FILES=2):
+            self.assertEqual(self.upload('flows.ndjson', content).status_code, 400)
+        with self.settings(FLOW_IMPORT_MAX_TOTAL_SIZE=300):
+            response = self.upload('flows.ndjson', content)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('larger than 300 bytes', response.json()['error'])
+        self.assertFalse(FlowChart.objects.exists())
+
+
+class FlowLayoutTests(FlowAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.chart = make_chart(self.user, 'abcde', [('a', 'b'), ('b', 'c'), ('a', 'c'), ('c', 'a'), ('d', 'e')])
+
+    def layout(self, **options):
+        return self.client.post(self.url(self.chart, 'layout/'), options, format='json')
+
+    def test_layered_layout_is_persisted_once_and_snapshotted(self):
+        data = self.layout().json()
+        self.assertEqual(data['version'], 2)
+        self.assertGreater(data['changed'], 0)
+        positions = {node_id: (position['x'], position['y']) for node_id, position in data['positions'].items()}
+        self.assertEqual(sorted(Node.objects.values_list('node_id', 'position_x', 'position_y')),
+                         sorted((node_id, x, y) for node_id, (x, y) in positions.items()))
+        self.assertTrue(self.chart.versions.filter(version_number=2).exists())
+
+        # Same structure, nodes already in place: nothing is written
+        again = self.layout().json()
+        self.assertEqual((again['changed'], again['version']), (0, 2))
+
+    def test_directions_and_modes(self):
+        top_down = self.layout().json()['positions']
+        self.assertLess(top_down['a']['y'], top_down['b']['y'])
+        left_right = self.layout(direction='LR').json()['positions']
+        self.assertLess(left_right['a']['x'], left_right['b']['x'])
+        self.assertEqual(self.layout(mode='force').status_code, 200)
+        self.assertEqual(self.layout(mode='circle').status_code, 400)
+        self.assertEqual(self.layout(direction='up').status_code, 400)
+
+    def test_self_loops_do_not_collapse_layers(self):
+        sizes = dict.fromkeys('abc', (150, 40))
+        plain = compute_layout('abc', [('a', 'b'), ('b', 'c')], sizes)
+        looped = compute_layout('abc', [('a', 'a'), ('a', 'b'), ('b', 'b'), ('b', 'c')], sizes)
+        self.assertEqual(looped, plain)
+        self.assertEqual(len({y for _, y in looped.values()}), 3)
+
+
+class FlowContentHashTests(FlowAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.chart = FlowChart.objects.create(name='Chart', owner=self.user)
+
+    def save(self, document):
+        return self.client.post(self.url(self.chart, 'save_flow/'), document, format='json').json()
+
+    def test_stored_and_posted_state_hash_alike(self):
+        document = flow_doc(3)
+        document['nodes'][0]['width'] = 150  # 150 comes back as 150.0
+        self.save(document)
+        self.chart.refresh_from_db()
+        self.assertEqual(hash_flow_chart(self.chart), hash_flow_payload(document))
+        self.assertEqual(self.chart.versions.get().content_hash, hash_flow_payload(document))
+
+    def test_unchanged_save_does_not_mint_a_version(self):
+        self.assertEqual(self.save(flow_doc(3))['version'], 2)
+        unchanged = self.save(flow_doc(3, changeDescription='autosave'))
+        self.assertEqual((unchanged['version'], unchanged.get('unchanged')), (2, True))
+        self.assertEqual(self.save(flow_doc(4))['version'], 3)
+        self.assertEqual(self.chart.versions.count(), 2)
+
+    def test_export_etag_follows_content(self):
+        self.save(flow_doc(3))
+        export = self.client.get(self.url(self.chart, 'export_flow/'))
+        etag = export['ETag']
+        self.assertEqual(self.client.get(self.url(self.chart, 'export_flow/'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Streamed bytes differ from the plain body, so they carry their own tag
+        streamed = self.client.get(self.url(self.chart, 'export_flow/'), {'stream': 'true'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(streamed.status_code, 200)
+        self.assertNotEqual(streamed['ETag'], etag)
+
+        # Renaming leaves the export alone but changes the detail ETag
+        detail_etag = self.client.get(self.url(self.chart))['ETag']
+        self.client.patch(self.url(self.chart), {'name': 'Renamed'}, format='json')
+        self.assertEqual(self.client.get(self.url(self.chart, 'export_flow/'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(self.url(self.chart), HTTP_IF_NONE_MATCH=detail_etag).status_code, 200)
+
+        self.save(flow_doc(4))
+        self.assertEqual(self.client.get(self.url(self.chart, 'export_flow/'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class PublicFlowChartTests(FlowAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.chart = FlowChart.objects.create(name='Shared', owner=self.user, is_public=True)
+        self.client.post(self.url(self.chart, 'save_flow/'), flow_doc(3), format='json')
+        self.client.post(self.url(self.chart, 'save_flow/'), flow_doc(5), format='json')
+        self.anonymous = APIClient()
+
+    def public(self, path=''):
+        return self.anonymous.get(f'/api/flow/api/public/flowcharts/{self.chart.pk}/{path}')
+
+    def test_latest_points_at_its_snapshot(self):
+        response = self.public()
+        self.assertEqual((response.json()['version'], len(response.json()['nodes'])), (3, 5))
+        self.assertTrue(response['Content-Location'].endswith(f'/{self.chart.pk}/versions/3/'))
+
+        versioned = self.anonymous.get(response['Content-Location'])
+        self.assertIn('immutable', versioned['Cache-Control'])
+        self.assertEqual([node['id'] for node in versioned.json()['nodes']],
+                         [node['id'] for node in response.json()['nodes']])
+        self.assertEqual(self.public('versions/9/').status_code, 404)
+
+    def test_history_before_the_current_version_is_not_public(self):
+        # Version 2 is still in FlowVersion, but may hold what the owner removed before sharing
+        self.assertTrue(self.chart.versions.filter(version_number=2).exists())
+        self.assertEqual(self.public('versions/2/').status_code, 404)
+
+    def test_version_without_snapshot_is_not_advertised(self):
+        # Version 1 was never saved, so there is nothing to serve at versions/1/
+        fresh = FlowChart.objects.create(name='Fresh', owner=self.user, is_public=True)
+        response = self.anonymous.get(f'/api/flow/api/public/flowcharts/{fresh.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Location', response)
+        self.assertEqual(self.public('versions/1/').status_code, 404)
+
+    def test_visibility_is_checked_on_every_request(self):
+        self.assertEqual(self.public('versions/3/').status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.public('versions/3/').status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+        # A queryset update skips every signal and cache hook
+        FlowChart.objects.filter(pk=self.chart.pk).update(is_public=False)
+        self.assertEqual(self.public('versions/3/').status_code, 404)
+        self.assertEqual(self.public().status_code, 404)
+        self.assertEqual(self.anonymous.get('/api/flow/api/public/flowcharts/').json()['count'], 0)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class FlowThumbnailTests(FlowAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.chart = FlowChart.objects.create(name='Chart', owner=self.user)
+
+    def test_saves_render_png_and_svg(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url(self.chart, 'save_flow/'), flow_doc(3), format='json')
+
+        png = self.client.get(self.url(self.chart, 'thumbnail/'), {'v': 2})
+        self.assertEqual(png['Content-Type'], 'image/png')
+        self.assertIn('immutable', png['Cache-Control'])
+        self.assertTrue(b''.join(png.streaming_content).startswith(b'\x89PNG'))
+
+        svg = self.client.get(self.url(self.chart, 'thumbnail/'), {'type': 'svg'})
+        self.assertEqual(svg['Cache-Control'], 'private, no-cache')
+        self.assertIn(b'<svg', b''.join(svg.streaming_content))
+        self.assertEqual(self.client.get(self.url(self.chart, 'thumbnail/'), {'type': 'gif'}).status_code, 400)
+
+    def test_unsaved_chart_renders_inline(self):
+        response = self.client.get(self.url(self.chart, 'thumbnail/'))
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_chart_saved_during_inline_render_is_a_404(self):
+        def save_first(flow_chart_id, version):
+            FlowChart.objects.filter(pk=flow_chart_id).update(version=version + 1)
+            return generate_thumbnails(flow_chart_id, version)
+
+        with mock.patch('flow.api.views.generate_thumbnails', side_effect=save_first):
+            response = self.client.get(self.url(self.chart, 'thumbnail/'))
+        self.assertEqual(response.status_code, 404)
+
+
+class FlowValidationTests(FlowAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.chart = FlowChart.objects.create(name='Chart', owner=self.user)
+
+    def save(self, document):
+        return self.client.post(self.url(self.chart, 'save_flow/'), document, format='json')
+
+    def test_every_problem_is_reported_with_its_path(self):
+        document = flow_doc(3)
+        del document['nodes'][0]['position']
+        document['nodes'][1]['position']['x'] = 'left'
+        document['nodes'].append(dict(document['nodes'][2]))
+        document['edges'].append({'id': 'dangling', 'source': 'n0', 'target': 'missing'})
+
+        response = self.save(document)
+        self.assertEqual(response.status_code, 400)
+        paths = [error['path'] for error in response.json()['errors']]
+        self.assertIn('$.nodes[0].position', paths)
+        self.assertIn('$.nodes[1].position.x', paths)
+        self.assertTrue(any(path.startswith('$.nodes[3]') for path in paths))
+        self.assertTrue(any(path.startswith('$.edges[2]') for path in paths))
+
+        # Nothing was written
+        self.chart.refresh_from_db()
+        self.assertEqual((self.chart.version, self.chart.nodes.count()), (1, 0))
+
+    def test_wrong_top_level_types(self):
+        self.assertEqual(self.save({'nodes': {}, 'edges': []}).status_code, 400)
+        self.assertEqual(self.save(['not', 'an', 'object']).status_code, 400)
+        self.assertEqual(self.save(flow_doc(2)).status_code, 200)
+
+
+class FlowMergeTests(FlowAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.chart = FlowChart.objects.create(name='Chart', owner=self.user)
+        self.base_version = self.save(flow_doc(3)).json()['version']
+
+    def save(self, document):
+        return self.client.post(self.url(self.chart, 'save_flow/'), document, format='json')
+
+    def edit(self, change):
+        document = copy.deepcopy(flow_doc(3, baseVersion=self.base_version))
+        change(document)
+        return document
+
+    def test_non_overlapping_edits_are_merged(self):
+        def move(document):
+            document['nodes'][0]['position']['x'] = 100
+
+        def relabel_and_add(document):
+            document['nodes'][0]['data'] = {'label': 'B'}
+            document['nodes'].append({'id': 'extra', 'position': {'x': 5, 'y': 5}})
+
+        self.assertNotIn('merged', self.save(self.edit(move)).json())
+        response = self.save(self.edit(relabel_and_add)).json()
+        self.assertTrue(response['merged'])
+        self.assertEqual(response['version'], self.base_version + 2)
+
+        n0 = Node.objects.get(flow_chart=self.chart, node_id='n0')
+        self.assertEqual((n0.position_x, n0.data), (100, {'label': 'B'}))
+        self.assertEqual(self.chart.nodes.count(), 4)
+
+    def test_conflicts_are_listed(self):
+        def move(x):
+            def change(document):
+                document['nodes'][0]['position']['x'] = x
+            return change
+
+        def drop_n2(document):
+            document['nodes'] = document['nodes'][:2]
+            document['edges'] = document['edges'][:1]
+
+        def link_to_n2(document):
+            document['edges'].append({'id': 'late', 'source': 'n0', 'target': 'n2'})
+
+        self.save(self.edit(move(100)))
+        response = self.save(self.edit(move(7)))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['conflicts'], [{'kind': 'node', 'id': 'n0', 'fields': ['position_x']}])
+
+        self.save(self.edit(drop_n2))
+        conflicts = self.save(self.edit(link_to_n2)).json()['conflicts']
+        self.assertIn('n2', conflicts[-1]['missing_nodes'])
+
+    def test_unknown_base_version(self):
+        response = self.save(flow_doc(4, baseVersion=99))
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('No snapshot', response.json()['error'])
+
+
+class FlowComponentTests(FlowAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.chart = make_chart(
+            self.user, [('a', 100, 100), ('b', 300, 100), ('c', 500, 100)], [('a', 'b'), ('b', 'c')]
+        )
+
+    def extract(self, **data):
+        return self.client.post(self.url(self.chart, 'extract-component/'), data, format='json')
+
+    def insert(self, **data):
+        return self.client.post(self.url(self.chart, 'insert-component/'), data, format='json')
+
+    def test_extract_and_insert_round_trip(self):
+        component = self.extract(nodeIds=['a', 'b'], name='Pair').json()
+        self.assertEqual((component['node_count'], component['edge_count']), (2, 1))
+        self.assertEqual(component['nodes'][0]['position'], {'x': 0, 'y': 0})
+
+        response = self.insert(component=component['id'], offset={'x': 10, 'y': 5})
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data['version'], 2)
+        self.assertEqual(sorted(data['idMap']), ['a', 'b'])
+        self.assertNotIn(data['idMap']['a'], ['a', 'b', 'c'])
+        self.assertEqual(data['nodes'][0]['position'], {'x': 10, 'y': 5})
+        self.assertEqual((data['edges'][0]['source'], data['edges'][0]['target']),
+                         (data['idMap']['a'], data['idMap']['b']))
+        self.assertEqual((self.chart.nodes.count(), self.chart.edges.count()), (5, 3))
+        self.assertTrue(self.chart.versions.filter(version_number=2).exists())
+
+        listing = self.client.get('/api/flow/api/components/').json()
+        self.assertEqual([entry['name'] for entry in listing], ['Pair'])
+
+    def test_malformed_input_is_a_400(self):
+        component = self.extract(nodeIds=['a'], name='One').json()
+        self.assertEqual(self.insert(component='abc').status_code, 400)
+        self.assertEqual(self.insert().status_code, 400)
+        self.assertEqual(self.insert(component=component['id'], offset={'x': 'far'}).status_code, 400)
+        self.assertEqual(self.insert(component=component['id'], offset=[1, 2]).status_code, 400)
+        self.assertEqual(self.insert(component=component['id'], offset={'x': 'inf'}).status_code, 400)
+        self.assertEqual(self.insert(component=component['id'], offset=None).status_code, 201)
+
+        self.assertEqual(self.extract(nodeIds=['a'], name=['not', 'a', 'string']).status_code, 400)
+        self.assertEqual(self.extract(nodeIds='a', name='One').status_code, 400)
+        self.assertEqual(self.extract(nodeIds=['missing'], name='None').status_code, 400)
+
+    def test_other_users_components_are_not_found(self):
+        component = self.extract(nodeIds=['a'], name='Mine').json()
+        self.client.force_authenticate(self.other)
+        own_chart = make_chart(self.other, ['x'])
+        response = self.client.post(self.url(own_chart, 'insert-component/'), {'component': component['id']}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+
+class FlowDuplicateTests(FlowAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.chart = FlowChart.objects.create(name='Original', owner=self.user, is_public=True)
+        for count in (3, 5):
+            self.client.post(self.url(self.chart, 'save_flow/'), flow_doc(count), format='json')
+        self.chart.refresh_from_db()
+
+    def duplicate(self, **data):
+        return self.client.post(self.url(self.chart, 'duplicate/'), data, format='json')
+
+    def test_copy_matches_the_original(self):
+        data = self.duplicate().json()
+        copy = FlowChart.objects.get(pk=data['id'])
+        self.assertEqual((data['name'], data['version'], copy.is_public), ('Original (copy)', 1, False))
+        self.assertEqual(hash_flow_chart(copy), hash_flow_chart(self.chart))
+        self.assertFalse(copy.versions.exists())
+        self.assertEqual(sorted(copy.nodes.values_list('node_id', flat=True)), [f'n{i}' for i in range(5)])
+
+    def test_history_is_copied_on_request(self):
+        data = self.duplicate(name='With history', includeVersions=True).json()
+        copy = FlowChart.objects.get(pk=data['id'])
+        self.assertEqual((copy.name, copy.version), ('With history', self.chart.version))
+        self.assertEqual(list(copy.versions.values_list('version_number', 'content_hash')),
+                         list(self.chart.versions.values_list('version_number', 'content_hash')))
+
+    def test_only_the_owner_can_duplicate(self):
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.duplicate().status_code, 404)
+
+    def test_bad_options(self):
+        self.assertEqual(self.duplicate(includeVersions='yes').status_code, 400)
+        self.assertEqual(self.duplicate(name=42).status_code, 400)
+
+
+class FlowCompactFormatTests(FlowAPITestCase):
+    MEDIA_TYPE = COMPACT_MEDIA_TYPE
+
+    def setUp(self):
+        super().setUp()
+        self.chart = FlowChart.objects.create(name='Chart', owner=self.user)
+        document = flow_doc(50)
+        for node in document['nodes']:
+            node.update(type='custom', style={'background': '#fff', 'border': '1px solid #222'})
+        self.client.post(self.url(self.chart, 'save_flow/'), document, format='json')
+
+    def test_export_round_trips_and_is_smaller(self):
+        plain = self.client.get(self.url(self.chart, 'export_flow/'))
+        compact = self.client.get(self.url(self.chart, 'export_flow/'), HTTP_ACCEPT=self.MEDIA_TYPE)
+        self.assertTrue(compact['Content-Type'].startswith(self.MEDIA_TYPE))
+        self.assertIn('Accept', compact['Vary'])
+        self.assertLess(len(compact.content), len(plain.content) / 2)
+        self.assertEqual(decode_flow(json.loads(compact.content)), plain.json())
+
+        self.assertNotEqual(compact['ETag'], plain['ETag'])
+        cached = self.client.get(
+            self.url(self.chart, 'export_flow/'), HTTP_ACCEPT=self.MEDIA_TYPE, HTTP_IF_NONE_MATCH=compact['ETag']
+        )
+        self.assertEqual(cached.status_code, 304)
+
+    def test_compact_save(self):
+        document = flow_doc(4)
+        encoded = encode_flow(document)
+        self.assertEqual(encoded['format'], COMPACT_FORMAT)
+        response = self.client.generic(
+            'POST', self.url(self.chart, 'save_flow/'), json.dumps(encoded), content_type=self.MEDIA_TYPE
+        )
+        self.assertEqual(response.status_code, 200)
+        self.chart.refresh_from_db()
+        self.assertEqual(hash_flow_chart(self.chart), hash_flow_payload(document))
+
+    def test_malformed_compact_body_is_a_400(self):
+        for body in ({'format': 'other/1'}, {**encode_flow(flow_doc(2)), 'nodes': {'id': 'n0'}}):
+            response = self.client.generic(
+                'POST', self.url(self.chart, 'save_flow/'), json.dumps(body), content_type=self.MEDIA_TYPE
+            )
+            self.assertEqual(response.status_code, 400)
+
+
+class FlowSearchTests(FlowAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.charts = []
+        for owner, name in ((self.user, 'Checkout'), (self.user, 'Invoices'), (self.other, 'Theirs')):
+            document = flow_doc(3)
+            document['nodes'][1]['data'] = {'label': 'Billing service', 'meta': {'team': 'Payments'}}
+            document['edges'][0]['label'] = 'calls billing'
+            client = APIClient()
+            client.force_authenticate(owner)
+            flow_chart = FlowChart.objects.create(name=name, owner=owner)
+            client.post(self.url(flow_chart, 'save_flow/'), document, format='json')
+            self.charts.append(flow_chart)
+
+    def search(self, query):
+        return self.client.get('/api/flow/api/flowcharts/search/', {'q': query}).json()['results']
+
+    def test_prefix_matches_in_nodes_and_edges_of_own_charts(self):
+        results = self.search('bill')
+        self.assertEqual(sorted(result['name'] for result in results), ['Checkout', 'Invoices'])
+        self.assertEqual(
+            sorted((match['kind'], match['id'], match['label']) for match in results[0]['matches']),
+            [('edge', 'e0', 'calls billing'), ('node', 'n1', 'Billing service')],
+        )
+
+    def test_nested_values_match_and_index_follows_edits(self):
+        self.assertEqual(len(self.search('payments')), 2)
+        Node.objects.filter(flow_chart=self.charts[0], node_id='n1').update(data={'label': 'Shipping'})
+        self.assertEqual([result['name'] for result in self.search('payments')], ['Invoices'])
+
+    def test_every_term_must_match_and_keys_are_not_text(self):
+        self.assertEqual(len(self.search('billing service')), 2)
+        self.assertEqual(self.search('billing shipping'), [])
+        self.assertEqual(self.search('label'), [])
+        self.assertEqual(self.search('"*'), [])
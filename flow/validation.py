@@ -0,0 +1,172 @@
+# validation.py
+"""
+Validators for React Flow payloads.
+
+The schema below is compiled once, at import, into plain nested closures.
+Validating a payload is then a single walk over the data that collects every
+problem with its JSON path instead of stopping at the first one. Unknown
+keys are ignored: React Flow adds UI state (selected, dragging, measured...)
+that the backend does not store.
+"""
+import math
+
+
+def number(path, value, errors):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        errors.append((path, 'must be a finite number'))
+
+
+def positive_integer(path, value, errors):
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        errors.append((path, 'must be a positive integer'))
+
+
+def boolean(path, value, errors):
+    if not isinstance(value, bool):
+        errors.append((path, 'must be a boolean'))
+
+
+def json_object(path, value, errors):
+    if not isinstance(value, dict):
+        errors.append((path, 'must be an object'))
+
+
+def string(max_length=None, allow_blank=True):
+    def check(path, value, errors):
+        if not isinstance(value, str):
+            errors.append((path, 'must be a string'))
+        elif not allow_blank and not value:
+            errors.append((path, 'must not be blank'))
+        elif max_length is not None and len(value) > max_length:
+            errors.append((path, f'must be at most {max_length} characters'))
+    return check
+
+
+def nullable(check):
+    def nullable_check(path, value, errors):
+        if value is not None:
+            check(path, value, errors)
+    return nullable_check
+
+
+def obj(required=None, optional=None):
+    required = list((required or {}).items())
+    optional = list((optional or {}).items())
+
+    def check(path, value, errors):
+        if not isinstance(value, dict):
+            errors.append((path, 'must be an object'))
+            return
+        for key, field_check in required:
+            if key not in value:
+                errors.append((f'{path}.{key}', 'is required'))
+            else:
+                field_check(f'{path}.{key}', value[key], errors)
+        for key, field_check in optional:
+            if key in value:
+                field_check(f'{path}.{key}', value[key], errors)
+    return check
+
+
+# Field limits mirror flow.models
+check_node = obj(
+    required={
+        'id': string(max_length=100, allow_blank=False),
+        'position': obj(required={'x': number, 'y': number}),
+    },
+    optional={
+        'type': string(max_length=50, allow_blank=False),
+        'data': json_object,
+        'style': json_object,
+        'width': nullable(number),
+        'height': nullable(number),
+        'draggable': boolean,
+        'selectable': boolean,
+        'deletable': boolean,
+    },
+)
+
+check_edge = obj(
+    required={
+        'id': string(max_length=100, allow_blank=False),
+        'source': string(max_length=100, allow_blank=False),
+        'target': string(max_length=100, allow_blank=False),
+    },
+    optional={
+        'type': string(max_length=50, allow_blank=False),
+        'sourceHandle': nullable(string(max_length=100)),
+        'targetHandle': nullable(string(max_length=100)),
+        'data': json_object,
+        'style': json_object,
+        'label': string(max_length=200),
+        'labelStyle': json_object,
+        'animated': boolean,
+        'deletable': boolean,
+    },
+)
+
+_check_envelope = obj(optional={
+    'viewport': json_object,
+    'flowSettings': json_object,
+    'changeDescription': string(),
+    'baseVersion': nullable(positive_integer),
+})
+
+
+def validate_flow_payload(data):
+    """Return a list of {'path', 'message'} problems (empty if the payload is valid).
+
+    Also enforces what the schema alone cannot: unique node and edge ids,
+    and edges that point at nodes present in the same payload.
+    """
+    errors = []
+    _check_envelope('$', data, errors)
+    if not isinstance(data, dict):
+        return [{'path': path, 'message': message} for path, message in errors]
+
+    nodes = data.get('nodes', [])
+    edges = data.get('edges', [])
+
+    node_ids = set()
+    if not isinstance(nodes, list):
+        errors.append(('$.nodes', 'must be a list'))
+    else:
+        for i, node in enumerate(nodes):
+            path = f'$.nodes[{i}]'
+            check_node(path, node, errors)
+            if not isinstance(node, dict) or not isinstance(node.get('id'), str):
+                continue
+            if node['id'] in node_ids:
+                errors.append((f'{path}.id', f"duplicates node id '{node['id']}'"))
+            node_ids.add(node['id'])
+
+    if not isinstance(edges, list):
+        errors.append(('$.edges', 'must be a list'))
+    else:
+        edge_ids = set()
+        for i, edge in enumerate(edges):
+            path = f'$.edges[{i}]'
+            check_edge(path, edge, errors)
+            if not isinstance(edge, dict):
+                continue
+            if isinstance(edge.get('id'), str):
+                if edge['id'] in edge_ids:
+                    errors.append((f'{path}.id', f"duplicates edge id '{edge['id']}'"))
+                edge_ids.add(edge['id'])
+            for end in ('source', 'target'):
+                if isinstance(edge.get(end), str) and edge[end] not in node_ids:
+                    errors.append((f'{path}.{end}', f"points at unknown node '{edge[end]}'"))
+
+    return [{'path': path, 'message': message} for path, message in errors]
+
+
+def validate_node(node, path='$.node'):
+    errors = []
+    check_node(path, node, errors)
+    return [{'path': p, 'message': message} for p, message in errors]
+
+
+def validate_edge(edge, path='$.edge'):
+    errors = []
+    check_edge(path, edge, errors)
+    return [{'path': p, 'message': message} for p, message in errors]
@@ -0,0 +1,51 @@
+# rolwebsite/background.py
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BACKGROUND_WORKERS,
+            thread_name_prefix='background',
+        )
+    return _executor
+
+
+def _call(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', getattr(func, '__name__', func))
+
+
+def _run(func, args, kwargs):
+    # Worker threads own their connections; drop stale ones around each task
+    close_old_connections()
+    try:
+        _call(func, args, kwargs)
+    finally:
+        close_old_connections()
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    Run func in the process-wide worker pool once the current transaction
+    commits (immediately if there is none). Used for derived artefacts such
+    as thumbnails, which must never slow down or fail the request itself.
+    """
+    def submit():
+        if settings.BACKGROUND_TASKS_EAGER:
+            _call(func, args, kwargs)
+        else:
+            _get_executor().submit(_run, func, args, kwargs)
+
+    transaction.on_commit(submit)
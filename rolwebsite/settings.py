@@ -30,6 +30,7 @@ else:
     ALLOWED_HOSTS = ['localhost', '127.0.0.1', '192.168.1.48']
 
 INSTALLED_APPS = [
+    'daphne',  # ASGI runserver so WebSockets work in development
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -87,6 +88,38 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'rolwebsite.wsgi.application'
+ASGI_APPLICATION = 'rolwebsite.asgi.application'
+
+# Channel layer for WebSocket broadcasts (flow live editing)
+if PRODUCTION:
+    # Several ASGI workers must share one layer, or live edits only reach
+    # editors connected to the same worker
+    if not os.getenv('CHANNEL_REDIS_URL'):
+        raise ValueError("CHANNEL_REDIS_URL environment variable is required in production")
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [os.getenv('CHANNEL_REDIS_URL')],
+            },
+        },
+    }
+else:
+    # Single-process only: fine for local development and tests
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
+
+# Live flow edits are coalesced and written in batches
+FLOW_WS_FLUSH_INTERVAL = float(os.getenv('FLOW_WS_FLUSH_INTERVAL', '1.0'))  # seconds
+FLOW_WS_FLUSH_MAX_OPS = int(os.getenv('FLOW_WS_FLUSH_MAX_OPS', '500'))
+
+# Limits on zip archives uploaded to the flow bulk import (uncompressed sizes)
+FLOW_IMPORT_MAX_FILES = int(os.getenv('FLOW_IMPORT_MAX_FILES', '1000'))
+FLOW_IMPORT_MAX_FILE_SIZE = int(os.getenv('FLOW_IMPORT_MAX_FILE_SIZE', str(20 * 1024 * 1024)))  # 20MB
+FLOW_IMPORT_MAX_TOTAL_SIZE = int(os.getenv('FLOW_IMPORT_MAX_TOTAL_SIZE', str(200 * 1024 * 1024)))  # 200MB
 
 # Database configuration
 if PRODUCTION:
@@ -205,6 +238,10 @@ else:
     SECURE_CONTENT_TYPE_NOSNIFF = True
     SECURE_CROSS_ORIGIN_OPENER_POLICY = "same-origin"
 
+# In-process worker pool for derived artefacts (thumbnails, exports)
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', '2'))
+BACKGROUND_TASKS_EAGER = os.getenv('BACKGROUND_TASKS_EAGER', 'False') == 'True'
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -14,6 +14,7 @@ urlpatterns = [
     path('api/account/', include("account.api.urls")),  # Changed: added 'api/' prefix and trailing slash
     path('api/blog/', include("blog.api.urls")),  # Changed: added 'api/' prefix and trailing slash
     path('api/flow/', include("flow.api.urls")),
+    path('api/spectacle/', include("spectacle.api.urls")),
 
     # Web interface endpoints
     path('account/', include("account.urls", namespace='account')),
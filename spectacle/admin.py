@@ -1,5 +1,6 @@
 # admin.py
 from django.contrib import admin
+from django.db.models import Count
 from .models import Presentation, Slide, SlideElement, PresentationTemplate
 
 
@@ -41,6 +42,9 @@ class PresentationAdmin(admin.ModelAdmin):
         })
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('author').annotate(slide_count=Count('slides'))
+
     def save_model(self, request, obj, form, change):
         if not change:  # If creating new object
             obj.author = request.user
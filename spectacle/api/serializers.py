@@ -20,6 +20,23 @@ class SlideElementSerializer(serializers.ModelSerializer):
             'background_color', 'border_style', 'animation',
             'animation_delay', 'properties'
         ]
+        # Omit order to append, or place with after/before (see the views)
+        extra_kwargs = {'order': {'required': False}}
+
+
+class SlideElementUpdateSerializer(SlideElementSerializer):
+    """An element update inside a batch: id plus any fields to change"""
+    id = serializers.IntegerField()
+
+    class Meta(SlideElementSerializer.Meta):
+        extra_kwargs = {name: {'required': False} for name in SlideElementSerializer.Meta.fields}
+
+
+class SlideElementBatchSerializer(serializers.Serializer):
+    """Element creates, updates and deletes applied to one slide together"""
+    create = SlideElementSerializer(many=True, default=list)
+    update = SlideElementUpdateSerializer(many=True, default=list)
+    delete = serializers.ListField(child=serializers.IntegerField(), default=list)
 
 
 class SlideSerializer(serializers.ModelSerializer):
@@ -31,7 +48,7 @@ class SlideSerializer(serializers.ModelSerializer):
             'id', 'slide_type', 'order', 'title', 'content', 'subtitle',
             'background_color', 'background_image', 'text_color',
             'font_size', 'text_align', 'transition', 'animation',
-            'custom_css', 'layout_config', 'notes', 'elements',
+            'custom_css', 'layout_config', 'notes', 'thumbnail', 'elements',
             'created_at', 'updated_at'
         ]
 
@@ -47,6 +64,8 @@ class SlideCreateUpdateSerializer(serializers.ModelSerializer):
             'font_size', 'text_align', 'transition', 'animation',
             'custom_css', 'layout_config', 'notes'
         ]
+        # Omit order to append, or place with after/before (see the views)
+        extra_kwargs = {'order': {'required': False}}
 
 
 class PresentationListSerializer(serializers.ModelSerializer):
@@ -117,79 +136,32 @@ class PresentationCloneSerializer(serializers.Serializer):
     clone_elements = serializers.BooleanField(default=True)
 
 
+class SlideOrderSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    order = serializers.IntegerField(min_value=0, max_value=2147483647)
+
+
 class BulkSlideUpdateSerializer(serializers.Serializer):
     """Serializer for bulk updating slide orders"""
-    slides = serializers.ListField(
-        child=serializers.DictField(
-            child=serializers.IntegerField()
-        )
-    )
-
-    def validate_slides(self, value):
-        """Ensure slide data is valid"""
-        for slide_data in value:
-            if 'id' not in slide_data or 'order' not in slide_data:
-                raise serializers.ValidationError(
-                    "Each slide must have 'id' and 'order' fields"
-                )
-        return value
-
-
-class PresentationExportSerializer(serializers.ModelSerializer):
-    """Serializer for exporting presentations in Spectacle format"""
-    author = UserSerializer(read_only=True)
-    slides = SlideSerializer(many=True, read_only=True)
+    slides = SlideOrderSerializer(many=True)
 
-    class Meta:
-        model = Presentation
-        fields = [
-            'id', 'title', 'description', 'author', 'theme', 'template',
-            'transition', 'background_color', 'text_color', 'tags',
-            'slides', 'created_at', 'updated_at'
-        ]
 
-    def to_representation(self, instance):
-        """Convert to Spectacle-compatible format"""
-        data = super().to_representation(instance)
-
-        # Transform to Spectacle format
-        spectacle_data = {
-            'metadata': {
-                'title': data['title'],
-                'description': data['description'],
-                'author': data['author']['username'] if data['author'] else '',
-                'theme': data['theme'],
-                'template': data['template'],
-                'transition': data['transition'],
-                'backgroundColor': data['background_color'],
-                'textColor': data['text_color'],
-                'tags': data['tags'],
-                'createdAt': data['created_at'],
-                'updatedAt': data['updated_at']
-            },
-            'slides': []
-        }
-
-        # Transform slides
-        for slide in data['slides']:
-            spectacle_slide = {
-                'id': slide['id'],
-                'type': slide['slide_type'],
-                'title': slide['title'],
-                'content': slide['content'],
-                'subtitle': slide['subtitle'],
-                'backgroundColor': slide['background_color'],
-                'backgroundImage': slide['background_image'],
-                'textColor': slide['text_color'],
-                'fontSize': slide['font_size'],
-                'textAlign': slide['text_align'],
-                'transition': slide['transition'],
-                'animation': slide['animation'],
-                'customCSS': slide['custom_css'],
-                'layoutConfig': slide['layout_config'],
-                'notes': slide['notes'],
-                'elements': slide['elements']
-            }
-            spectacle_data['slides'].append(spectacle_slide)
-
-        return spectacle_data
\ No newline at end of file
+class PlacementSerializer(serializers.Serializer):
+    """Where a new slide or element goes: right after or right before a sibling, else last"""
+    after = serializers.IntegerField(required=False, allow_null=True)
+    before = serializers.IntegerField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        anchors = {key: value for key, value in attrs.items() if value is not None}
+        if len(anchors) > 1:
+            raise serializers.ValidationError("Give at most one of 'after' or 'before'")
+        return anchors
+
+
+class MoveSerializer(PlacementSerializer):
+    """Place a slide or element right after or right before a sibling"""
+
+    def validate(self, attrs):
+        if sum(value is not None for value in attrs.values()) != 1:
+            raise serializers.ValidationError("Give exactly one of 'after' or 'before'")
+        return super().validate(attrs)
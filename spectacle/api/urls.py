@@ -2,9 +2,10 @@
 from django.urls import path
 from .views import (
     PresentationListCreateAPIView, PresentationDetailAPIView,
-    PresentationCloneAPIView, PresentationExportAPIView,
-    SlideListCreateAPIView, SlideDetailAPIView, SlideBulkUpdateAPIView,
-    SlideElementListCreateAPIView, SlideElementDetailAPIView,
+    PresentationCloneAPIView, PresentationExportAPIView, PresentationBundleAPIView,
+    SlideListCreateAPIView, SlideDetailAPIView, SlideBulkUpdateAPIView, SlideMoveAPIView,
+    SlideElementListCreateAPIView, SlideElementDetailAPIView, SlideElementMoveAPIView,
+    SlideElementBatchAPIView,
     PresentationTemplateListCreateAPIView
 )
 
@@ -28,6 +29,10 @@ urlpatterns = [
          PresentationExportAPIView.as_view(),
          name='presentation-export'),
 
+    path('presentations/<int:pk>/bundle/',
+         PresentationBundleAPIView.as_view(),
+         name='presentation-bundle'),
+
     # Slide endpoints
     path('presentations/<int:presentation_pk>/slides/',
          SlideListCreateAPIView.as_view(),
@@ -41,15 +46,27 @@ urlpatterns = [
          SlideBulkUpdateAPIView.as_view(),
          name='slide-bulk-update'),
 
+    path('presentations/<int:presentation_pk>/slides/<int:slide_pk>/move/',
+         SlideMoveAPIView.as_view(),
+         name='slide-move'),
+
     # Slide element endpoints
     path('presentations/<int:presentation_pk>/slides/<int:slide_pk>/elements/',
          SlideElementListCreateAPIView.as_view(),
          name='slide-element-list-create'),
 
+    path('presentations/<int:presentation_pk>/slides/<int:slide_pk>/elements/batch/',
+         SlideElementBatchAPIView.as_view(),
+         name='slide-element-batch'),
+
     path('presentations/<int:presentation_pk>/slides/<int:slide_pk>/elements/<int:element_pk>/',
          SlideElementDetailAPIView.as_view(),
          name='slide-element-detail'),
 
+    path('presentations/<int:presentation_pk>/slides/<int:slide_pk>/elements/<int:element_pk>/move/',
+         SlideElementMoveAPIView.as_view(),
+         name='slide-element-move'),
+
     # Template endpoints
     path('templates/',
          PresentationTemplateListCreateAPIView.as_view(),
@@ -57,26 +74,30 @@ urlpatterns = [
 ]
 
 # Example usage patterns:
-# GET /api/presentations/ - List all presentations
-# POST /api/presentations/ - Create new presentation
-# GET /api/presentations/1/ - Get specific presentation with all slides
-# PUT /api/presentations/1/ - Update presentation
-# DELETE /api/presentations/1/ - Delete presentation
-# POST /api/presentations/1/clone/ - Clone presentation
-# GET /api/presentations/1/export/ - Export in Spectacle format
-
-# GET /api/presentations/1/slides/ - List slides for presentation
-# POST /api/presentations/1/slides/ - Create new slide
-# GET /api/presentations/1/slides/1/ - Get specific slide
-# PUT /api/presentations/1/slides/1/ - Update slide
-# DELETE /api/presentations/1/slides/1/ - Delete slide
-# PUT /api/presentations/1/slides/bulk-update/ - Update slide orders
-
-# GET /api/presentations/1/slides/1/elements/ - List elements for slide
-# POST /api/presentations/1/slides/1/elements/ - Create new element
-# GET /api/presentations/1/slides/1/elements/1/ - Get specific element
-# PUT /api/presentations/1/slides/1/elements/1/ - Update element
-# DELETE /api/presentations/1/slides/1/elements/1/ - Delete element
-
-# GET /api/templates/ - List all templates
-# POST /api/templates/ - Create new template
\ No newline at end of file
+# GET /api/spectacle/presentations/ - List all presentations
+# POST /api/spectacle/presentations/ - Create new presentation
+# GET /api/spectacle/presentations/1/ - Get specific presentation with all slides
+# PUT /api/spectacle/presentations/1/ - Update presentation
+# DELETE /api/spectacle/presentations/1/ - Delete presentation
+# POST /api/spectacle/presentations/1/clone/ - Clone presentation
+# GET /api/spectacle/presentations/1/export/ - Export in Spectacle format
+# GET /api/spectacle/presentations/1/bundle/ - Static HTML deck as a zip (202 while it is being built)
+
+# GET /api/spectacle/presentations/1/slides/ - List slides for presentation
+# POST /api/spectacle/presentations/1/slides/ - Create new slide
+# GET /api/spectacle/presentations/1/slides/1/ - Get specific slide
+# PUT /api/spectacle/presentations/1/slides/1/ - Update slide
+# DELETE /api/spectacle/presentations/1/slides/1/ - Delete slide
+# PUT /api/spectacle/presentations/1/slides/bulk-update/ - Update slide orders
+# POST /api/spectacle/presentations/1/slides/1/move/ - Move slide after/before another ({"after": 3})
+
+# GET /api/spectacle/presentations/1/slides/1/elements/ - List elements for slide
+# POST /api/spectacle/presentations/1/slides/1/elements/ - Create new element
+# GET /api/spectacle/presentations/1/slides/1/elements/1/ - Get specific element
+# PUT /api/spectacle/presentations/1/slides/1/elements/1/ - Update element
+# DELETE /api/spectacle/presentations/1/slides/1/elements/1/ - Delete element
+# POST /api/spectacle/presentations/1/slides/1/elements/1/move/ - Move element after/before another
+# POST /api/spectacle/presentations/1/slides/1/elements/batch/ - {"create": [...], "update": [{"id": 1, ...}], "delete": [2]}
+
+# GET /api/spectacle/templates/ - List all templates
+# POST /api/spectacle/templates/ - Create new template
\ No newline at end of file
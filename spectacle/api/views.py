@@ -2,23 +2,71 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from django.shortcuts import get_object_or_404
-from django.db import transaction
-from django.http import Http404
-from django.db.models import Q
-
-from spectacle.models import Presentation, Slide, SlideElement, PresentationTemplate
+from rest_framework.pagination import CursorPagination
+from django.http import FileResponse
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db.models import Count, Q
+from django.utils.http import parse_etags
+
+from rolwebsite.background import run_in_background
+from spectacle.bundle import bundle_path, generate_bundle
+from spectacle.export import get_export, watermark
+from spectacle.models import Presentation, PresentationTag, PresentationTemplate
+from spectacle.permissions import PresentationAccessMixin, IsPresentationAuthorOrReadable
+from spectacle.search import search_presentations
+from spectacle.services import (
+    ReorderError, clone_presentation, reorder_slides, position_between, move, apply_element_batch
+)
+from spectacle.thumbnails import schedule_thumbnails
 from .serializers import (
     PresentationListSerializer, PresentationDetailSerializer,
     PresentationCreateUpdateSerializer, SlideSerializer,
     SlideCreateUpdateSerializer, SlideElementSerializer,
     PresentationTemplateSerializer, PresentationCloneSerializer,
-    BulkSlideUpdateSerializer, PresentationExportSerializer
+    BulkSlideUpdateSerializer, MoveSerializer, PlacementSerializer, SlideElementBatchSerializer
 )
 
 
+def presentation_list_queryset():
+    """Presentations with author and slide count fetched in the same query"""
+    return Presentation.objects.select_related('author').annotate(slide_count=Count('slides'))
+
+
+def presentation_detail_queryset():
+    """Presentations with author, slides and their elements loaded in three queries"""
+    return Presentation.objects.select_related('author').prefetch_related('slides__elements')
+
+
+def _with_etag(request, etag, build_response):
+    """Answer 304 if the client's If-None-Match matches, else build and tag the response"""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = build_response()
+    response['ETag'] = etag
+    return response
+
+
+def new_item_order(data, siblings):
+    """Order for a new slide/element: right after/before a sibling id, else last"""
+    placement = PlacementSerializer(data=data)
+    placement.is_valid(raise_exception=True)
+    return position_between(siblings, **placement.validated_data)
+
+
+class PresentationCursorPagination(CursorPagination):
+    """Keyset pagination on updated_at, served by the (is_public, updated_at)
+    and (author, updated_at) indexes"""
+    ordering = '-updated_at'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
 class PresentationListCreateAPIView(APIView):
     """List all presentations or create a new presentation"""
     permission_classes = [IsAuthenticated]
@@ -27,20 +75,16 @@ class PresentationListCreateAPIView(APIView):
     def get(self, request):
         # Filter presentations based on user permissions
         if request.user.is_authenticated:
-            presentations = Presentation.objects.filter(
+            presentations = presentation_list_queryset().filter(
                 Q(author=request.user) | Q(is_public=True)
             )
         else:
-            presentations = Presentation.objects.filter(is_public=True)
+            presentations = presentation_list_queryset().filter(is_public=True)
 
         # Optional filtering
         search = request.query_params.get('search', None)
         if search:
-            presentations = presentations.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search) |
-                Q(tags__icontains=search)
-            )
+            presentations = search_presentations(presentations, search)
 
         author_id = request.query_params.get('author', None)
         if author_id:
@@ -48,10 +92,14 @@ class PresentationListCreateAPIView(APIView):
 
         tag = request.query_params.get('tag', None)
         if tag:
-            presentations = presentations.filter(tags__contains=[tag])
+            presentations = presentations.filter(pk__in=PresentationTag.objects.filter(
+                name=PresentationTag.normalize(tag)
+            ).values('presentation_id'))
 
-        serializer = PresentationListSerializer(presentations, many=True)
-        return Response(serializer.data)
+        paginator = PresentationCursorPagination()
+        page = paginator.paginate_queryset(presentations, request, view=self)
+        serializer = PresentationListSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         serializer = PresentationCreateUpdateSerializer(
@@ -60,383 +108,309 @@ class PresentationListCreateAPIView(APIView):
         )
         if serializer.is_valid():
             presentation = serializer.save()
+            schedule_thumbnails(presentation.pk)
             detail_serializer = PresentationDetailSerializer(presentation)
             return Response(detail_serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class PresentationDetailAPIView(APIView):
+class PresentationDetailAPIView(PresentationAccessMixin, APIView):
     """Retrieve, update or delete a presentation"""
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsPresentationAuthorOrReadable]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
+    presentation_url_kwarg = 'pk'
 
-    def get_object(self, pk, user):
-        try:
-            presentation = Presentation.objects.get(pk=pk)
-            # Check permissions
-            if presentation.author != user and not presentation.is_public:
-                raise Http404
-            return presentation
-        except Presentation.DoesNotExist:
-            raise Http404
+    def get_presentation_queryset(self):
+        if self.request.method == 'DELETE':
+            return Presentation.objects.all()
+        return presentation_detail_queryset()
 
     def get(self, request, pk):
-        presentation = self.get_object(pk, request.user)
-        serializer = PresentationDetailSerializer(presentation)
+        serializer = PresentationDetailSerializer(self.get_presentation())
         return Response(serializer.data)
 
     def put(self, request, pk):
-        presentation = self.get_object(pk, request.user)
-        # Only author can update
-        if presentation.author != request.user:
-            return Response(
-                {"error": "Permission denied"},
-                status=status.HTTP_403_FORBIDDEN
-            )
-
         serializer = PresentationCreateUpdateSerializer(
-            presentation,
+            self.get_presentation(),
             data=request.data,
             context={'request': request}
         )
         if serializer.is_valid():
             presentation = serializer.save()
+            schedule_thumbnails(presentation.pk)
             detail_serializer = PresentationDetailSerializer(presentation)
             return Response(detail_serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, pk):
-        presentation = self.get_object(pk, request.user)
-        # Only author can delete
-        if presentation.author != request.user:
-            return Response(
-                {"error": "Permission denied"},
-                status=status.HTTP_403_FORBIDDEN
-            )
-
-        presentation.delete()
+        self.get_presentation().delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class PresentationCloneAPIView(APIView):
+class PresentationCloneAPIView(PresentationAccessMixin, APIView):
     """Clone an existing presentation"""
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsPresentationAuthorOrReadable]
+    presentation_url_kwarg = 'pk'
+    # Cloning only reads the original
+    read_methods = ('POST',)
 
     def post(self, request, pk):
-        try:
-            original = Presentation.objects.get(pk=pk)
-            # Check if user can access the presentation
-            if original.author != request.user and not original.is_public:
-                return Response(
-                    {"error": "Permission denied"},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-        except Presentation.DoesNotExist:
-            raise Http404
-
         serializer = PresentationCloneSerializer(data=request.data)
         if serializer.is_valid():
-            with transaction.atomic():
-                # Create new presentation
-                clone_data = serializer.validated_data
-                new_presentation = Presentation.objects.create(
-                    title=clone_data['title'],
-                    description=clone_data.get('description', original.description),
-                    author=request.user,
-                    is_public=clone_data.get('is_public', False),
-                    theme=original.theme,
-                    template=original.template,
-                    transition=original.transition,
-                    background_color=original.background_color,
-                    text_color=original.text_color,
-                    tags=original.tags.copy()
-                )
-
-                # Clone slides if requested
-                if clone_data.get('clone_slides', True):
-                    for slide in original.slides.all():
-                        new_slide = Slide.objects.create(
-                            presentation=new_presentation,
-                            slide_type=slide.slide_type,
-                            order=slide.order,
-                            title=slide.title,
-                            content=slide.content,
-                            subtitle=slide.subtitle,
-                            background_color=slide.background_color,
-                            text_color=slide.text_color,
-                            font_size=slide.font_size,
-                            text_align=slide.text_align,
-                            transition=slide.transition,
-                            animation=slide.animation,
-                            custom_css=slide.custom_css,
-                            layout_config=slide.layout_config.copy(),
-                            notes=slide.notes
-                        )
-
-                        # Clone elements if requested
-                        if clone_data.get('clone_elements', True):
-                            for element in slide.elements.all():
-                                SlideElement.objects.create(
-                                    slide=new_slide,
-                                    element_type=element.element_type,
-                                    order=element.order,
-                                    content=element.content,
-                                    alt_text=element.alt_text,
-                                    x_position=element.x_position,
-                                    y_position=element.y_position,
-                                    width=element.width,
-                                    height=element.height,
-                                    font_family=element.font_family,
-                                    font_size=element.font_size,
-                                    font_weight=element.font_weight,
-                                    color=element.color,
-                                    background_color=element.background_color,
-                                    border_style=element.border_style,
-                                    animation=element.animation,
-                                    animation_delay=element.animation_delay,
-                                    properties=element.properties.copy()
-                                )
-
-            detail_serializer = PresentationDetailSerializer(new_presentation)
+            clone_data = serializer.validated_data
+            new_presentation = clone_presentation(
+                self.get_presentation(),
+                request.user,
+                title=clone_data['title'],
+                description=clone_data.get('description'),
+                is_public=clone_data.get('is_public', False),
+                clone_slides=clone_data.get('clone_slides', True),
+                clone_elements=clone_data.get('clone_elements', True),
+            )
+            schedule_thumbnails(new_presentation.pk)
+
+            detail_serializer = PresentationDetailSerializer(
+                presentation_detail_queryset().get(pk=new_presentation.pk)
+            )
             return Response(detail_serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class PresentationExportAPIView(APIView):
+class PresentationExportAPIView(PresentationAccessMixin, APIView):
     """Export presentation in Spectacle format"""
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsPresentationAuthorOrReadable]
+    presentation_url_kwarg = 'pk'
+
+    def get_presentation_queryset(self):
+        # Only what the permission check and the cache key need
+        return Presentation.objects.only('author_id', 'is_public', 'updated_at')
 
     def get(self, request, pk):
-        try:
-            presentation = Presentation.objects.get(pk=pk)
-            # Check permissions
-            if presentation.author != request.user and not presentation.is_public:
-                return Response(
-                    {"error": "Permission denied"},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-        except Presentation.DoesNotExist:
-            raise Http404
-
-        serializer = PresentationExportSerializer(presentation)
-        return Response(serializer.data)
+        updated_at = self.get_presentation().updated_at
+        return _with_etag(
+            request,
+            f'"{pk}-{watermark(updated_at)}"',
+            lambda: Response(get_export(pk, updated_at)),
+        )
 
 
-class SlideListCreateAPIView(APIView):
-    """List slides for a presentation or create a new slide"""
-    permission_classes = [IsAuthenticated]
+class PresentationBundleAPIView(PresentationAccessMixin, APIView):
+    """Static HTML/JS bundle (zip) of the presentation, built in the background"""
+    permission_classes = [IsPresentationAuthorOrReadable]
+    presentation_url_kwarg = 'pk'
+
+    def get_presentation_queryset(self):
+        return Presentation.objects.only('author_id', 'is_public', 'updated_at')
 
-    def get_presentation(self, pk, user):
+    def get(self, request, pk):
+        revision = watermark(self.get_presentation().updated_at)
         try:
-            presentation = Presentation.objects.get(pk=pk)
-            if presentation.author != user and not presentation.is_public:
-                raise Http404
-            return presentation
-        except Presentation.DoesNotExist:
-            raise Http404
+            # Not built yet, or pruned because a newer revision just finished
+            file = default_storage.open(bundle_path(pk, revision))
+        except FileNotFoundError:
+            # Schedule each revision once, however often the client polls
+            if cache.add(f'spectacle-bundle-pending:{pk}:{revision}', True, 5 * 60):
+                run_in_background(generate_bundle, pk, revision)
+            response = Response({"status": "pending", "revision": revision}, status=status.HTTP_202_ACCEPTED)
+            response['Retry-After'] = '2'
+            return response
+
+        response = FileResponse(
+            file,
+            as_attachment=True,
+            filename=f'presentation-{pk}-r{revision}.zip',
+            content_type='application/zip',
+        )
+        if request.query_params.get('v') == str(revision):
+            response['Cache-Control'] = 'private, max-age=31536000, immutable'
+        else:
+            response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class SlideListCreateAPIView(PresentationAccessMixin, APIView):
+    """List slides for a presentation or create a new slide"""
+    permission_classes = [IsPresentationAuthorOrReadable]
 
     def get(self, request, presentation_pk):
-        presentation = self.get_presentation(presentation_pk, request.user)
-        slides = presentation.slides.all()
+        slides = self.get_presentation().slides.prefetch_related('elements')
         serializer = SlideSerializer(slides, many=True)
         return Response(serializer.data)
 
     def post(self, request, presentation_pk):
-        presentation = self.get_presentation(presentation_pk, request.user)
-        # Only author can add slides
-        if presentation.author != request.user:
-            return Response(
-                {"error": "Permission denied"},
-                status=status.HTTP_403_FORBIDDEN
-            )
-
+        presentation = self.get_presentation()
         serializer = SlideCreateUpdateSerializer(data=request.data)
         if serializer.is_valid():
-            slide = serializer.save(presentation=presentation)
+            extra = {}
+            if 'order' not in serializer.validated_data:
+                try:
+                    extra['order'] = new_item_order(request.data, presentation.slides.all())
+                except ValueError as e:
+                    return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            slide = serializer.save(presentation=presentation, **extra)
+            schedule_thumbnails(presentation.pk)
             detail_serializer = SlideSerializer(slide)
             return Response(detail_serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class SlideDetailAPIView(APIView):
+class SlideDetailAPIView(PresentationAccessMixin, APIView):
     """Retrieve, update or delete a slide"""
-    permission_classes = [IsAuthenticated]
-
-    def get_object(self, presentation_pk, slide_pk, user):
-        try:
-            slide = Slide.objects.select_related('presentation').get(
-                presentation_id=presentation_pk,
-                pk=slide_pk
-            )
-            if slide.presentation.author != user and not slide.presentation.is_public:
-                raise Http404
-            return slide
-        except Slide.DoesNotExist:
-            raise Http404
+    permission_classes = [IsPresentationAuthorOrReadable]
 
     def get(self, request, presentation_pk, slide_pk):
-        slide = self.get_object(presentation_pk, slide_pk, request.user)
-        serializer = SlideSerializer(slide)
+        serializer = SlideSerializer(self.get_slide(slide_pk))
         return Response(serializer.data)
 
     def put(self, request, presentation_pk, slide_pk):
-        slide = self.get_object(presentation_pk, slide_pk, request.user)
-        # Only author can update
-        if slide.presentation.author != request.user:
-            return Response(
-                {"error": "Permission denied"},
-                status=status.HTTP_403_FORBIDDEN
-            )
-
-        serializer = SlideCreateUpdateSerializer(slide, data=request.data)
+        serializer = SlideCreateUpdateSerializer(self.get_slide(slide_pk), data=request.data)
         if serializer.is_valid():
             slide = serializer.save()
+            schedule_thumbnails(slide.presentation_id)
             detail_serializer = SlideSerializer(slide)
             return Response(detail_serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, presentation_pk, slide_pk):
-        slide = self.get_object(presentation_pk, slide_pk, request.user)
-        # Only author can delete
-        if slide.presentation.author != request.user:
-            return Response(
-                {"error": "Permission denied"},
-                status=status.HTTP_403_FORBIDDEN
-            )
-
+        slide = self.get_slide(slide_pk)
         slide.delete()
+        schedule_thumbnails(slide.presentation_id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class SlideBulkUpdateAPIView(APIView):
+class SlideBulkUpdateAPIView(PresentationAccessMixin, APIView):
     """Bulk update slide orders"""
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsPresentationAuthorOrReadable]
 
     def put(self, request, presentation_pk):
-        try:
-            presentation = Presentation.objects.get(pk=presentation_pk)
-            if presentation.author != request.user:
-                return Response(
-                    {"error": "Permission denied"},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-        except Presentation.DoesNotExist:
-            raise Http404
-
+        presentation = self.get_presentation()
         serializer = BulkSlideUpdateSerializer(data=request.data)
         if serializer.is_valid():
-            with transaction.atomic():
-                slides_data = serializer.validated_data['slides']
-                for slide_data in slides_data:
-                    try:
-                        slide = Slide.objects.get(
-                            id=slide_data['id'],
-                            presentation=presentation
-                        )
-                        slide.order = slide_data['order']
-                        slide.save(update_fields=['order'])
-                    except Slide.DoesNotExist:
-                        return Response(
-                            {"error": f"Slide {slide_data['id']} not found"},
-                            status=status.HTTP_400_BAD_REQUEST
-                        )
+            orders = {}
+            for slide_data in serializer.validated_data['slides']:
+                if slide_data['id'] in orders:
+                    return Response(
+                        {"error": f"Slide {slide_data['id']} is listed more than once"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                orders[slide_data['id']] = slide_data['order']
+
+            try:
+                reorder_slides(presentation, orders)
+                schedule_thumbnails(presentation.pk)
+            except ReorderError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
             # Return updated slides
-            slides = presentation.slides.all()
+            slides = presentation.slides.prefetch_related('elements')
             serializer = SlideSerializer(slides, many=True)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class SlideElementListCreateAPIView(APIView):
-    """List elements for a slide or create a new element"""
-    permission_classes = [IsAuthenticated]
+class SlideMoveAPIView(PresentationAccessMixin, APIView):
+    """Move a slide right after or before another slide, rewriting only its own order"""
+    permission_classes = [IsPresentationAuthorOrReadable]
 
-    def get_slide(self, presentation_pk, slide_pk, user):
-        try:
-            slide = Slide.objects.select_related('presentation').get(
-                presentation_id=presentation_pk,
-                pk=slide_pk
-            )
-            if slide.presentation.author != user and not slide.presentation.is_public:
-                raise Http404
-            return slide
-        except Slide.DoesNotExist:
-            raise Http404
+    def post(self, request, presentation_pk, slide_pk):
+        slide = self.get_slide(slide_pk)
+        serializer = MoveSerializer(data=request.data)
+        if serializer.is_valid():
+            try:
+                move(slide, slide.presentation.slides.all(), **serializer.validated_data)
+                schedule_thumbnails(slide.presentation_id)
+            except ReorderError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(SlideSerializer(slide).data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class SlideElementListCreateAPIView(PresentationAccessMixin, APIView):
+    """List elements for a slide or create a new element"""
+    permission_classes = [IsPresentationAuthorOrReadable]
 
     def get(self, request, presentation_pk, slide_pk):
-        slide = self.get_slide(presentation_pk, slide_pk, request.user)
-        elements = slide.elements.all()
+        elements = self.get_slide(slide_pk).elements.all()
         serializer = SlideElementSerializer(elements, many=True)
         return Response(serializer.data)
 
     def post(self, request, presentation_pk, slide_pk):
-        slide = self.get_slide(presentation_pk, slide_pk, request.user)
-        # Only author can add elements
-        if slide.presentation.author != request.user:
-            return Response(
-                {"error": "Permission denied"},
-                status=status.HTTP_403_FORBIDDEN
-            )
-
+        slide = self.get_slide(slide_pk)
         serializer = SlideElementSerializer(data=request.data)
         if serializer.is_valid():
-            element = serializer.save(slide=slide)
+            extra = {}
+            if 'order' not in serializer.validated_data:
+                try:
+                    extra['order'] = new_item_order(request.data, slide.elements.all())
+                except ValueError as e:
+                    return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            serializer.save(slide=slide, **extra)
+            schedule_thumbnails(slide.presentation_id)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class SlideElementDetailAPIView(APIView):
-    """Retrieve, update or delete a slide element"""
-    permission_classes = [IsAuthenticated]
+class SlideElementBatchAPIView(PresentationAccessMixin, APIView):
+    """Create, update and delete many elements of a slide in one transaction"""
+    permission_classes = [IsPresentationAuthorOrReadable]
 
-    def get_object(self, presentation_pk, slide_pk, element_pk, user):
-        try:
-            element = SlideElement.objects.select_related('slide__presentation').get(
-                slide__presentation_id=presentation_pk,
-                slide_id=slide_pk,
-                pk=element_pk
-            )
-            if (element.slide.presentation.author != user and
-                    not element.slide.presentation.is_public):
-                raise Http404
-            return element
-        except SlideElement.DoesNotExist:
-            raise Http404
+    def post(self, request, presentation_pk, slide_pk):
+        slide = self.get_slide(slide_pk)
+        serializer = SlideElementBatchSerializer(data=request.data)
+        if serializer.is_valid():
+            try:
+                created = apply_element_batch(slide, **serializer.validated_data)
+            except ReorderError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            schedule_thumbnails(slide.presentation_id)
+            return Response({
+                "created": [element.pk for element in created],
+                "elements": SlideElementSerializer(slide.elements.all(), many=True).data,
+            })
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class SlideElementDetailAPIView(PresentationAccessMixin, APIView):
+    """Retrieve, update or delete a slide element"""
+    permission_classes = [IsPresentationAuthorOrReadable]
 
     def get(self, request, presentation_pk, slide_pk, element_pk):
-        element = self.get_object(presentation_pk, slide_pk, element_pk, request.user)
-        serializer = SlideElementSerializer(element)
+        serializer = SlideElementSerializer(self.get_element(slide_pk, element_pk))
         return Response(serializer.data)
 
     def put(self, request, presentation_pk, slide_pk, element_pk):
-        element = self.get_object(presentation_pk, slide_pk, element_pk, request.user)
-        # Only author can update
-        if element.slide.presentation.author != request.user:
-            return Response(
-                {"error": "Permission denied"},
-                status=status.HTTP_403_FORBIDDEN
-            )
-
+        element = self.get_element(slide_pk, element_pk)
         serializer = SlideElementSerializer(element, data=request.data)
         if serializer.is_valid():
             serializer.save()
+            schedule_thumbnails(element.slide.presentation_id)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, presentation_pk, slide_pk, element_pk):
-        element = self.get_object(presentation_pk, slide_pk, element_pk, request.user)
-        # Only author can delete
-        if element.slide.presentation.author != request.user:
-            return Response(
-                {"error": "Permission denied"},
-                status=status.HTTP_403_FORBIDDEN
-            )
-
+        element = self.get_element(slide_pk, element_pk)
         element.delete()
+        schedule_thumbnails(element.slide.presentation_id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class SlideElementMoveAPIView(PresentationAccessMixin, APIView):
+    """Move an element right after or before another element of the same slide"""
+    permission_classes = [IsPresentationAuthorOrReadable]
+
+    def post(self, request, presentation_pk, slide_pk, element_pk):
+        element = self.get_element(slide_pk, element_pk)
+        serializer = MoveSerializer(data=request.data)
+        if serializer.is_valid():
+            try:
+                move(element, element.slide.elements.all(), **serializer.validated_data)
+                schedule_thumbnails(element.slide.presentation_id)
+            except ReorderError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(SlideElementSerializer(element).data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
 class PresentationTemplateListCreateAPIView(APIView):
     """List all templates or create a new template"""
     permission_classes = [IsAuthenticated]
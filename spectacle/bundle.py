@@ -0,0 +1,263 @@
+# bundle.py
+"""
+Self-contained HTML/JS bundle of a presentation.
+
+The zip holds index.html (deck JSON, CSS and a small player, all inline, so
+it works from file:// or any static host) and assets/ with every image the
+deck references from the author's own media files, renamed to a content
+hash. Bundles are
+stored per revision (the tree-wide updated_at watermark) and built by the
+background worker.
+"""
+import copy
+import hmac
+import io
+import json
+import os
+import posixpath
+import zipfile
+from hashlib import sha256
+from html import escape
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+
+from spectacle.export import get_export, watermark
+from spectacle.models import Presentation, Slide
+
+# Spectacle's default slide size; element positions are pixels on this stage
+STAGE_WIDTH = 1366
+STAGE_HEIGHT = 768
+
+PLAYER_CSS = f"""
+html, body {{ margin: 0; height: 100%; background: #000; overflow: hidden; font-family: sans-serif; }}
+#stage {{ position: absolute; left: 50%; top: 50%; width: {STAGE_WIDTH}px; height: {STAGE_HEIGHT}px;
+  transform-origin: center; background-size: cover; background-position: center; }}
+#stage .slide-body {{ padding: 48px 64px; box-sizing: border-box; white-space: pre-wrap; }}
+#stage h1 {{ margin: 0 0 16px; }}
+#stage .element {{ position: absolute; box-sizing: border-box; overflow: hidden; white-space: pre-wrap; }}
+#stage .element img {{ width: 100%; height: 100%; object-fit: contain; }}
+#counter {{ position: fixed; right: 12px; bottom: 8px; color: #888; font-size: 12px; }}
+"""
+
+PLAYER_JS = f"""
+(function () {{
+  var deck = JSON.parse(document.getElementById('deck').textContent);
+  var meta = deck.metadata, slides = deck.slides;
+  var stage = document.getElementById('stage'), counter = document.getElementById('counter');
+  var slideCss = document.getElementById('slide-css');
+  var current = 0;
+
+  function fit() {{
+    var scale = Math.min(window.innerWidth / {STAGE_WIDTH}, window.innerHeight / {STAGE_HEIGHT});
+    stage.style.transform = 'translate(-50%, -50%) scale(' + scale + ')';
+  }}
+
+  function text(tag, className, value) {{
+    var node = document.createElement(tag);
+    if (className) node.className = className;
+    node.textContent = value || '';
+    return node;
+  }}
+
+  function element(data) {{
+    var node;
+    if (data.element_type === 'image') {{
+      node = document.createElement('div');
+      var img = document.createElement('img');
+      img.src = data.content;
+      img.alt = data.alt_text || '';
+      node.appendChild(img);
+    }} else if (data.element_type === 'code') {{
+      node = document.createElement('pre');
+      node.appendChild(text('code', '', data.content));
+    }} else {{
+      node = text('div', '', data.content);
+    }}
+    node.classList.add('element', 'element-' + data.element_type);
+    var style = node.style;
+    style.left = data.x_position + 'px';
+    style.top = data.y_position + 'px';
+    style.width = data.width + 'px';
+    style.height = data.height + 'px';
+    if (data.font_family) style.fontFamily = data.font_family;
+    if (data.font_size) style.fontSize = data.font_size;
+    if (data.font_weight) style.fontWeight = data.font_weight;
+    if (data.color) style.color = data.color;
+    if (data.background_color) style.backgroundColor = data.background_color;
+    if (data.border_style) style.border = data.border_style;
+    return node;
+  }}
+
+  function show(index) {{
+    if (!slides.length) return;
+    current = Math.max(0, Math.min(slides.length - 1, index));
+    var slide = slides[current];
+    stage.innerHTML = '';
+    stage.style.backgroundColor = slide.backgroundColor || meta.backgroundColor;
+    stage.style.backgroundImage = slide.backgroundImage ? 'url("' + slide.backgroundImage + '")' : 'none';
+    stage.style.color = slide.textColor || meta.textColor;
+    stage.style.textAlign = slide.textAlign || 'left';
+    stage.style.fontSize = slide.fontSize || '';
+    slideCss.textContent = slide.customCSS || '';
+
+    var body = document.createElement('div');
+    body.className = 'slide-body slide-' + slide.type;
+    if (slide.title) body.appendChild(text('h1', '', slide.title));
+    if (slide.subtitle) body.appendChild(text('h2', '', slide.subtitle));
+    if (slide.content) body.appendChild(text('div', 'content', slide.content));
+    stage.appendChild(body);
+    slide.elements.forEach(function (data) {{ stage.appendChild(element(data)); }});
+
+    counter.textContent = (current + 1) + ' / ' + slides.length;
+    if (location.hash !== '#' + (current + 1)) history.replaceState(null, '', '#' + (current + 1));
+  }}
+
+  document.addEventListener('keydown', function (event) {{
+    if (['ArrowRight', 'PageDown', ' '].indexOf(event.key) >= 0) show(current + 1);
+    else if (['ArrowLeft', 'PageUp'].indexOf(event.key) >= 0) show(current - 1);
+    else if (event.key === 'Home') show(0);
+    else if (event.key === 'End') show(slides.length - 1);
+  }});
+  stage.addEventListener('click', function () {{ show(current + 1); }});
+  window.addEventListener('resize', fit);
+  fit();
+  show((parseInt(location.hash.slice(1), 10) || 1) - 1);
+}})();
+"""
+
+
+def bundle_path(presentation_id, revision):
+    # Keyed so the file name is not guessable from the presentation id alone
+    token = hmac.new(settings.SECRET_KEY.encode(), f'deck:{presentation_id}:{revision}'.encode(), sha256).hexdigest()[:16]
+    return f'spectacle_bundles/{presentation_id}/r{revision}-{token}.zip'
+
+
+def _media_name(url):
+    """Storage name behind a media URL, or None for other URLs and for
+    names that leave the media root (e.g. /media/../manage.py)"""
+    if not url or not url.startswith(settings.MEDIA_URL):
+        return None
+    name = posixpath.normpath(unquote(url[len(settings.MEDIA_URL):]))
+    if name in ('.', '..') or name.startswith(('../', '/')):
+        return None
+    return name
+
+
+def _authored_media(author_id, names):
+    """The names among `names` that are images on the author's own decks"""
+    if not names:
+        return set()
+    owned = set(Presentation.objects.filter(author_id=author_id, thumbnail__in=names).values_list(
+        'thumbnail', flat=True
+    ))
+    for background, thumbnail in Slide.objects.filter(
+        Q(background_image__in=names) | Q(thumbnail__in=names), presentation__author_id=author_id
+    ).values_list('background_image', 'thumbnail'):
+        owned.update((background, thumbnail))
+    return owned & names
+
+
+class _Assets:
+    """Copies media files into the bundle under content-hash names"""
+
+    def __init__(self, archive, allowed):
+        self.archive = archive
+        self.allowed = allowed
+        self.names = {}
+
+    def add(self, url):
+        """Bundle-relative path for an allowed media URL; other URLs are left as they are"""
+        name = _media_name(url)
+        if name not in self.allowed:
+            return url
+        if name not in self.names:
+            try:
+                with default_storage.open(name) as source:
+                    content = source.read()
+            except (SuspiciousFileOperation, OSError):
+                # Missing or outside the media root: keep linking to it
+                self.names[name] = None
+            else:
+                path = f'assets/{sha256(content).hexdigest()[:16]}{os.path.splitext(name)[1].lower()}'
+                if path not in self.archive.namelist():
+                    self.archive.writestr(path, content)
+                self.names[name] = path
+        return self.names[name] or url
+
+
+def _index_html(deck):
+    # '<' is escaped so slide text can never close the script element
+    deck_json = json.dumps(deck, separators=(',', ':')).replace('<', '\\u003c')
+    return (
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">'
+        f'<title>{escape(deck["metadata"]["title"])}</title>'
+        f'<style>{PLAYER_CSS}</style><style id="slide-css"></style></head>'
+        '<body><div id="stage"></div><div id="counter"></div>'
+        f'<script type="application/json" id="deck">{deck_json}</script>'
+        f'<script>{PLAYER_JS}</script></body></html>\n'
+    )
+
+
+def build_bundle(presentation_id, updated_at):
+    """Zip bytes of the static deck, or None if the presentation is gone"""
+    deck = get_export(presentation_id, updated_at)
+    if deck is None:
+        return None
+    # Asset paths are rewritten in place; keep the cached export intact
+    deck = copy.deepcopy(deck)
+
+    # Only files on the author's own decks are copied in, so a URL typed into
+    # an image element cannot pull someone else's upload into the zip
+    images = [slide['backgroundImage'] for slide in deck['slides']] + [
+        element['content'] for slide in deck['slides'] for element in slide['elements']
+        if element['element_type'] == 'image'
+    ]
+    author_id = Presentation.objects.filter(pk=presentation_id).values_list('author_id', flat=True).first()
+    allowed = _authored_media(author_id, {_media_name(url) for url in images} - {None})
+
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        assets = _Assets(archive, allowed)
+        for slide in deck['slides']:
+            slide['backgroundImage'] = assets.add(slide['backgroundImage'])
+            for element in slide['elements']:
+                if element['element_type'] == 'image':
+                    element['content'] = assets.add(element['content'])
+        archive.writestr('index.html', _index_html(deck))
+    return output.getvalue()
+
+
+def _prune_old_revisions(presentation_id, keep):
+    directory = f'spectacle_bundles/{presentation_id}'
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in files:
+        path = f'{directory}/{name}'
+        if path != keep:
+            default_storage.delete(path)
+
+
+def generate_bundle(presentation_id, revision=None):
+    """Build and store the bundle for the presentation's current revision"""
+    updated_at = Presentation.objects.filter(pk=presentation_id).values_list('updated_at', flat=True).first()
+    if updated_at is None or (revision is not None and revision != watermark(updated_at)):
+        # Deleted, or edited since; the next request schedules the new revision
+        return None
+
+    path = bundle_path(presentation_id, watermark(updated_at))
+    if not default_storage.exists(path):
+        content = build_bundle(presentation_id, updated_at)
+        if content is None:
+            return None
+        default_storage.save(path, ContentFile(content))
+
+    _prune_old_revisions(presentation_id, keep=path)
+    return path
@@ -0,0 +1,101 @@
+# export.py
+from django.core.cache import cache
+from rest_framework.fields import DateTimeField
+
+from spectacle.api.serializers import SlideElementSerializer
+from spectacle.models import Presentation, Slide, SlideElement
+
+EXPORT_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+SLIDE_EXPORT_FIELDS = {
+    'id': 'id',
+    'type': 'slide_type',
+    'title': 'title',
+    'content': 'content',
+    'subtitle': 'subtitle',
+    'backgroundColor': 'background_color',
+    'backgroundImage': 'background_image',
+    'textColor': 'text_color',
+    'fontSize': 'font_size',
+    'textAlign': 'text_align',
+    'transition': 'transition',
+    'animation': 'animation',
+    'customCSS': 'custom_css',
+    'layoutConfig': 'layout_config',
+    'notes': 'notes',
+}
+
+# Elements keep the snake_case keys of the REST API
+ELEMENT_EXPORT_FIELDS = SlideElementSerializer.Meta.fields
+
+
+def watermark(updated_at):
+    """Integer microseconds of the tree-wide updated_at (see Presentation.touch)"""
+    return int(updated_at.timestamp() * 1e6)
+
+
+def _export_key(presentation_id, updated_at):
+    return f'spectacle-export:{presentation_id}:{watermark(updated_at)}'
+
+
+def build_export(presentation_id):
+    """Spectacle JSON for a presentation, built straight from value rows.
+
+    Three queries (presentation + author, slides, elements) and one pass over
+    the rows; no model instances or nested serializer output.
+    """
+    row = Presentation.objects.filter(pk=presentation_id).values(
+        'title', 'description', 'author__username', 'theme', 'template', 'transition',
+        'background_color', 'text_color', 'tags', 'created_at', 'updated_at',
+    ).first()
+    if row is None:
+        return None
+
+    to_datetime = DateTimeField().to_representation
+    background_storage = Slide._meta.get_field('background_image').storage
+
+    slides = []
+    slide_elements = {}
+    for slide in Slide.objects.filter(presentation_id=presentation_id).order_by('order').values(
+        *SLIDE_EXPORT_FIELDS.values()
+    ):
+        image = slide['background_image']
+        slide['background_image'] = background_storage.url(image) if image else None
+        exported = {key: slide[field] for key, field in SLIDE_EXPORT_FIELDS.items()}
+        exported['elements'] = slide_elements[slide['id']] = []
+        slides.append(exported)
+
+    if slides:
+        for element in SlideElement.objects.filter(slide__presentation_id=presentation_id).order_by(
+            'slide_id', 'order'
+        ).values('slide_id', *ELEMENT_EXPORT_FIELDS):
+            slide_elements[element.pop('slide_id')].append(element)
+
+    return {
+        'metadata': {
+            'title': row['title'],
+            'description': row['description'],
+            'author': row['author__username'] or '',
+            'theme': row['theme'],
+            'template': row['template'],
+            'transition': row['transition'],
+            'backgroundColor': row['background_color'],
+            'textColor': row['text_color'],
+            'tags': row['tags'],
+            'createdAt': to_datetime(row['created_at']),
+            'updatedAt': to_datetime(row['updated_at']),
+        },
+        'slides': slides,
+    }
+
+
+def get_export(presentation_id, updated_at):
+    """Cached build_export, keyed by id and watermark so any edit misses"""
+    key = _export_key(presentation_id, updated_at)
+    data = cache.get(key)
+    if data is None:
+        data = build_export(presentation_id)
+        # A concurrent edit may have moved the watermark; only cache what we asked for
+        if data is not None and data['metadata']['updatedAt'] == DateTimeField().to_representation(updated_at):
+            cache.set(key, data, EXPORT_CACHE_TIMEOUT)
+    return data
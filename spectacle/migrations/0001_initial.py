@@ -0,0 +1,112 @@
+# Generated by Django 5.2 on 2026-10-19 13:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Presentation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_public', models.BooleanField(default=False)),
+                ('theme', models.CharField(default='default', max_length=50)),
+                ('template', models.CharField(default='default', max_length=50)),
+                ('transition', models.CharField(default='slide', max_length=50)),
+                ('background_color', models.CharField(default='#ffffff', max_length=7)),
+                ('text_color', models.CharField(default='#000000', max_length=7)),
+                ('tags', models.JSONField(blank=True, default=list)),
+                ('thumbnail', models.ImageField(blank=True, null=True, upload_to='presentation_thumbnails/')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='presentations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-updated_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PresentationTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('theme', models.CharField(default='default', max_length=50)),
+                ('background_color', models.CharField(default='#ffffff', max_length=7)),
+                ('text_color', models.CharField(default='#000000', max_length=7)),
+                ('font_family', models.CharField(default='Arial, sans-serif', max_length=100)),
+                ('structure', models.JSONField(default=dict)),
+                ('custom_css', models.TextField(blank=True)),
+                ('is_public', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='templates', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Slide',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slide_type', models.CharField(choices=[('title', 'Title Slide'), ('content', 'Content Slide'), ('image', 'Image Slide'), ('code', 'Code Slide'), ('quote', 'Quote Slide'), ('two_column', 'Two Column Slide'), ('list', 'List Slide'), ('custom', 'Custom Slide')], default='content', max_length=20)),
+                ('order', models.PositiveIntegerField()),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('content', models.TextField(blank=True)),
+                ('subtitle', models.CharField(blank=True, max_length=200)),
+                ('background_color', models.CharField(blank=True, max_length=7)),
+                ('background_image', models.ImageField(blank=True, null=True, upload_to='slide_backgrounds/')),
+                ('text_color', models.CharField(blank=True, max_length=7)),
+                ('font_size', models.CharField(blank=True, max_length=20)),
+                ('text_align', models.CharField(default='left', max_length=20)),
+                ('transition', models.CharField(blank=True, max_length=50)),
+                ('animation', models.CharField(blank=True, max_length=50)),
+                ('custom_css', models.TextField(blank=True)),
+                ('layout_config', models.JSONField(blank=True, default=dict)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('presentation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slides', to='spectacle.presentation')),
+            ],
+            options={
+                'ordering': ['order'],
+                'unique_together': {('presentation', 'order')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SlideElement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('element_type', models.CharField(choices=[('text', 'Text Block'), ('heading', 'Heading'), ('image', 'Image'), ('code', 'Code Block'), ('list', 'List'), ('link', 'Link'), ('video', 'Video'), ('chart', 'Chart'), ('shape', 'Shape')], max_length=20)),
+                ('order', models.PositiveIntegerField()),
+                ('content', models.TextField()),
+                ('alt_text', models.CharField(blank=True, max_length=200)),
+                ('x_position', models.FloatField(default=0)),
+                ('y_position', models.FloatField(default=0)),
+                ('width', models.FloatField(default=100)),
+                ('height', models.FloatField(default=50)),
+                ('font_family', models.CharField(blank=True, max_length=100)),
+                ('font_size', models.CharField(blank=True, max_length=20)),
+                ('font_weight', models.CharField(blank=True, max_length=20)),
+                ('color', models.CharField(blank=True, max_length=7)),
+                ('background_color', models.CharField(blank=True, max_length=7)),
+                ('border_style', models.CharField(blank=True, max_length=100)),
+                ('animation', models.CharField(blank=True, max_length=50)),
+                ('animation_delay', models.FloatField(default=0)),
+                ('properties', models.JSONField(blank=True, default=dict)),
+                ('slide', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='elements', to='spectacle.slide')),
+            ],
+            options={
+                'ordering': ['order'],
+                'unique_together': {('slide', 'order')},
+            },
+        ),
+    ]
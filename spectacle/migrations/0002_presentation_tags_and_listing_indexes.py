@@ -0,0 +1,56 @@
+# Generated by Django 5.2 on 2026-10-19 13:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_tags(apps, schema_editor):
+    Presentation = apps.get_model('spectacle', 'Presentation')
+    PresentationTag = apps.get_model('spectacle', 'PresentationTag')
+    rows = []
+    for presentation_id, tags in Presentation.objects.values_list('id', 'tags').iterator():
+        names = {tag.strip().lower()[:100] for tag in tags or [] if isinstance(tag, str)}
+        names.discard('')
+        rows.extend(PresentationTag(presentation_id=presentation_id, name=name) for name in names)
+    PresentationTag.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spectacle', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PresentationTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='presentation',
+            index=models.Index(fields=['is_public', 'updated_at'], name='spectacle_public_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='presentation',
+            index=models.Index(fields=['author', 'updated_at'], name='spectacle_author_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='presentationtag',
+            name='presentation',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_set', to='spectacle.presentation'),
+        ),
+        migrations.AddIndex(
+            model_name='presentationtag',
+            index=models.Index(fields=['name', 'presentation'], name='spectacle_tag_name_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='presentationtag',
+            unique_together={('presentation', 'name')},
+        ),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Full-text search over presentation titles and descriptions: a GIN
+# expression index on PostgreSQL, an FTS5 table kept in sync by triggers on
+# SQLite.
+
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    """CREATE INDEX spectacle_presentation_search_idx ON spectacle_presentation
+       USING gin (to_tsvector('simple', title || ' ' || coalesce(description, '')))""",
+]
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS spectacle_presentation_search_idx',
+]
+
+SQLITE_FORWARD = [
+    'CREATE VIRTUAL TABLE spectacle_presentation_fts USING fts5(title, description)',
+    '''CREATE TRIGGER spectacle_presentation_fts_insert AFTER INSERT ON spectacle_presentation BEGIN
+        INSERT INTO spectacle_presentation_fts(rowid, title, description)
+        VALUES (NEW.id, NEW.title, coalesce(NEW.description, ''));
+    END''',
+    '''CREATE TRIGGER spectacle_presentation_fts_update AFTER UPDATE OF title, description
+        ON spectacle_presentation BEGIN
+        DELETE FROM spectacle_presentation_fts WHERE rowid = OLD.id;
+        INSERT INTO spectacle_presentation_fts(rowid, title, description)
+        VALUES (NEW.id, NEW.title, coalesce(NEW.description, ''));
+    END''',
+    '''CREATE TRIGGER spectacle_presentation_fts_delete AFTER DELETE ON spectacle_presentation BEGIN
+        DELETE FROM spectacle_presentation_fts WHERE rowid = OLD.id;
+    END''',
+    '''INSERT INTO spectacle_presentation_fts(rowid, title, description)
+        SELECT id, title, coalesce(description, '') FROM spectacle_presentation''',
+]
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS spectacle_presentation_fts_insert',
+    'DROP TRIGGER IF EXISTS spectacle_presentation_fts_update',
+    'DROP TRIGGER IF EXISTS spectacle_presentation_fts_delete',
+    'DROP TABLE IF EXISTS spectacle_presentation_fts',
+]
+
+STATEMENTS = {
+    'postgresql': (POSTGRES_FORWARD, POSTGRES_BACKWARD),
+    'sqlite': (SQLITE_FORWARD, SQLITE_BACKWARD),
+}
+
+
+def _run(schema_editor, direction):
+    # Other backends fall back to icontains (see spectacle.search)
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements:
+        for sql in statements[direction]:
+            schema_editor.execute(sql)
+
+
+def forward(apps, schema_editor):
+    _run(schema_editor, 0)
+
+
+def backward(apps, schema_editor):
+    _run(schema_editor, 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spectacle', '0002_presentation_tags_and_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, backward),
+    ]
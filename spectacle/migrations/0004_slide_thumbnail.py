@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spectacle', '0003_presentation_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='slide',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='spectacle_thumbnails/'),
+        ),
+    ]
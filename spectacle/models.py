@@ -1,6 +1,8 @@
 # models.py
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
+import copy
 import json
 
 
@@ -25,14 +27,87 @@ class Presentation(models.Model):
 
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['is_public', 'updated_at'], name='spectacle_public_updated_idx'),
+            models.Index(fields=['author', 'updated_at'], name='spectacle_author_updated_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    # Tags as last loaded or synced (None: unknown), so saves that leave them
+    # alone skip the PresentationTag round trips
+    _synced_tags = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'tags' in field_names:
+            instance._synced_tags = copy.deepcopy(instance.tags)
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if (update_fields is None or 'tags' in update_fields) and self.tags != self._synced_tags:
+            self.sync_tags()
+
+    @classmethod
+    def touch(cls, **lookup):
+        """Bump updated_at without loading the row.
+
+        Slide and element writes call this, so updated_at is a watermark for
+        the whole tree and can key cached renderings (see spectacle.export).
+        """
+        cls.objects.filter(**lookup).update(updated_at=timezone.now())
+
+    def sync_tags(self):
+        """Mirror the tags JSON list into PresentationTag rows"""
+        names = {PresentationTag.normalize(tag) for tag in self.tags if isinstance(tag, str)}
+        names.discard('')
+        existing = set(self.tag_set.values_list('name', flat=True))
+        if existing - names:
+            self.tag_set.filter(name__in=existing - names).delete()
+        if names - existing:
+            PresentationTag.objects.bulk_create(
+                PresentationTag(presentation=self, name=name) for name in names - existing
+            )
+        self._synced_tags = copy.deepcopy(self.tags)
+
+    # Set by querysets annotated with slide_count=Count('slides')
+    _slide_count = None
+
     @property
     def slide_count(self):
+        if self._slide_count is not None:
+            return self._slide_count
+        if 'slides' in getattr(self, '_prefetched_objects_cache', {}):
+            return len(self.slides.all())
         return self.slides.count()
 
+    @slide_count.setter
+    def slide_count(self, value):
+        self._slide_count = value
+
+
+class PresentationTag(models.Model):
+    """Normalized copy of Presentation.tags so ?tag= filters can use an index"""
+    presentation = models.ForeignKey(Presentation, on_delete=models.CASCADE, related_name='tag_set')
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        unique_together = ['presentation', 'name']
+        indexes = [
+            models.Index(fields=['name', 'presentation'], name='spectacle_tag_name_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def normalize(tag):
+        return tag.strip().lower()[:100]
+
 
 class Slide(models.Model):
     SLIDE_TYPES = [
@@ -48,6 +123,7 @@ class Slide(models.Model):
 
     presentation = models.ForeignKey(Presentation, on_delete=models.CASCADE, related_name='slides')
     slide_type = models.CharField(max_length=20, choices=SLIDE_TYPES, default='content')
+    # Gap-based: inserts take the midpoint of their neighbours (see spectacle.services)
     order = models.PositiveIntegerField()
 
     # Content fields
@@ -73,6 +149,9 @@ class Slide(models.Model):
     # Speaker notes
     notes = models.TextField(blank=True)
 
+    # Generated preview, named by content hash (see spectacle.thumbnails)
+    thumbnail = models.ImageField(upload_to='spectacle_thumbnails/', blank=True, null=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -83,6 +162,15 @@ class Slide(models.Model):
     def __str__(self):
         return f"{self.presentation.title} - Slide {self.order}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        Presentation.touch(pk=self.presentation_id)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        Presentation.touch(pk=self.presentation_id)
+        return result
+
 
 class SlideElement(models.Model):
     """Individual elements within a slide (text blocks, images, code blocks, etc.)"""
@@ -100,6 +188,7 @@ class SlideElement(models.Model):
 
     slide = models.ForeignKey(Slide, on_delete=models.CASCADE, related_name='elements')
     element_type = models.CharField(max_length=20, choices=ELEMENT_TYPES)
+    # Gap-based, like Slide.order
     order = models.PositiveIntegerField()
 
     # Content
@@ -134,6 +223,15 @@ class SlideElement(models.Model):
     def __str__(self):
         return f"{self.slide} - {self.element_type} {self.order}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        Presentation.touch(slides=self.slide_id)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        Presentation.touch(slides=self.slide_id)
+        return result
+
 
 class PresentationTemplate(models.Model):
     """Reusable presentation templates"""
@@ -0,0 +1,82 @@
+# spectacle/permissions.py
+from django.http import Http404
+from rest_framework import permissions, status
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+
+from spectacle.models import Presentation, Slide, SlideElement
+
+
+class PresentationAccessMixin:
+    """
+    Resolves the presentation named in the URL once per request.
+
+    The permission check loads it through get_presentation(), and handlers
+    and nested slide/element lookups reuse the same instance, so the parent
+    chain is never fetched again to compare authors.
+    """
+    presentation_url_kwarg = 'presentation_pk'
+
+    def get_presentation_queryset(self):
+        return Presentation.objects.all()
+
+    def get_presentation(self):
+        if getattr(self, '_presentation', None) is None:
+            presentation = self.get_presentation_queryset().filter(
+                pk=self.kwargs[self.presentation_url_kwarg]
+            ).first()
+            if presentation is None:
+                raise Http404
+            self._presentation = presentation
+        return self._presentation
+
+    def get_slide(self, slide_pk):
+        """A slide of the resolved presentation, with .presentation already set"""
+        presentation = self.get_presentation()
+        slide = Slide.objects.filter(presentation_id=presentation.pk, pk=slide_pk).first()
+        if slide is None:
+            raise Http404
+        slide.presentation = presentation
+        return slide
+
+    def get_element(self, slide_pk, element_pk):
+        """An element of one of its slides, with .slide and .slide.presentation set"""
+        presentation = self.get_presentation()
+        element = SlideElement.objects.select_related('slide').filter(
+            slide__presentation_id=presentation.pk,
+            slide_id=slide_pk,
+            pk=element_pk
+        ).first()
+        if element is None:
+            raise Http404
+        element.slide.presentation = presentation
+        return element
+
+    def handle_exception(self, exc):
+        # Same body as the rest of the API for author-only actions
+        if isinstance(exc, PermissionDenied) and self.request.user.is_authenticated:
+            return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+        return super().handle_exception(exc)
+
+
+class IsPresentationAuthorOrReadable(permissions.BasePermission):
+    """
+    Access to the presentation of a PresentationAccessMixin view.
+    - anyone signed in can read a public presentation
+    - only the author can read a private one (others get a 404)
+    - only the author can write; views list write-free methods such as
+      clone's POST in read_methods
+    """
+
+    def has_permission(self, request, view):
+        if not request.user.is_authenticated:
+            return False
+
+        presentation = view.get_presentation()
+        is_author = presentation.author_id == request.user.id
+        if not is_author and not presentation.is_public:
+            raise Http404
+
+        if request.method in permissions.SAFE_METHODS or request.method in getattr(view, 'read_methods', ()):
+            return True
+        return is_author
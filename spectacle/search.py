@@ -0,0 +1,52 @@
+# search.py
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+from spectacle.models import PresentationTag
+
+SEARCH_MAX_TERMS = 8
+
+# Same expression as the GIN index in migration 0003, so PostgreSQL can use it
+POSTGRES_MATCH = (
+    "to_tsvector('simple', spectacle_presentation.title || ' ' || coalesce(spectacle_presentation.description, ''))"
+    " @@ to_tsquery('simple', %s)"
+)
+
+
+def search_terms(query):
+    """Words of the query (letters/digits only), lowercased"""
+    return re.findall(r'\w+', query.lower())[:SEARCH_MAX_TERMS]
+
+
+def search_presentations(queryset, query):
+    """Presentations whose title/description contain every term as a word
+    prefix, or that carry the whole query as a tag"""
+    terms = search_terms(query)
+    tagged = Q(pk__in=PresentationTag.objects.filter(
+        name=PresentationTag.normalize(query)
+    ).values('presentation_id'))
+    if not terms:
+        return queryset.filter(tagged)
+
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        return queryset.alias(
+            text_match=RawSQL(POSTGRES_MATCH, [tsquery], output_field=BooleanField())
+        ).filter(Q(text_match=True) | tagged)
+
+    if vendor == 'sqlite':
+        fts_query = ' '.join(f'"{term}"*' for term in terms)
+        matched = RawSQL(
+            'SELECT rowid FROM spectacle_presentation_fts WHERE spectacle_presentation_fts MATCH %s',
+            [fts_query],
+        )
+        return queryset.filter(Q(pk__in=matched) | tagged)
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(description__icontains=term)
+    return queryset.filter(condition | tagged)
@@ -0,0 +1,253 @@
+# services.py
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.fields.files import FieldFile
+
+from spectacle.models import Presentation, Slide, SlideElement
+
+BULK_BATCH_SIZE = 1000
+
+SLIDE_COPY_FIELDS = [
+    'slide_type', 'order', 'title', 'content', 'subtitle',
+    'background_color', 'background_image', 'text_color', 'font_size', 'text_align',
+    'transition', 'animation', 'custom_css', 'layout_config', 'notes', 'thumbnail',
+]
+
+ELEMENT_COPY_FIELDS = [
+    'element_type', 'order', 'content', 'alt_text',
+    'x_position', 'y_position', 'width', 'height',
+    'font_family', 'font_size', 'font_weight', 'color', 'background_color', 'border_style',
+    'animation', 'animation_delay', 'properties',
+]
+
+
+def _copy(instance, fields):
+    values = {name: getattr(instance, name) for name in fields}
+    for name, value in values.items():
+        # Image fields copy by reference: the clone points at the same stored file
+        if isinstance(value, FieldFile):
+            values[name] = value.name or None
+    return values
+
+
+def clone_presentation(original, author, title, description=None, is_public=False,
+                       clone_slides=True, clone_elements=True):
+    """Copy a presentation tree with a fixed number of round-trips.
+
+    The source slides and elements are read in two queries, then the copies
+    are written with one bulk_create per table (split into batches only as
+    the database's parameter limit requires). New slide PKs come back from
+    bulk_create and are matched to the source slides by position.
+    """
+    source_slides = list(original.slides.order_by('order'))
+    source_elements = []
+    if clone_slides and clone_elements and source_slides:
+        source_elements = list(SlideElement.objects.filter(slide__presentation=original).order_by('slide_id', 'order'))
+
+    with transaction.atomic():
+        presentation = Presentation.objects.create(
+            title=title,
+            description=description if description is not None else original.description,
+            author=author,
+            is_public=is_public,
+            theme=original.theme,
+            template=original.template,
+            transition=original.transition,
+            background_color=original.background_color,
+            text_color=original.text_color,
+            tags=list(original.tags),
+            thumbnail=original.thumbnail.name or None,
+        )
+        if not clone_slides or not source_slides:
+            return presentation
+
+        new_slides = Slide.objects.bulk_create(
+            [Slide(presentation=presentation, **_copy(slide, SLIDE_COPY_FIELDS)) for slide in source_slides],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        slide_map = {source.pk: copy.pk for source, copy in zip(source_slides, new_slides)}
+
+        if source_elements:
+            SlideElement.objects.bulk_create(
+                [
+                    SlideElement(slide_id=slide_map[element.slide_id], **_copy(element, ELEMENT_COPY_FIELDS))
+                    for element in source_elements
+                ],
+                batch_size=BULK_BATCH_SIZE,
+            )
+
+    return presentation
+
+
+# Gap-based ordering: orders are whole numbers ORDER_STEP apart, a new
+# position is the midpoint of its neighbours (or of 0 and the first one),
+# and siblings are renumbered ORDER_STEP, 2 * ORDER_STEP... only once two
+# neighbours are adjacent.
+ORDER_STEP = 1024
+MIN_ORDER_GAP = 2
+
+
+class ReorderError(ValueError):
+    pass
+
+
+def _apply_orders(siblings, current, moved):
+    """Write {pk: order} for a set of siblings in two UPDATEs.
+
+    The first shifts the moved rows above every order in use, the second
+    sets their final values with a CASE, so no intermediate state collides
+    with the unique (parent, order) constraint.
+    """
+    top = max(max(current.values()), max(moved.values()))
+    offset = top - min(current.values()) + ORDER_STEP
+    with transaction.atomic():
+        rows = siblings.filter(pk__in=moved)
+        rows.update(order=F('order') + offset)
+        rows.update(order=Case(*(When(pk=pk, then=Value(order)) for pk, order in moved.items())))
+
+
+def _reorder(siblings, orders, label):
+    current = dict(siblings.values_list('pk', 'order'))
+
+    unknown = sorted(set(orders) - set(current))
+    if unknown:
+        raise ReorderError(f"{label} not in this parent: {', '.join(map(str, unknown))}")
+
+    final = {**current, **orders}
+    seen = {}
+    clashes = []
+    for pk, order in sorted(final.items()):
+        if order in seen:
+            clashes.append(f'{seen[order]} and {pk} -> {order}')
+        seen[order] = pk
+    if clashes:
+        raise ReorderError(f"Duplicate orders: {'; '.join(clashes)}")
+
+    moved = {pk: order for pk, order in orders.items() if current[pk] != order}
+    if moved:
+        _apply_orders(siblings, current, moved)
+    return len(moved)
+
+
+def reorder_slides(presentation, orders):
+    """Apply {slide_id: new_order} to a presentation's slides in constant queries.
+
+    The resulting ordering is validated up front: every id must belong to the
+    presentation and no two slides may end up with the same order, including
+    slides not listed. It is then written with _apply_orders.
+    """
+    moved = _reorder(Slide.objects.filter(presentation=presentation), orders, 'Slides')
+    if moved:
+        # Queryset updates skip Slide.save, which normally moves the watermark
+        Presentation.touch(pk=presentation.pk)
+    return moved
+
+
+def rebalance(siblings):
+    """Renumber siblings to ORDER_STEP, 2 * ORDER_STEP... keeping their sequence"""
+    current = dict(siblings.values_list('pk', 'order'))
+    if current:
+        ranked = sorted(current, key=current.get)
+        _apply_orders(siblings, current, {pk: (i + 1) * ORDER_STEP for i, pk in enumerate(ranked)})
+
+
+def _order_of(siblings, pk):
+    order = siblings.filter(pk=pk).values_list('order', flat=True).first()
+    if order is None:
+        raise ReorderError(f'{pk} is not a sibling of the item being placed')
+    return order
+
+
+def position_between(siblings, after=None, before=None, exclude=None):
+    """Order value for an item placed right after `after` or right before
+    `before` (sibling PKs); at the end if neither is given.
+
+    Reads at most two rows; if the gap there is exhausted, the siblings are
+    rebalanced once and the position recomputed. `exclude` is the PK of the
+    item being moved, which is ignored as a neighbour.
+    """
+    others = siblings.exclude(pk=exclude) if exclude is not None else siblings
+    for attempt in range(2):
+        if after is not None:
+            lower = _order_of(others, after)
+            upper = others.filter(order__gt=lower).order_by('order').values_list('order', flat=True).first()
+        elif before is not None:
+            upper = _order_of(others, before)
+            lower = others.filter(order__lt=upper).order_by('-order').values_list('order', flat=True).first()
+        else:
+            lower = others.order_by('-order').values_list('order', flat=True).first()
+            upper = None
+
+        if upper is None:
+            return ORDER_STEP if lower is None else lower + ORDER_STEP
+        if lower is None:
+            lower = 0  # orders stay positive
+        if upper - lower >= MIN_ORDER_GAP or attempt:
+            return (lower + upper) // 2
+        rebalance(siblings)
+
+
+def move(item, siblings, after=None, before=None):
+    """Move one slide or element next to a sibling, writing only its own row"""
+    item.order = position_between(siblings, after=after, before=before, exclude=item.pk)
+    item.save(update_fields=['order'])
+    return item
+
+
+def apply_element_batch(slide, create=(), update=(), delete=()):
+    """Apply many element creates/updates/deletes to one slide atomically.
+
+    `create` holds field dicts, `update` field dicts with an 'id', `delete`
+    ids. Deletes run first, then updates (one bulk_update for the fields,
+    _reorder for order changes), then creates (one bulk_create; creates
+    without an order are appended in sequence). Returns the created
+    elements in input order.
+    """
+    siblings = SlideElement.objects.filter(slide=slide)
+    update_ids = [item['id'] for item in update]
+    touched = update_ids + list(delete)
+    if len(set(touched)) != len(touched):
+        raise ReorderError('Each element may appear only once across update and delete')
+
+    with transaction.atomic():
+        existing = siblings.in_bulk(touched) if touched else {}
+        unknown = sorted(set(touched) - set(existing))
+        if unknown:
+            raise ReorderError(f"Elements not in this slide: {', '.join(map(str, unknown))}")
+
+        if delete:
+            siblings.filter(pk__in=delete).delete()
+
+        changed = []
+        fields = set()
+        orders = {}
+        for item in update:
+            element = existing[item['id']]
+            for name, value in item.items():
+                if name == 'order':
+                    orders[element.pk] = value
+                elif name != 'id':
+                    setattr(element, name, value)
+                    fields.add(name)
+            changed.append(element)
+        if fields:
+            SlideElement.objects.bulk_update(changed, sorted(fields), batch_size=BULK_BATCH_SIZE)
+        if orders:
+            _reorder(siblings, orders, 'Elements')
+
+        created = []
+        if create:
+            taken = set(siblings.values_list('order', flat=True))
+            for item in create:
+                order = item.get('order')
+                if order is None:
+                    order = max(taken, default=0) + ORDER_STEP
+                elif order in taken:
+                    raise ReorderError(f'Duplicate orders: new element -> {order}')
+                taken.add(order)
+                created.append(SlideElement(slide=slide, **{**item, 'order': order}))
+            created = SlideElement.objects.bulk_create(created, batch_size=BULK_BATCH_SIZE)
+
+        # Bulk writes skip SlideElement.save, which normally moves the watermark
+        Presentation.touch(pk=slide.presentation_id)
+    return created
@@ -1,3 +1,688 @@
-from django.test import TestCase
+import io
+import math
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
 
-# Create your tests here.
+from PIL import Image
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from spectacle.models import Presentation, PresentationTag, Slide, SlideElement
+from spectacle.api.views import (
+    PresentationListCreateAPIView, PresentationDetailAPIView, PresentationExportAPIView,
+    PresentationBundleAPIView, SlideDetailAPIView, SlideElementBatchAPIView,
+)
+from spectacle.thumbnails import THUMBNAIL_HEIGHT, THUMBNAIL_WIDTH, generate_thumbnails
+from spectacle.services import (
+    BULK_BATCH_SIZE, MIN_ORDER_GAP, ORDER_STEP, ReorderError, clone_presentation, move, position_between, rebalance,
+    reorder_slides,
+)
+
+
+def make_presentation(author, title, slides=3, elements=2, is_public=False, **fields):
+    presentation = Presentation.objects.create(title=title, author=author, is_public=is_public, **fields)
+    created = Slide.objects.bulk_create(
+        Slide(presentation=presentation, order=order, title=f'Slide {order}') for order in range(slides)
+    )
+    SlideElement.objects.bulk_create(
+        SlideElement(slide=slide, element_type='text', order=element_order, content=f'Text {element_order}')
+        for slide in created
+        for element_order in range(elements)
+    )
+    return presentation
+
+
+class PresentationQueryCountTests(TestCase):
+    """List and detail must not issue queries per presentation, slide or element"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('author', 'author@example.com', 'password')
+        cls.other = User.objects.create_user('other', 'other@example.com', 'password')
+        for i in range(5):
+            make_presentation(cls.user, f'Own {i}')
+        for i in range(5):
+            make_presentation(cls.other, f'Public {i}', is_public=True)
+        make_presentation(cls.other, 'Private')
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def get(self, view, path, params=None, **kwargs):
+        request = self.factory.get(path, params)
+        force_authenticate(request, user=self.user)
+        response = view(request, **kwargs)
+        response.render()
+        return response
+
+    def test_list_is_one_query(self):
+        view = PresentationListCreateAPIView.as_view()
+        with self.assertNumQueries(1):
+            response = self.get(view, '/presentations/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertTrue(all(item['slide_count'] == 3 for item in response.data['results']))
+
+    def test_list_query_count_does_not_grow(self):
+        view = PresentationListCreateAPIView.as_view()
+        for i in range(10):
+            make_presentation(self.user, f'More {i}', slides=5)
+        with self.assertNumQueries(1):
+            self.get(view, '/presentations/')
+
+    def test_detail_is_three_queries(self):
+        presentation = Presentation.objects.get(title='Own 0')
+        view = PresentationDetailAPIView.as_view()
+        # presentation + author, slides, elements
+        with self.assertNumQueries(3):
+            response = self.get(view, f'/presentations/{presentation.pk}/', pk=presentation.pk)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['slide_count'], 3)
+        self.assertEqual([len(slide['elements']) for slide in response.data['slides']], [2, 2, 2])
+
+
+class PresentationListingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('author', 'author@example.com', 'password')
+        cls.other = User.objects.create_user('other', 'other@example.com', 'password')
+        make_presentation(cls.user, 'Quarterly billing review', slides=0, tags=['Finance', 'q3'])
+        make_presentation(cls.user, 'Team offsite', slides=0, description='Billing is not on the agenda')
+        make_presentation(cls.other, 'Roadmap', slides=0, is_public=True, tags=['finance'])
+        make_presentation(cls.other, 'Secret billing plans', slides=0, tags=['finance'])
+
+    def list(self, **params):
+        request = APIRequestFactory().get('/presentations/', params)
+        force_authenticate(request, user=self.user)
+        response = PresentationListCreateAPIView.as_view()(request)
+        response.render()
+        return response
+
+    def titles(self, response):
+        return sorted(item['title'] for item in response.data['results'])
+
+    def test_tags_are_mirrored_into_tag_rows(self):
+        presentation = Presentation.objects.get(title='Quarterly billing review')
+        self.assertEqual(sorted(presentation.tag_set.values_list('name', flat=True)), ['finance', 'q3'])
+
+        presentation.tags = ['q4']
+        presentation.save()
+        self.assertEqual(list(presentation.tag_set.values_list('name', flat=True)), ['q4'])
+        self.assertFalse(PresentationTag.objects.filter(presentation=presentation, name='finance').exists())
+
+    def test_saves_that_leave_tags_alone_skip_the_sync(self):
+        presentation = Presentation.objects.get(title='Quarterly billing review')
+        presentation.title = 'Q3 billing review'
+        with self.assertNumQueries(1):
+            presentation.save()
+
+        # In-place edits of the loaded list are noticed too
+        presentation.tags.append('Audit')
+        presentation.save()
+        self.assertEqual(sorted(presentation.tag_set.values_list('name', flat=True)), ['audit', 'finance', 'q3'])
+
+    def test_tag_filter(self):
+        self.assertEqual(self.titles(self.list(tag='FINANCE')), ['Quarterly billing review', 'Roadmap'])
+
+    def test_search_matches_title_and_description_prefixes(self):
+        self.assertEqual(self.titles(self.list(search='bill')), ['Quarterly billing review', 'Team offsite'])
+        self.assertEqual(self.titles(self.list(search='billing review')), ['Quarterly billing review'])
+
+    def test_search_matches_tags(self):
+        self.assertEqual(self.titles(self.list(search='finance')), ['Quarterly billing review', 'Roadmap'])
+
+    def test_search_follows_title_updates(self):
+        presentation = Presentation.objects.get(title='Roadmap')
+        presentation.title = 'Billing roadmap'
+        presentation.save()
+        self.assertIn('Billing roadmap', self.titles(self.list(search='billing')))
+
+    def test_cursor_pagination(self):
+        first = self.list(page_size=2)
+        self.assertEqual(len(first.data['results']), 2)
+        self.assertIsNone(first.data['previous'])
+
+        cursor = first.data['next'].split('cursor=')[1].split('&')[0]
+        second = self.list(page_size=2, cursor=cursor)
+        self.assertEqual(len(second.data['results']), 1)
+        self.assertIsNone(second.data['next'])
+        seen = self.titles(first) + self.titles(second)
+        self.assertEqual(sorted(seen), ['Quarterly billing review', 'Roadmap', 'Team offsite'])
+
+
+def insert_batches(model, count):
+    """INSERT statements bulk_create(batch_size=BULK_BATCH_SIZE) needs for count rows"""
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    batch_size = min(BULK_BATCH_SIZE, max(connection.ops.bulk_batch_size(fields, [None] * count), 1))
+    return math.ceil(count / batch_size)
+
+
+class PresentationCloneBenchmark(TestCase):
+    """Clone round-trips must stay flat as the deck grows"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('author', 'author@example.com', 'password')
+
+    def measure(self, slides, elements):
+        source = make_presentation(self.user, f'{slides}x{elements}', slides=slides, elements=elements)
+        source.slides.filter(order=0).update(background_image='slide_backgrounds/cover.png')
+        with CaptureQueriesContext(connection) as queries:
+            clone = clone_presentation(source, self.user, title='Clone')
+        return clone, len(queries)
+
+    def test_clone_queries_grow_only_with_insert_batches(self):
+        small, small_queries = self.measure(slides=5, elements=4)
+        large, large_queries = self.measure(slides=100, elements=20)
+
+        self.assertEqual(large.slides.count(), 100)
+        self.assertEqual(SlideElement.objects.filter(slide__presentation=large).count(), 2000)
+
+        # Fixed reads and writes, plus one INSERT per batch the database's
+        # parameter limit forces (SQLite: a few; PostgreSQL: one per table).
+        # The naive per-row loop needed ~2,100 queries here.
+        small_batches = insert_batches(Slide, 5) + insert_batches(SlideElement, 20)
+        large_batches = insert_batches(Slide, 100) + insert_batches(SlideElement, 2000)
+        self.assertEqual(large_queries - large_batches, small_queries - small_batches)
+        self.assertLessEqual(small_queries - small_batches, 6)
+
+    def test_clone_copies_tree_and_images_by_reference(self):
+        clone, _ = self.measure(slides=3, elements=2)
+        cover = clone.slides.get(order=0)
+        self.assertEqual(cover.background_image.name, 'slide_backgrounds/cover.png')
+        self.assertEqual(
+            [(slide.order, slide.elements.count()) for slide in clone.slides.all()],
+            [(0, 2), (1, 2), (2, 2)],
+        )
+
+
+class SlideReorderTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('author', 'author@example.com', 'password')
+
+    def setUp(self):
+        self.presentation = make_presentation(self.user, 'Deck', slides=200, elements=0)
+        self.slides = list(self.presentation.slides.values_list('pk', flat=True))
+
+    def orders(self):
+        return list(self.presentation.slides.values_list('pk', flat=True))
+
+    def test_reverse_200_slides_in_constant_queries(self):
+        # one read, two UPDATEs, the savepoint pair, and the watermark touch
+        with self.assertNumQueries(6):
+            reorder_slides(self.presentation, {pk: 199 - i for i, pk in enumerate(self.slides)})
+        self.assertEqual(self.orders(), self.slides[::-1])
+
+    def test_swap(self):
+        first, second = self.slides[:2]
+        reorder_slides(self.presentation, {first: 1, second: 0})
+        self.assertEqual(self.orders()[:3], [second, first, self.slides[2]])
+
+    def test_clash_with_unlisted_slide_is_rejected_before_writing(self):
+        with self.assertRaises(ReorderError):
+            reorder_slides(self.presentation, {self.slides[0]: 5})
+        self.assertEqual(self.orders(), self.slides)
+
+    def test_foreign_slide_is_rejected(self):
+        other = make_presentation(self.user, 'Other', slides=1, elements=0)
+        with self.assertRaises(ReorderError):
+            reorder_slides(self.presentation, {other.slides.get().pk: 0})
+
+    def test_bulk_update_rejects_orders_outside_the_column(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for order in (-1, 2 ** 31):
+            response = client.put(
+                f'/api/spectacle/presentations/{self.presentation.pk}/slides/bulk-update/',
+                {'slides': [{'id': self.slides[0], 'order': order}]}, format='json',
+            )
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.orders(), self.slides)
+
+
+class GapOrderingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('author', 'author@example.com', 'password')
+
+    def setUp(self):
+        self.presentation = make_presentation(self.user, 'Deck', slides=50, elements=0)
+        rebalance(self.presentation.slides.all())
+        self.slides = list(self.presentation.slides.values_list('pk', flat=True))
+
+    def orders(self):
+        return list(self.presentation.slides.values_list('pk', flat=True))
+
+    def test_move_writes_only_the_moved_row(self):
+        last = Slide.objects.get(pk=self.slides[-1])
+        # two neighbour reads, one UPDATE and the watermark touch, whatever the deck size
+        with self.assertNumQueries(4):
+            move(last, self.presentation.slides.all(), after=self.slides[0])
+        self.assertEqual(self.orders()[:3], [self.slides[0], last.pk, self.slides[1]])
+        self.assertEqual(last.order, ORDER_STEP + ORDER_STEP // 2)
+        self.assertEqual(Slide.objects.get(pk=self.slides[1]).order, 2 * ORDER_STEP)
+
+    def test_insert_at_end_and_before_first(self):
+        slides = self.presentation.slides.all()
+        self.assertEqual(position_between(slides), 51 * ORDER_STEP)
+        self.assertEqual(position_between(slides, before=self.slides[0]), ORDER_STEP // 2)
+
+    def test_exhausted_gap_rebalances_once(self):
+        first, second = (Slide.objects.get(pk=pk) for pk in self.slides[:2])
+        second.order = first.order + MIN_ORDER_GAP - 1
+        second.save(update_fields=['order'])
+
+        order = position_between(self.presentation.slides.all(), after=first.pk)
+        self.assertEqual(order, ORDER_STEP + ORDER_STEP // 2)
+        self.assertEqual(
+            list(self.presentation.slides.values_list('order', flat=True)[:3]),
+            [ORDER_STEP, 2 * ORDER_STEP, 3 * ORDER_STEP],
+        )
+        self.assertEqual(self.orders(), self.slides)
+
+    def test_api_orders_stay_whole_numbers(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        base = f'/api/spectacle/presentations/{self.presentation.pk}/slides/'
+        for _ in range(12):
+            # Repeatedly splitting the same gap exhausts it and forces a rebalance
+            response = client.post(f'{base}{self.slides[-1]}/move/', {'after': self.slides[0]}, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertIsInstance(response.data['order'], int)
+            self.slides.insert(1, self.slides.pop())
+        self.assertEqual(self.orders(), self.slides)
+
+        response = client.get(base)
+        self.assertTrue(all(isinstance(slide['order'], int) for slide in response.data))
+
+    def test_create_validates_the_anchor(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        base = f'/api/spectacle/presentations/{self.presentation.pk}/slides/'
+        for anchor in ({}, 'first', [1]):
+            response = client.post(base, {'title': 'New', 'after': anchor}, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('after', response.data)
+        response = client.post(base, {'title': 'New', 'after': self.slides[0], 'before': self.slides[1]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = client.post(base, {'title': 'New', 'before': self.slides[0], 'after': None}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.orders()[0], response.data['id'])
+
+        element = client.post(f'{base}{self.slides[0]}/elements/', {
+            'element_type': 'text', 'content': 'x', 'before': {},
+        }, format='json')
+        self.assertEqual(element.status_code, 400)
+
+    def test_unknown_neighbour_is_rejected(self):
+        other = make_presentation(self.user, 'Other', slides=1, elements=0)
+        with self.assertRaises(ReorderError):
+            position_between(self.presentation.slides.all(), after=other.slides.get().pk)
+
+
+class PresentationExportCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('author', 'author@example.com', 'password')
+        cls.other = User.objects.create_user('other', 'other@example.com', 'password')
+
+    def setUp(self):
+        cache.clear()
+        self.presentation = make_presentation(self.user, 'Deck', slides=20, elements=5)
+
+    def export(self, user=None, **headers):
+        request = APIRequestFactory().get(f'/presentations/{self.presentation.pk}/export/', **headers)
+        force_authenticate(request, user=user or self.user)
+        response = PresentationExportAPIView.as_view()(request, pk=self.presentation.pk)
+        response.render()
+        return response
+
+    def test_export_is_built_once_then_cached(self):
+        # watermark, presentation + author, slides, elements
+        with self.assertNumQueries(4):
+            first = self.export()
+        self.assertEqual(len(first.data['slides']), 20)
+        self.assertEqual([len(slide['elements']) for slide in first.data['slides']], [5] * 20)
+
+        with self.assertNumQueries(1):
+            second = self.export()
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_if_none_match_gets_304(self):
+        etag = self.export()['ETag']
+        response = self.export(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_element_edit_moves_the_watermark(self):
+        first = self.export()
+        element = SlideElement.objects.filter(slide__presentation=self.presentation).first()
+        element.content = 'Edited'
+        element.save()
+
+        response = self.export(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        contents = [e['content'] for slide in response.data['slides'] for e in slide['elements']]
+        self.assertIn('Edited', contents)
+
+    def test_private_deck_is_not_served_from_cache_to_others(self):
+        self.export()
+        self.assertEqual(self.export(user=self.other).status_code, 404)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class PresentationBundleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('author', 'author@example.com', 'password')
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        default_storage.save('slide_backgrounds/cover.png', ContentFile(b'png bytes'))
+        self.presentation = make_presentation(self.user, 'Deck </script>', slides=3, elements=1)
+        # Two slides share one image: it is stored in the bundle once
+        self.presentation.slides.filter(order__lt=2).update(background_image='slide_backgrounds/cover.png')
+
+    def get(self):
+        request = APIRequestFactory().get(f'/presentations/{self.presentation.pk}/bundle/')
+        force_authenticate(request, user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return PresentationBundleAPIView.as_view()(request, pk=self.presentation.pk)
+
+    def test_bundle_is_built_in_background_then_served(self):
+        pending = self.get()
+        self.assertEqual(pending.status_code, 202)
+
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        assets = [name for name in archive.namelist() if name.startswith('assets/')]
+        self.assertEqual(len(assets), 1)
+        self.assertTrue(assets[0].endswith('.png'))
+        self.assertEqual(archive.read(assets[0]), b'png bytes')
+
+        index = archive.read('index.html').decode()
+        self.assertIn(f'"backgroundImage":"{assets[0]}"', index)
+        self.assertIn('<title>Deck &lt;/script&gt;</title>', index)
+        self.assertEqual(index.count('</script>'), 2)
+
+    def test_edit_starts_a_new_revision(self):
+        self.get()
+        first = self.get()
+        self.assertEqual(first.status_code, 200)
+
+        slide = self.presentation.slides.first()
+        slide.title = 'Changed'
+        slide.save()
+        self.assertEqual(self.get().status_code, 202)
+        self.assertEqual(self.get().status_code, 200)
+        _, files = default_storage.listdir(f'spectacle_bundles/{self.presentation.pk}')
+        self.assertEqual(len(files), 1)
+
+    def test_bundle_pruned_while_serving_is_reported_pending(self):
+        self.get()
+        # A newer revision's build deletes this one between lookup and open
+        with mock.patch.object(default_storage, 'open', side_effect=FileNotFoundError):
+            response = self.get()
+        self.assertEqual(response.status_code, 202)
+
+    def bundled_elements(self, *contents):
+        slide = self.presentation.slides.first()
+        SlideElement.objects.bulk_create(
+            SlideElement(slide=slide, element_type='image', order=100 + i, content=content)
+            for i, content in enumerate(contents)
+        )
+        self.presentation.save()
+        self.get()
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        return archive, archive.read('index.html').decode()
+
+    def test_paths_outside_media_are_left_as_links(self):
+        escaping = f'{settings.MEDIA_URL}../manage.py'
+        archive, index = self.bundled_elements(escaping, f'{settings.MEDIA_URL}slide_backgrounds/../cover.png')
+        self.assertIn(f'"content":"{escaping}"', index)
+        self.assertEqual(len([name for name in archive.namelist() if name.startswith('assets/')]), 1)
+
+    def test_other_users_media_is_not_bundled(self):
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        default_storage.save('slide_backgrounds/theirs.png', ContentFile(b'their bytes'))
+        make_presentation(other, 'Theirs', slides=1, elements=0).slides.update(
+            background_image='slide_backgrounds/theirs.png'
+        )
+        theirs = f'{settings.MEDIA_URL}slide_backgrounds/theirs.png'
+        mine = f'{settings.MEDIA_URL}slide_backgrounds/cover.png'
+
+        archive, index = self.bundled_elements(theirs, mine)
+        self.assertIn(f'"content":"{theirs}"', index)
+        self.assertNotIn(f'"content":"{mine}"', index)
+        contents = [archive.read(name) for name in archive.namelist() if name.startswith('assets/')]
+        self.assertEqual(contents, [b'png bytes'])
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class ThumbnailTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('author', 'author@example.com', 'password')
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.presentation = make_presentation(self.user, 'Deck', slides=3, elements=2)
+
+    def stored(self):
+        _, files = default_storage.listdir('spectacle_thumbnails')
+        return sum(len(default_storage.listdir(f'spectacle_thumbnails/{d}')[1]) for d in _)
+
+    def test_previews_and_deck_thumbnail(self):
+        paths = generate_thumbnails(self.presentation.pk)
+        slides = list(self.presentation.slides.all())
+        self.assertEqual({slide.pk: slide.thumbnail.name for slide in slides}, paths)
+
+        self.presentation.refresh_from_db()
+        self.assertEqual(self.presentation.thumbnail.name, slides[0].thumbnail.name)
+        with default_storage.open(slides[0].thumbnail.name) as f, Image.open(f) as image:
+            self.assertEqual(image.size, (THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT))
+
+    def test_unchanged_slides_are_not_redrawn(self):
+        generate_thumbnails(self.presentation.pk)
+        before = self.stored()
+        slide = self.presentation.slides.last()
+        old = slide.thumbnail.name
+
+        generate_thumbnails(self.presentation.pk)
+        self.assertEqual(self.stored(), before)
+
+        slide.background_color = '#ff0000'
+        slide.save()
+        generate_thumbnails(self.presentation.pk)
+        # The new preview replaces the old one, which nothing else uses
+        self.assertEqual(self.stored(), before)
+        self.assertFalse(default_storage.exists(old))
+        slide.refresh_from_db()
+        self.assertNotEqual(slide.thumbnail.name, old)
+
+    def test_shared_preview_outlives_one_of_its_slides(self):
+        twin = make_presentation(self.user, 'Twin', slides=3, elements=2)
+        generate_thumbnails(self.presentation.pk)
+        generate_thumbnails(twin.pk)
+        slide = self.presentation.slides.first()
+        shared = slide.thumbnail.name
+        self.assertEqual(twin.slides.first().thumbnail.name, shared)
+
+        slide.title = 'Changed'
+        slide.save()
+        generate_thumbnails(self.presentation.pk)
+        self.assertTrue(default_storage.exists(shared))
+
+        twin.slides.filter(pk=twin.slides.first().pk).update(title='Changed')
+        generate_thumbnails(twin.pk)
+        self.assertFalse(default_storage.exists(shared))
+
+    def test_uploaded_deck_thumbnail_is_kept(self):
+        Presentation.objects.filter(pk=self.presentation.pk).update(thumbnail='presentation_thumbnails/mine.png')
+        generate_thumbnails(self.presentation.pk)
+        self.presentation.refresh_from_db()
+        self.assertEqual(self.presentation.thumbnail.name, 'presentation_thumbnails/mine.png')
+
+    def test_slide_update_schedules_a_render(self):
+        slide = self.presentation.slides.first()
+        request = APIRequestFactory().put(
+            f'/presentations/{self.presentation.pk}/slides/{slide.pk}/',
+            {'title': 'New title', 'order': slide.order}, format='json',
+        )
+        force_authenticate(request, user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = SlideDetailAPIView.as_view()(request, presentation_pk=self.presentation.pk, slide_pk=slide.pk)
+        self.assertEqual(response.status_code, 200)
+        slide.refresh_from_db()
+        self.assertTrue(slide.thumbnail.name.startswith('spectacle_thumbnails/'))
+
+
+class SlideElementBatchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('author', 'author@example.com', 'password')
+        cls.other = User.objects.create_user('other', 'other@example.com', 'password')
+
+    def setUp(self):
+        self.presentation = make_presentation(self.user, 'Deck', slides=1, elements=40, is_public=True)
+        self.slide = self.presentation.slides.get()
+        self.elements = list(self.slide.elements.values_list('pk', flat=True))
+
+    def batch(self, payload, user=None):
+        request = APIRequestFactory().post(
+            f'/presentations/{self.presentation.pk}/slides/{self.slide.pk}/elements/batch/', payload, format='json'
+        )
+        force_authenticate(request, user=user or self.user)
+        response = SlideElementBatchAPIView.as_view()(
+            request, presentation_pk=self.presentation.pk, slide_pk=self.slide.pk
+        )
+        response.render()
+        return response
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        def payload(count):
+            return {
+                'create': [{'element_type': 'text', 'content': f'New {i}'} for i in range(count)],
+                'update': [{'id': pk, 'x_position': 10 * i} for i, pk in enumerate(self.elements[:count])],
+                'delete': self.elements[-count:],
+            }
+
+        with CaptureQueriesContext(connection) as small:
+            self.batch(payload(2))
+        self.setUp()
+        with CaptureQueriesContext(connection) as large:
+            response = self.batch(payload(15))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(len(response.data['created']), 15)
+        self.assertEqual(len(response.data['elements']), 40)
+        self.assertEqual(SlideElement.objects.get(pk=self.elements[3]).x_position, 30)
+
+    def test_orders_can_be_swapped_and_new_elements_appended(self):
+        first, second = self.elements[:2]
+        response = self.batch({
+            'update': [{'id': first, 'order': 1}, {'id': second, 'order': 0}],
+            'create': [{'element_type': 'heading', 'content': 'Last'}],
+        })
+        self.assertEqual(response.status_code, 200)
+        ids = [element['id'] for element in response.data['elements']]
+        self.assertEqual(ids[:2], [second, first])
+        self.assertEqual(ids[-1], response.data['created'][0])
+
+    def test_invalid_batch_changes_nothing(self):
+        other_slide = make_presentation(self.user, 'Other', slides=1, elements=1).slides.get()
+        foreign = other_slide.elements.get().pk
+        response = self.batch({'delete': self.elements[:5], 'update': [{'id': foreign, 'content': 'x'}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.slide.elements.count(), 40)
+
+    def test_only_the_author_may_batch(self):
+        response = self.batch({'delete': self.elements[:1]}, user=self.other)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.slide.elements.count(), 40)
+
+
+class PresentationAccessTests(TestCase):
+    """Routes are mounted under /api/spectacle/ and resolve the presentation once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('author', 'author@example.com', 'password')
+        cls.other = User.objects.create_user('other', 'other@example.com', 'password')
+        cls.public = make_presentation(cls.user, 'Public', slides=2, elements=2, is_public=True)
+        cls.private = make_presentation(cls.user, 'Private', slides=1, elements=1)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def element_url(self, presentation):
+        slide = presentation.slides.first()
+        element = slide.elements.first()
+        return f'/api/spectacle/presentations/{presentation.pk}/slides/{slide.pk}/elements/{element.pk}/'
+
+    def test_nested_element_read_is_two_queries(self):
+        self.client.force_authenticate(self.user)
+        url = self.element_url(self.public)
+        # presentation (for the permission check), element joined to its slide
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_readers_can_read_public_decks_but_not_write(self):
+        self.client.force_authenticate(self.other)
+        url = self.element_url(self.public)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json(), {'error': 'Permission denied'})
+
+    def test_private_decks_are_hidden_from_others(self):
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(self.element_url(self.private)).status_code, 404)
+        self.assertEqual(self.client.get(f'/api/spectacle/presentations/{self.private.pk}/').status_code, 404)
+
+    def test_author_can_write(self):
+        self.client.force_authenticate(self.user)
+        url = self.element_url(self.private)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+
+    def test_anonymous_requests_are_rejected(self):
+        self.assertIn(self.client.get(self.element_url(self.public)).status_code, (401, 403))
@@ -0,0 +1,174 @@
+# thumbnails.py
+"""
+Low-resolution slide previews and the deck thumbnail.
+
+Each slide is drawn from its colours, background image, title and element
+boxes. The PNG is stored under the SHA-256 of exactly those inputs, so an
+unchanged slide is never redrawn and identical slides (e.g. in clones)
+share one file. The first slide's preview becomes the deck thumbnail
+unless the author uploaded one. A replaced preview is deleted once no slide
+or deck points at it any more.
+"""
+import hashlib
+import io
+import json
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageColor, ImageDraw, ImageOps
+
+from rolwebsite.background import run_in_background
+from spectacle.bundle import STAGE_WIDTH, STAGE_HEIGHT
+from spectacle.models import Presentation, Slide, SlideElement
+
+THUMBNAIL_WIDTH = 320
+THUMBNAIL_HEIGHT = 180
+THUMBNAIL_DIRECTORY = 'spectacle_thumbnails'
+PENDING_TIMEOUT = 10 * 60
+
+ELEMENT_FILL = '#e2e8f0'
+ELEMENT_OUTLINE = '#94a3b8'
+
+SLIDE_INPUT_FIELDS = ('id', 'background_color', 'background_image', 'text_color', 'title', 'thumbnail')
+ELEMENT_INPUT_FIELDS = (
+    'slide_id', 'element_type', 'x_position', 'y_position', 'width', 'height', 'color', 'background_color',
+)
+
+
+def _color(value, default):
+    try:
+        return ImageColor.getrgb(value) if value else ImageColor.getrgb(default)
+    except ValueError:
+        return ImageColor.getrgb(default)
+
+
+def slide_inputs(slide, elements, presentation):
+    """Everything the preview depends on, as plain JSON-able values"""
+    return {
+        'background': slide['background_color'] or presentation['background_color'],
+        'image': slide['background_image'] or '',
+        'text': slide['text_color'] or presentation['text_color'],
+        'title': slide['title'],
+        'elements': [
+            [e['element_type'], e['x_position'], e['y_position'], e['width'], e['height'],
+             e['color'], e['background_color']]
+            for e in elements
+        ],
+    }
+
+
+def content_hash(inputs):
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+def thumbnail_path(digest):
+    return f'{THUMBNAIL_DIRECTORY}/{digest[:2]}/{digest}.png'
+
+
+def render_slide(inputs):
+    """PNG bytes of a THUMBNAIL_WIDTH x THUMBNAIL_HEIGHT preview"""
+    image = Image.new('RGB', (THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT), _color(inputs['background'], '#ffffff'))
+    if inputs['image'] and default_storage.exists(inputs['image']):
+        try:
+            with default_storage.open(inputs['image']) as source, Image.open(source) as background:
+                # draft() lets JPEG decode straight at a reduced scale
+                background.draft('RGB', (THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT))
+                image.paste(ImageOps.fit(background.convert('RGB'), image.size))
+        except OSError:
+            pass  # Unreadable image: keep the plain background
+
+    draw = ImageDraw.Draw(image)
+    scale_x = THUMBNAIL_WIDTH / STAGE_WIDTH
+    scale_y = THUMBNAIL_HEIGHT / STAGE_HEIGHT
+    for element_type, x, y, width, height, color, background_color in inputs['elements']:
+        box = (x * scale_x, y * scale_y, (x + max(width, 1)) * scale_x, (y + max(height, 1)) * scale_y)
+        if element_type in ('image', 'video', 'chart', 'shape'):
+            draw.rectangle(box, fill=_color(background_color, ELEMENT_FILL), outline=ELEMENT_OUTLINE)
+        else:
+            # Text-like elements: a bar in the text colour stands in for the lines
+            if background_color:
+                draw.rectangle(box, fill=_color(background_color, ELEMENT_FILL))
+            line = (box[0], box[1], box[2], min(box[3], box[1] + 3))
+            draw.rectangle(line, fill=_color(color or inputs['text'], '#000000'))
+
+    if inputs['title']:
+        draw.text((8, 6), inputs['title'][:40], fill=_color(inputs['text'], '#000000'))
+
+    output = io.BytesIO()
+    image.save(output, format='PNG', optimize=True)
+    return output.getvalue()
+
+
+def _pending_key(presentation_id):
+    return f'spectacle-thumbnails-pending:{presentation_id}'
+
+
+def schedule_thumbnails(presentation_id):
+    """Queue generate_thumbnails after the current transaction.
+
+    At most one run is queued per presentation; the run clears the flag
+    before reading, so edits made while it works queue another.
+    """
+    if cache.add(_pending_key(presentation_id), True, PENDING_TIMEOUT):
+        run_in_background(generate_thumbnails, presentation_id)
+
+
+def _prune_unreferenced(paths):
+    """Delete the previews among paths that no slide or deck uses any more"""
+    paths = {path for path in paths if path and path.startswith(f'{THUMBNAIL_DIRECTORY}/')}
+    if not paths:
+        return
+    used = set(Slide.objects.filter(thumbnail__in=paths).values_list('thumbnail', flat=True))
+    used.update(Presentation.objects.filter(thumbnail__in=paths).values_list('thumbnail', flat=True))
+    for path in paths - used:
+        default_storage.delete(path)
+
+
+def generate_thumbnails(presentation_id):
+    """Render missing slide previews and point slides and the deck at them.
+
+    Returns {slide_id: path}.
+    """
+    cache.delete(_pending_key(presentation_id))
+    presentation = Presentation.objects.filter(pk=presentation_id).values(
+        'background_color', 'text_color', 'thumbnail'
+    ).first()
+    if presentation is None:
+        return {}
+
+    slides = list(Slide.objects.filter(presentation_id=presentation_id).order_by('order').values(*SLIDE_INPUT_FIELDS))
+    elements = {}
+    for element in SlideElement.objects.filter(slide__presentation_id=presentation_id).order_by(
+        'slide_id', 'order'
+    ).values(*ELEMENT_INPUT_FIELDS):
+        elements.setdefault(element['slide_id'], []).append(element)
+
+    paths = {}
+    changed = []
+    replaced = []
+    for slide in slides:
+        inputs = slide_inputs(slide, elements.get(slide['id'], []), presentation)
+        path = thumbnail_path(content_hash(inputs))
+        if not default_storage.exists(path):
+            default_storage.save(path, ContentFile(render_slide(inputs)))
+        paths[slide['id']] = path
+        if slide['thumbnail'] != path:
+            changed.append(Slide(pk=slide['id'], thumbnail=path))
+            replaced.append(slide['thumbnail'])
+
+    # Queryset writes: previews are derived data and must not move the export watermark
+    if changed:
+        Slide.objects.bulk_update(changed, ['thumbnail'])
+
+    # Only replace a deck thumbnail this pipeline set; uploads live elsewhere
+    current = presentation['thumbnail'] or ''
+    if not current or current.startswith(f'{THUMBNAIL_DIRECTORY}/'):
+        deck_thumbnail = paths[slides[0]['id']] if slides else None
+        if deck_thumbnail != (current or None):
+            Presentation.objects.filter(pk=presentation_id).update(thumbnail=deck_thumbnail)
+            replaced.append(current)
+
+    # Identical slides share a preview, so only unreferenced files may go
+    _prune_unreferenced(replaced)
+    return paths